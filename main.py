@@ -1,3 +1,5 @@
+import math
+
 import redis.asyncio as redis
 import uvicorn
 from dotenv import load_dotenv
@@ -10,7 +12,31 @@ from starlette.responses import JSONResponse
 from custom_fast_api import CustomFastAPI
 from src.cache.async_redis import get_redis
 from src.conf.config import settings
-from src.routes import users, auth, photos, transform_photos, rates, comments
+from src.routes import (
+    users,
+    auth,
+    photos,
+    transform_photos,
+    rates,
+    comments,
+    storage,
+    metrics,
+)
+from src.services.photo_upload_jobs import (
+    start_photo_upload_worker,
+    stop_photo_upload_worker,
+)
+from src.services.process_pool import (
+    ProcessPoolBusyError,
+    close_process_pool,
+    init_process_pool,
+)
+from src.services.storage_jobs import (
+    start_storage_delete_worker,
+    stop_storage_delete_worker,
+)
+from src.storage.circuit_breaker import StorageUnavailableError
+from src.storage.client import init_storage, close_storage
 
 app = CustomFastAPI()
 
@@ -19,6 +45,18 @@ app = CustomFastAPI()
 async def startup():
     r = await get_redis()
     await FastAPILimiter.init(r)
+    init_storage()
+    init_process_pool()
+    start_storage_delete_worker(r)
+    start_photo_upload_worker(r)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_photo_upload_worker()
+    await stop_storage_delete_worker()
+    close_process_pool()
+    close_storage()
 
 
 app.include_router(users.router, prefix="/api")
@@ -27,6 +65,8 @@ app.include_router(photos.router, prefix="/api")
 app.include_router(transform_photos.router, prefix="/api")
 app.include_router(rates.router, prefix="/api")
 app.include_router(comments.router, prefix="/api")
+app.include_router(storage.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
 
 
 @AuthJWT.load_config
@@ -52,6 +92,28 @@ async def missing_token_exception_handler(request: Request, exc: MissingTokenErr
     )
 
 
+@app.exception_handler(StorageUnavailableError)
+async def storage_unavailable_exception_handler(
+    request: Request, exc: StorageUnavailableError
+):
+    return JSONResponse(
+        status_code=503,
+        content={"message": "Photo storage is temporarily unavailable"},
+        headers={"Retry-After": str(max(math.ceil(exc.retry_after), 1))},
+    )
+
+
+@app.exception_handler(ProcessPoolBusyError)
+async def process_pool_busy_exception_handler(
+    request: Request, exc: ProcessPoolBusyError
+):
+    return JSONResponse(
+        status_code=503,
+        content={"message": "Server is busy processing images, try again later"},
+        headers={"Retry-After": str(max(math.ceil(exc.retry_after), 1))},
+    )
+
+
 if __name__ == "__main__":
     load_dotenv()
     uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,38 @@
+"""Add status column to photos
+
+Revision ID: 1f6b2d8c9e47
+Revises: 9c3d5a7e2f14
+Create Date: 2026-10-19 14:05:12.481736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1f6b2d8c9e47"
+down_revision: Union[str, None] = "9c3d5a7e2f14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "photos",
+        sa.Column(
+            "status", sa.String(length=20), server_default="ready", nullable=False
+        ),
+    )
+    op.alter_column(
+        "photos", "url", existing_type=sa.String(length=1000), nullable=True
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM photos WHERE url IS NULL")
+    op.alter_column(
+        "photos", "url", existing_type=sa.String(length=1000), nullable=False
+    )
+    op.drop_column("photos", "status")
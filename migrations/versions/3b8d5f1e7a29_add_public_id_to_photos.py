@@ -0,0 +1,60 @@
+"""Add public_id column to photos
+
+Revision ID: 3b8d5f1e7a29
+Revises: 6e2a9d4b1c38
+Create Date: 2026-10-19 18:05:13.482716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b8d5f1e7a29"
+down_revision: Union[str, None] = "6e2a9d4b1c38"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _get_public_id_from_url(photo_url: str) -> str | None:
+    parts = photo_url.split("/")
+    if "PhotoShareApp" not in parts:
+        return None
+    parts = parts[parts.index("PhotoShareApp"):]
+    parts[-1] = parts[-1].split(".")[0]
+    return "/".join(parts)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "photos", sa.Column("public_id", sa.String(length=500), nullable=True)
+    )
+    photos = sa.table(
+        "photos",
+        sa.column("id", sa.Integer),
+        sa.column("url", sa.String),
+        sa.column("public_id", sa.String),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(photos.c.id, photos.c.url).where(photos.c.url.is_not(None))
+    ).all()
+    values = [
+        {"photo_id": photo_id, "public_id": _get_public_id_from_url(url)}
+        for photo_id, url in rows
+    ]
+    if values:
+        connection.execute(
+            photos.update()
+            .where(photos.c.id == sa.bindparam("photo_id"))
+            .values(public_id=sa.bindparam("public_id")),
+            values,
+        )
+    op.create_index("ix_photos_public_id", "photos", ["public_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_photos_public_id", table_name="photos")
+    op.drop_column("photos", "public_id")
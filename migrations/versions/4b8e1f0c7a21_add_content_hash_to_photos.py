@@ -0,0 +1,35 @@
+"""Add content_hash column to photos
+
+Revision ID: 4b8e1f0c7a21
+Revises: c414ceaf5032
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4b8e1f0c7a21"
+down_revision: Union[str, None] = "c414ceaf5032"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "photos", sa.Column("content_hash", sa.String(length=64), nullable=True)
+    )
+    op.create_index(
+        "ix_photos_content_hash_created_by",
+        "photos",
+        ["content_hash", "created_by"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_photos_content_hash_created_by", table_name="photos")
+    op.drop_column("photos", "content_hash")
@@ -0,0 +1,35 @@
+"""Add transformation_key column to photos
+
+Revision ID: 6e2a9d4b1c38
+Revises: 1f6b2d8c9e47
+Create Date: 2026-10-19 16:42:27.905113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6e2a9d4b1c38"
+down_revision: Union[str, None] = "1f6b2d8c9e47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "photos", sa.Column("transformation_key", sa.String(length=64), nullable=True)
+    )
+    op.create_index(
+        "ix_photos_transformation_key",
+        "photos",
+        ["transformation_key"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_photos_transformation_key", table_name="photos")
+    op.drop_column("photos", "transformation_key")
@@ -0,0 +1,30 @@
+"""Add index on original_photo_id of photos
+
+Revision ID: 9c3d5a7e2f14
+Revises: 4b8e1f0c7a21
+Create Date: 2026-10-19 11:40:27.604913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c3d5a7e2f14"
+down_revision: Union[str, None] = "4b8e1f0c7a21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_photos_original_photo_id",
+        "photos",
+        ["original_photo_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_photos_original_photo_id", table_name="photos")
@@ -0,0 +1,204 @@
+import hashlib
+import json
+from typing import Any, AsyncIterator
+
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from redis.asyncio import Redis
+from starlette.datastructures import UploadFile
+
+from src.cache.async_redis import get_redis
+from src.conf.config import settings
+from src.database.models.user import User
+from src.repository.users import get_current_user
+
+PROCESSING = "processing"
+COMPLETED = "completed"
+FORM_CONTENT_TYPES = ("multipart/form-data", "application/x-www-form-urlencoded")
+BODY_CHUNK_SIZE = 1024 * 1024
+
+
+class IdempotentRequest:
+    """
+    Idempotency state of the request. Holds the response of the original request
+    when the request is retried with the same key.
+    """
+
+    def __init__(
+        self,
+        r: Redis | None = None,
+        key: str | None = None,
+        fingerprint: str | None = None,
+        replay: JSONResponse | None = None,
+    ):
+        self.r = r
+        self.key = key
+        self.fingerprint = fingerprint
+        self.replay = replay
+        self.is_saved = False
+
+    async def save(
+        self,
+        content: Any,
+        status_code: int = status.HTTP_200_OK,
+        headers: dict[str, str] | None = None,
+    ) -> JSONResponse:
+        """
+        Method stores the response, so the retries of the request get it without
+        repeating the work, and returns it.
+
+        :param content: Response content.
+        :type content: Any.
+        :param status_code: Response status code.
+        :type status_code: int.
+        :param headers: Response headers.
+        :type headers: dict[str, str] | None.
+        :return: Response.
+        :rtype: JSONResponse.
+        """
+        content = jsonable_encoder(content)
+        if self.key is not None:
+            await self.r.set(
+                self.key,
+                json.dumps(
+                    {
+                        "state": COMPLETED,
+                        "fingerprint": self.fingerprint,
+                        "status_code": status_code,
+                        "content": content,
+                        "headers": headers or {},
+                    }
+                ),
+                ex=settings.idempotency_key_ttl_seconds,
+            )
+            self.is_saved = True
+        return JSONResponse(status_code=status_code, content=content, headers=headers)
+
+
+class IdempotencyKey:
+    """
+    Route dependency that makes the requests with the Idempotency-Key header
+    safe to retry. Keys are stored per scope and user, a key reused with another
+    method, URL or body is rejected.
+
+    :param scope: str: The name of the group of routes sharing the keys.
+    :type scope: str
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+
+    @staticmethod
+    async def _get_body_hash(request: Request) -> str:
+        """
+        Method returns SHA-256 of the request body. The form fields and the
+        content of the uploaded files are hashed instead of the raw form, as
+        FastAPI has already consumed the body stream to parse it.
+
+        :param request: Incoming request.
+        :type request: Request.
+        :return: The hex digest of the body.
+        :rtype: str.
+        """
+        digest = hashlib.sha256()
+        if not request.headers.get("content-type", "").startswith(FORM_CONTENT_TYPES):
+            digest.update(await request.body())
+            return digest.hexdigest()
+        form = await request.form()
+        for name, value in form.multi_items():
+            field_digest = hashlib.sha256()
+            if isinstance(value, UploadFile):
+                await value.seek(0)
+                while chunk := await value.read(BODY_CHUNK_SIZE):
+                    field_digest.update(chunk)
+                await value.seek(0)
+            else:
+                field_digest.update(value.encode())
+            digest.update(f"{name}={field_digest.hexdigest()}\n".encode())
+        return digest.hexdigest()
+
+    async def __call__(
+        self,
+        request: Request,
+        current_user: User = Depends(get_current_user),
+        r: Redis = Depends(get_redis),
+        idempotency_key: str | None = Header(default=None, max_length=255),
+    ) -> AsyncIterator[IdempotentRequest]:
+        """
+        Dependency function that makes the request idempotent when the client
+        sends the Idempotency-Key header. The first request with the key is
+        processed and its response is stored, the retries with the same key and
+        the same method, URL and body get the stored response. A retry received while the first request is still
+        processed is rejected with 409. The key is released if the request
+        fails, so it can be retried.
+
+        :param request: Incoming request.
+        :type request: Request.
+        :param current_user: Authorized user.
+        :type current_user: User.
+        :param r: Redis instance.
+        :type r: redis.asyncio.Redis.
+        :param idempotency_key: Value of the Idempotency-Key header.
+        :type idempotency_key: str | None.
+        :return: Idempotency state of the request.
+        :rtype: AsyncIterator[IdempotentRequest].
+        """
+        if idempotency_key is None:
+            yield IdempotentRequest()
+            return
+
+        key_hash = hashlib.sha256(idempotency_key.encode()).hexdigest()
+        key = f"idempotency:{self.scope}:{current_user.id}:{key_hash}"
+        fingerprint = (
+            f"{request.method} {request.url.path}?{request.url.query} "
+            f"{await self._get_body_hash(request)}"
+        )
+        is_locked = await r.set(
+            key,
+            json.dumps({"state": PROCESSING, "fingerprint": fingerprint}),
+            ex=settings.idempotency_lock_ttl_seconds,
+            nx=True,
+        )
+        if not is_locked:
+            yield self._get_replay(await r.get(key), fingerprint)
+            return
+
+        idempotent_request = IdempotentRequest(r=r, key=key, fingerprint=fingerprint)
+        try:
+            yield idempotent_request
+        finally:
+            if not idempotent_request.is_saved:
+                await r.delete(key)
+
+    @staticmethod
+    def _get_replay(stored: bytes | None, fingerprint: str) -> IdempotentRequest:
+        """
+        Method returns the stored response of the request with the same key.
+
+        :param stored: Stored idempotency state.
+        :type stored: bytes | None.
+        :param fingerprint: Method, path, query and body hash of the request.
+        :type fingerprint: str.
+        :return: Idempotency state with the stored response.
+        :rtype: IdempotentRequest.
+        """
+        stored = json.loads(stored) if stored else {"state": PROCESSING}
+        if stored.get("fingerprint", fingerprint) != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for another request",
+            )
+        if stored["state"] != COMPLETED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "1"},
+            )
+        return IdempotentRequest(
+            replay=JSONResponse(
+                status_code=stored["status_code"],
+                content=stored["content"],
+                headers={**stored["headers"], "Idempotent-Replayed": "true"},
+            )
+        )
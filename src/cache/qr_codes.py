@@ -0,0 +1,135 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+
+from src.conf.config import settings
+from src.schemas import PhotoQrCodeModel
+
+# Changing the rendering of QR codes must change the version, so the images
+# cached for the previous rendering aren't served.
+QR_CODE_CACHE_VERSION = 1
+
+
+class BytesLRUCache:
+    """
+    In-process cache of encoded images. The least recently used images are
+    evicted when the total size of the cached images exceeds the limit.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Method returns the cached value and marks it as recently used.
+
+        :param key: Cache key.
+        :type key: str.
+        :return: Cached value or None if it isn't cached.
+        :rtype: bytes | None.
+        """
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Method caches the value evicting the least recently used values to fit
+        it. Values larger than the cache aren't cached.
+
+        :param key: Cache key.
+        :type key: str.
+        :param value: Value.
+        :type value: bytes.
+        :return: None.
+        :rtype: None.
+        """
+        if len(value) > self.max_bytes:
+            return
+        previous = self._items.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._items[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+
+_memory_cache = BytesLRUCache(settings.qr_code_cache_max_bytes)
+
+
+def get_qr_code_key(photo_url: str, params: PhotoQrCodeModel) -> str:
+    """
+    Method returns the key of the QR code image. The image is rendered the same
+    for the same URL and parameters, so the key addresses the image content and
+    serves as its ETag.
+
+    :param photo_url: Photo URL.
+    :type photo_url: str.
+    :param params: QR code image parameters.
+    :type params: PhotoQrCodeModel.
+    :return: SHA-256 of the URL and the parameters.
+    :rtype: str.
+    """
+    payload = json.dumps(
+        {
+            "version": QR_CODE_CACHE_VERSION,
+            "url": photo_url,
+            "module_drawer": params.module_drawer.value,
+            "color_mask": params.color_mask.value,
+            "box_size": params.box_size,
+            "format": params.format.value,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class QrCodeCache:
+    """
+    Cache of encoded QR code images: the in-process LRU cache in front of Redis
+    shared by the API processes.
+    """
+
+    def __init__(self, r: Redis, memory_cache: BytesLRUCache | None = None):
+        self.r = r
+        self.memory_cache = _memory_cache if memory_cache is None else memory_cache
+
+    async def get(self, key: str) -> bytes | None:
+        """
+        Method returns the cached image, copying the image found in Redis to the
+        in-process cache.
+
+        :param key: Key of the QR code image.
+        :type key: str.
+        :return: Encoded image or None if it isn't cached.
+        :rtype: bytes | None.
+        """
+        data = self.memory_cache.get(key)
+        if data is None:
+            data = await self.r.get(f"qr_code:{key}")
+            if data is not None:
+                self.memory_cache.set(key, data)
+        return data
+
+    async def set(self, key: str, data: bytes) -> None:
+        """
+        Method caches the image in the process and in Redis.
+
+        :param key: Key of the QR code image.
+        :type key: str.
+        :param data: Encoded image.
+        :type data: bytes.
+        :return: None.
+        :rtype: None.
+        """
+        self.memory_cache.set(key, data)
+        await self.r.set(
+            f"qr_code:{key}", data, ex=settings.qr_code_cache_ttl_seconds
+        )
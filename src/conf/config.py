@@ -1,6 +1,15 @@
+import socket
+
 from dotenv.main import load_dotenv
 from pydantic import BaseSettings
 
+from src.enums import (
+    StorageBackendName,
+    TransformEngine,
+    TransformMode,
+    UploadDedupScope,
+)
+
 load_dotenv()
 
 
@@ -24,18 +33,106 @@ class Settings(BaseSettings):
     :type authjwt_secret_key: str
     :param authjwt_algorithm: str: The algorithm used for JWT authentication.
     :type authjwt_algorithm: str
+    :param storage_backend: StorageBackendName: The storage the photos are kept in.
+    :type storage_backend: StorageBackendName
+    :param local_storage_root: str: The directory of the local storage.
+    :type local_storage_root: str
+    :param local_storage_base_url: str: The URL the local storage files are served from.
+    :type local_storage_base_url: str
     :param cloudinary_name: str: The Cloudinary account name.
     :type cloudinary_name: str
     :param cloudinary_api_key: str: The API key for accessing Cloudinary services.
     :type cloudinary_api_key: str
     :param cloudinary_api_secret: str: The API secret key for accessing Cloudinary services.
     :type cloudinary_api_secret: str
+    :param cloudinary_pool_maxsize: int: The number of keep-alive connections kept open to Cloudinary.
+    :type cloudinary_pool_maxsize: int
+    :param upload_max_concurrency: int: The maximum number of simultaneous uploads to the storage per worker.
+    :type upload_max_concurrency: int
+    :param upload_timeout_seconds: float: The maximum duration of a single upload to the storage.
+    :type upload_timeout_seconds: float
+    :param upload_max_bytes: int: The maximum size of an uploaded image file.
+    :type upload_max_bytes: int
+    :param upload_max_pixels: int: The maximum number of pixels of an uploaded image, guards against decompression bombs.
+    :type upload_max_pixels: int
+    :param upload_spool_dir: str: The directory uploaded files wait in until they are uploaded to the storage in the background.
+    :type upload_spool_dir: str
+    :param upload_spool_node: str: The node the spool directory belongs to, the spooled files are uploaded by the workers of the same node. Set the same value on all nodes when the spool directory is on shared storage. Defaults to the host name.
+    :type upload_spool_node: str
+    :param upload_dedup_scope: UploadDedupScope: Whether identical uploads reuse the stored file of the same user, of any user or never.
+    :type upload_dedup_scope: UploadDedupScope
+    :param upload_batch_max_files: int: The maximum number of files in a single batch upload, further limited by the rate limit quota of the user's role.
+    :type upload_batch_max_files: int
+    :param signed_upload_ttl_seconds: int: The lifetime of the signed direct upload parameters.
+    :type signed_upload_ttl_seconds: int
+    :param transform_mode: TransformMode: Whether transformed photos are uploaded to the storage or delivered by transformation URLs of the source images.
+    :type transform_mode: TransformMode
+    :param transform_batch_max_items: int: The maximum number of photo and transformation pairs in a single batch transformation, further limited by the rate limit quota of the user's role.
+    :type transform_batch_max_items: int
+    :param transform_engine: TransformEngine: The engine transformations are applied with unless the request selects one.
+    :type transform_engine: TransformEngine
+    :param transform_local_fallback_seconds: float | None: How long the storage applies a transformation before the local engine is used instead. The fallback is disabled if not set.
+    :type transform_local_fallback_seconds: float | None
+    :param storage_call_timeout_seconds: float: The maximum duration of a single storage API call other than upload.
+    :type storage_call_timeout_seconds: float
+    :param storage_retry_attempts: int: The number of attempts of idempotent storage calls failed with transient errors.
+    :type storage_retry_attempts: int
+    :param storage_retry_base_delay_seconds: float: The delay before the first retry of a storage call, doubled on every attempt.
+    :type storage_retry_base_delay_seconds: float
+    :param storage_retry_max_delay_seconds: float: The maximum delay before the retry of a storage call.
+    :type storage_retry_max_delay_seconds: float
+    :param storage_circuit_failure_threshold: int: The number of consecutive storage failures that opens the circuit breaker.
+    :type storage_circuit_failure_threshold: int
+    :param storage_circuit_recovery_seconds: float: The time the open circuit breaker fails storage calls fast before trying again.
+    :type storage_circuit_recovery_seconds: float
+    :param job_visibility_timeout_seconds: float: The time after which a claimed but unfinished background job is returned to the queue.
+    :type job_visibility_timeout_seconds: float
+    :param job_max_attempts: int: The number of attempts after which a background job is moved to the dead letter list.
+    :type job_max_attempts: int
+    :param job_retry_base_delay_seconds: float: The delay before the first retry of a failed background job, doubled on every attempt.
+    :type job_retry_base_delay_seconds: float
+    :param job_retry_max_delay_seconds: float: The maximum delay before the retry of a failed background job.
+    :type job_retry_max_delay_seconds: float
+    :param job_poll_interval_seconds: float: The interval the background workers poll an empty queue with.
+    :type job_poll_interval_seconds: float
+    :param storage_delete_batch_size: int: The maximum number of files deleted from the storage with a single call.
+    :type storage_delete_batch_size: int
+    :param idempotency_key_ttl_seconds: int: How long the response of the request with the Idempotency-Key header is kept for the retries.
+    :type idempotency_key_ttl_seconds: int
+    :param idempotency_lock_ttl_seconds: int: How long the Idempotency-Key is locked while the request is processed.
+    :type idempotency_lock_ttl_seconds: int
+    :param process_pool_workers: int | None: The number of worker processes running CPU-bound image work, the number of CPUs if not set.
+    :type process_pool_workers: int | None
+    :param process_pool_max_queue_depth: int: The maximum number of CPU-bound jobs waiting for a worker process before new jobs are rejected.
+    :type process_pool_max_queue_depth: int
+    :param qr_code_max_image_size: int: The maximum width and height of the QR code images in pixels.
+    :type qr_code_max_image_size: int
+    :param qr_code_export_max_items: int: The maximum number of QR codes exported in a single archive, further limited by the QR code export quota of the user's role.
+    :type qr_code_export_max_items: int
+    :param qr_code_export_admin_quota: int: The number of QR codes per rate limit window admins can export.
+    :type qr_code_export_admin_quota: int
+    :param qr_code_export_moderator_quota: int: The number of QR codes per rate limit window moderators can export.
+    :type qr_code_export_moderator_quota: int
+    :param qr_code_export_user_quota: int: The number of QR codes per rate limit window regular users can export.
+    :type qr_code_export_user_quota: int
+    :param qr_code_cache_max_bytes: int: The maximum total size of the QR code images cached by an API process.
+    :type qr_code_cache_max_bytes: int
+    :param qr_code_cache_ttl_seconds: int: How long the QR code images are cached in Redis and by the clients.
+    :type qr_code_cache_ttl_seconds: int
     :param secret_key: str: The secret key used for encryption and decryption.
     :type secret_key: str
     :param algorithm: str: The encryption algorithm used for encryption and decryption.
     :type algorithm: str
     :param rate_limit_requests_per_minute: int: The maximum number of requests allowed per minute for rate limiting.
     :type rate_limit_requests_per_minute: int
+    :param rate_limit_window_seconds: int: The length of the sliding window used by the per-user rate limiter.
+    :type rate_limit_window_seconds: int
+    :param rate_limit_admin_quota: int: The number of requests per window allowed for admins.
+    :type rate_limit_admin_quota: int
+    :param rate_limit_moderator_quota: int: The number of requests per window allowed for moderators.
+    :type rate_limit_moderator_quota: int
+    :param rate_limit_user_quota: int: The number of requests per window allowed for regular users.
+    :type rate_limit_user_quota: int
     """
     sqlalchemy_database_url: str
     sqlalchemy_test_database_url: str
@@ -47,15 +144,67 @@ class Settings(BaseSettings):
     authjwt_secret_key: str
     authjwt_algorithm: str
 
+    storage_backend: StorageBackendName = StorageBackendName.CLOUDINARY
+    local_storage_root: str = "media"
+    local_storage_base_url: str = "http://127.0.0.1:8000/api/storage"
+
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
+    cloudinary_pool_maxsize: int = 10
+
+    upload_max_concurrency: int = 4
+    upload_timeout_seconds: float = 60
+    upload_max_bytes: int = 10 * 1024 * 1024
+    upload_max_pixels: int = 25_000_000
+    upload_spool_dir: str = "spool"
+    upload_spool_node: str = socket.gethostname()
+    upload_dedup_scope: UploadDedupScope = UploadDedupScope.USER
+    upload_batch_max_files: int = 50
+    signed_upload_ttl_seconds: int = 900
+    transform_mode: TransformMode = TransformMode.UPLOAD
+    transform_batch_max_items: int = 100
+    transform_engine: TransformEngine = TransformEngine.STORAGE
+    transform_local_fallback_seconds: float | None = None
+
+    storage_call_timeout_seconds: float = 10
+    storage_retry_attempts: int = 3
+    storage_retry_base_delay_seconds: float = 0.2
+    storage_retry_max_delay_seconds: float = 2
+    storage_circuit_failure_threshold: int = 5
+    storage_circuit_recovery_seconds: float = 30
+
+    job_visibility_timeout_seconds: float = 300
+    job_max_attempts: int = 5
+    job_retry_base_delay_seconds: float = 1
+    job_retry_max_delay_seconds: float = 300
+    job_poll_interval_seconds: float = 1
+    storage_delete_batch_size: int = 100
+
+    idempotency_key_ttl_seconds: int = 24 * 60 * 60
+    idempotency_lock_ttl_seconds: int = 300
+
+    process_pool_workers: int | None = None
+    process_pool_max_queue_depth: int = 32
+
+    qr_code_max_image_size: int = 2000
+    qr_code_export_max_items: int = 500
+    qr_code_export_admin_quota: int = 500
+    qr_code_export_moderator_quota: int = 250
+    qr_code_export_user_quota: int = 100
+    qr_code_cache_max_bytes: int = 16 * 1024 * 1024
+    qr_code_cache_ttl_seconds: int = 24 * 60 * 60
 
     secret_key: str
     algorithm: str
 
     rate_limit_requests_per_minute: int
 
+    rate_limit_window_seconds: int = 60
+    rate_limit_admin_quota: int = 120
+    rate_limit_moderator_quota: int = 60
+    rate_limit_user_quota: int = 20
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Integer, String
+from sqlalchemy import Integer, String, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql.schema import ForeignKey
 from sqlalchemy.sql.sqltypes import Boolean
@@ -8,6 +8,7 @@ from sqlalchemy.sql.sqltypes import Boolean
 from src.database.models.base import BaseFields, Base
 from src.database.models.photo_tag import photos_tags
 from src.database.models.tag import Tag
+from src.enums import PhotoStatus
 
 
 class Photo(Base, BaseFields):
@@ -16,8 +17,10 @@ class Photo(Base, BaseFields):
 
     :param id: Mapped[int]: The unique identifier for the photo.
     :type id: Mapped[int]
-    :param url: Mapped[str]: The URL of the photo.
+    :param url: Mapped[str]: The URL of the photo. None until the photo is uploaded.
     :type url: Mapped[str]
+    :param public_id: Mapped[str]: The public id of the stored file the URL refers to. None until the photo is uploaded.
+    :type public_id: Mapped[str]
     :param description: Mapped[str]: The description of the photo. Defaults to None.
     :type description: Mapped[str]
     :param created_by: Mapped[int]: The user ID of the creator of the photo.
@@ -28,12 +31,19 @@ class Photo(Base, BaseFields):
     :type original_photo_id: Mapped[int]
     :param is_transformed: Mapped[bool]: Indicates if the photo is a transformed version. Defaults to False.
     :type is_transformed: Mapped[bool]
+    :param content_hash: Mapped[str]: SHA-256 of the uploaded file. Defaults to None.
+    :type content_hash: Mapped[str]
+    :param transformation_key: Mapped[str]: SHA-256 of the source photo URL and the transformation parameters the photo was created with. Defaults to None.
+    :type transformation_key: Mapped[str]
+    :param status: Mapped[str]: The upload status of the photo. Defaults to 'ready'.
+    :type status: Mapped[str]
     :param tags: Relationship: The tags associated with the photo.
     :type tags: Relationship
     """
     __tablename__ = "photos"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    url: Mapped[str] = mapped_column(String(1000))
+    url: Mapped[str] = mapped_column(String(1000), nullable=True)
+    public_id: Mapped[str] = mapped_column(String(500), nullable=True, default=None)
     description: Mapped[str] = mapped_column(String(500), nullable=True)
 
     created_by: Mapped[int] = mapped_column(
@@ -51,4 +61,20 @@ class Photo(Base, BaseFields):
         default=None,
     )
     is_transformed: Mapped[bool] = mapped_column(Boolean, nullable=True, default=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=True, default=None)
+    transformation_key: Mapped[str] = mapped_column(
+        String(64), nullable=True, default=None
+    )
+    status: Mapped[str] = mapped_column(
+        String(20),
+        default=PhotoStatus.READY.value,
+        server_default=PhotoStatus.READY.value,
+    )
     tags = relationship("Tag", secondary="photos_tags", back_populates="photos")
+
+    __table_args__ = (
+        Index("ix_photos_content_hash_created_by", "content_hash", "created_by"),
+        Index("ix_photos_original_photo_id", "original_photo_id"),
+        Index("ix_photos_transformation_key", "transformation_key"),
+        Index("ix_photos_public_id", "public_id"),
+    )
@@ -57,6 +57,15 @@ class QrModuleDrawer(enum.Enum):
     VERTICAL = "VerticalBarsDrawer"
 
 
+class QrCodeFormat(enum.Enum):
+    """
+    Enumeration representing QR code image formats.
+    """
+    JPEG = "jpeg"
+    PNG = "png"
+    SVG = "svg"
+
+
 class QrColorMask(enum.Enum):
     """
     Enumeration representing QR color mask types.
@@ -66,3 +75,54 @@ class QrColorMask(enum.Enum):
     HORIZONTAL = "HorizontalGradiantColorMask"
     SOLID = "SolidFillColorMask"
     VERTICAL = "VerticalGradiantColorMask"
+
+
+class StorageBackendName(enum.Enum):
+    """
+    Enumeration representing photo storage backends.
+    """
+    CLOUDINARY = "cloudinary"
+    LOCAL = "local"
+
+
+class UploadDedupScope(enum.Enum):
+    """
+    Enumeration representing the scope of uploaded photos deduplication.
+    """
+    USER = "user"
+    GLOBAL = "global"
+    DISABLED = "disabled"
+
+
+class TransformMode(enum.Enum):
+    """
+    Enumeration representing how transformed photos are stored.
+    """
+    UPLOAD = "upload"
+    DELIVERY_URL = "delivery_url"
+
+
+class TransformEngine(enum.Enum):
+    """
+    Enumeration representing engines which apply photo transformations.
+    """
+    STORAGE = "storage"
+    LOCAL = "local"
+
+
+class CircuitState(enum.Enum):
+    """
+    Enumeration representing circuit breaker states.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class PhotoStatus(enum.Enum):
+    """
+    Enumeration representing photo upload statuses.
+    """
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
@@ -1,18 +1,30 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from io import BytesIO
 from typing import Type, Optional, Union, List
-from fastapi import HTTPException, UploadFile, File
+from fastapi import HTTPException, UploadFile, File, status
+from redis.asyncio import Redis
+from sqlalchemy import delete, insert, literal_column, select
 from sqlalchemy.orm import Session
-import cloudinary.uploader
-import cloudinary.api
-
-from src.conf.config import settings
 
 import uuid
 
+from src.conf.config import settings
 from src.database.models.photo import Photo
+from src.database.models.photo_tag import photos_tags
 from src.database.models.tag import Tag
 from src.database.models.user import User
+from src.enums import PhotoStatus, UploadDedupScope
+from src.services.photo_upload_jobs import enqueue_photo_upload, spool_upload
+from src.services.storage_jobs import enqueue_storage_deletion
+from src.storage.circuit_breaker import StorageUnavailableError
+from src.storage.client import get_storage
+from src.utils.upload_validator import validate_upload
+
+logger = logging.getLogger(__name__)
 
 
 async def get_photos_by_user_id(user_id: int, db: Session) -> list[Type[Photo]]:
@@ -80,24 +92,14 @@ async def get_photo_by_photo_id_and_user_id(photo_id: int, user_id: int, db: Ses
     )
 
 
-def _upload_photo_to_cloudinary(current_user: User, file: UploadFile = File()) -> str:
+def _check_file_format(file: UploadFile) -> None:
     """
-    Uploads a photo to the cloudinary server.
-    It takes in three parameters: current_user, file, and description.
-    The current_user parameter is used to
-    create a unique public id for each user's photos on the cloudinary server,
-    while the file
-    parameter is used to upload an image from our local machine onto the
-    cloudinary server. The description
-    parameter is an optional parameter to provide additional information
-    about the photo.
+    Checks that the uploaded file has one of the supported image formats.
 
-    :param current_user: Get the username of the user who is currently logged in
-    :type current_user: User
     :param file: Get the file uploaded by the user
     :type file: UploadFile
-    :return: The url of the photo uploaded to cloudinary
-    :rtype: str
+    :return: None
+    :rtype: None
     """
     allowed_formats = ["jpeg", "jpg", "png"]
     file_extension = file.filename.split(".")[-1].lower()
@@ -108,23 +110,105 @@ def _upload_photo_to_cloudinary(current_user: User, file: UploadFile = File()) -
             f"Supported formats are: {', '.join(allowed_formats)}",
         )
 
-    unique_filename = str(uuid.uuid4())
 
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True,
-    )
+def _get_new_public_id(current_user: User) -> str:
+    """
+    Returns a new unique public id for the photo of the user in the storage.
+
+    :param current_user: Get the username of the user who is uploading a photo
+    :type current_user: User
+    :return: The public id
+    :rtype: str
+    """
+    return f"PhotoShareApp/{current_user.user_name}/{uuid.uuid4()}"
+
+
+async def _upload_photo_to_storage(
+        current_user: User, file: UploadFile = File()
+) -> str:
+    """
+    Uploads a photo to the storage.
+    The current_user parameter is used to create a unique public id for each
+    user's photos in the storage, while the file parameter is the image uploaded
+    by the user.
+
+    :param current_user: Get the username of the user who is currently logged in
+    :type current_user: User
+    :param file: Get the file uploaded by the user
+    :type file: UploadFile
+    :return: The url of the photo uploaded to the storage
+    :rtype: str
+    """
     try:
-        public_id = f"PhotoShareApp/{current_user.user_name}/{unique_filename}"
-        upload_result = cloudinary.uploader.upload(file.file, public_id=public_id)
-        photo_url = upload_result["secure_url"]
-        return photo_url
+        public_id = _get_new_public_id(current_user)
+        return await get_storage().upload_async(file.file, public_id=public_id)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Uploading photo took too long",
+        )
+    except StorageUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error uploading photo: {str(e)}")
 
 
+async def _get_stored_photo_url(
+        content_hash: str, current_user: User, db: Session
+) -> str | None:
+    """
+    Returns the url of the already stored photo with the same content, so the
+    upload can be skipped. The search scope is defined by the upload_dedup_scope
+    setting.
+
+    :param content_hash: SHA-256 of the uploaded file
+    :type content_hash: str
+    :param current_user: Get the id of the user who is uploading a photo
+    :type current_user: User
+    :param db: Connect to the database
+    :type db: Session
+    :return: The url of the stored photo or None
+    :rtype: str | None
+    """
+    if settings.upload_dedup_scope == UploadDedupScope.DISABLED:
+        return None
+    query = db.query(Photo.url).filter(
+        Photo.content_hash == content_hash, Photo.url.is_not(None)
+    )
+    if settings.upload_dedup_scope == UploadDedupScope.USER:
+        query = query.filter(Photo.created_by == current_user.id)
+    stored_photo = query.first()
+    return stored_photo.url if stored_photo else None
+
+
+async def _store_photo_file(
+        current_user: User, db: Session, file: UploadFile = File()
+) -> tuple[str, str]:
+    """
+    Validates and stores the uploaded photo file. When a photo with the same
+    content is already stored, its url is reused instead of uploading the file again.
+
+    :param current_user: Get the user who is uploading a photo
+    :type current_user: User
+    :param db: Connect to the database
+    :type db: Session
+    :param file: Get the file uploaded by the user
+    :type file: UploadFile
+    :return: The url of the stored photo and SHA-256 of its content
+    :rtype: tuple[str, str]
+    """
+    _check_file_format(file)
+    content_hash = await validate_upload(file)
+    photo_url = await _get_stored_photo_url(
+        content_hash=content_hash, current_user=current_user, db=db
+    )
+    if photo_url is None:
+        photo_url = await _upload_photo_to_storage(
+            current_user=current_user, file=file
+        )
+    return photo_url, content_hash
+
+
 async def create_photo(
         description: str, current_user: User, db: Session,
         file: UploadFile = File()
@@ -143,9 +227,274 @@ async def create_photo(
     :return: A photo object
     :rtype: Photo
     """
-    photo_url = _upload_photo_to_cloudinary(current_user=current_user, file=file)
+    photo_url, content_hash = await _store_photo_file(
+        current_user=current_user, db=db, file=file
+    )
     user_id = current_user.id
-    photo = Photo(url=photo_url, description=description, created_by=user_id)
+    photo = Photo(
+        url=photo_url,
+        public_id=_get_public_id_from_url(photo_url),
+        description=description,
+        created_by=user_id,
+        content_hash=content_hash,
+    )
+    db.add(photo)
+    db.commit()
+    db.refresh(photo)
+    return photo
+
+
+async def create_photo_async(
+        description: str, current_user: User, db: Session, r: Redis,
+        file: UploadFile = File()
+) -> Photo:
+    """
+    Validates the uploaded photo, keeps its file in the local spool and creates
+    a pending photo in the database. The file is uploaded to the storage by the
+    background worker, which then marks the photo as ready.
+
+    :param description: Specify the description of the photo
+    :type description: str
+    :param current_user: Get the id of the user who is uploading a photo
+    :type current_user: User
+    :param db: Connect to the database
+    :type db: Session
+    :param r: Enqueue the upload of the photo file
+    :type r: Redis
+    :param file: Accept the file from the request
+    :type file: UploadFile
+    :return: A photo object
+    :rtype: Photo
+    """
+    _check_file_format(file)
+    content_hash = await validate_upload(file)
+    photo_url = await _get_stored_photo_url(
+        content_hash=content_hash, current_user=current_user, db=db
+    )
+    photo = Photo(
+        url=photo_url,
+        public_id=_get_public_id_from_url(photo_url) if photo_url else None,
+        description=description,
+        created_by=current_user.id,
+        content_hash=content_hash,
+        status=PhotoStatus.READY.value if photo_url else PhotoStatus.PENDING.value,
+    )
+    spool_name = None if photo_url else await spool_upload(file)
+    db.add(photo)
+    db.commit()
+    db.refresh(photo)
+    if spool_name:
+        await enqueue_photo_upload(
+            photo_id=photo.id,
+            public_id=_get_new_public_id(current_user),
+            spool_name=spool_name,
+            r=r,
+        )
+    return photo
+
+
+async def create_photos(
+        description: str | None, current_user: User, db: Session,
+        files: list[UploadFile],
+) -> list[dict]:
+    """
+    Uploads many photos to the storage concurrently and creates all of them in the
+    database with a single bulk insert. A failed file doesn't fail the others,
+    its error is reported in its upload status instead.
+
+    :param description: Specify the description of the photos
+    :type description: str | None
+    :param current_user: Get the id of the user who is uploading photos
+    :type current_user: User
+    :param db: Connect to the database
+    :type db: Session
+    :param files: Accept the files from the request
+    :type files: list[UploadFile]
+    :return: Upload status of every file with the created photo
+    :rtype: list[dict]
+    """
+    store_results = await asyncio.gather(
+        *(
+            _store_photo_file(current_user=current_user, db=db, file=file)
+            for file in files
+        ),
+        return_exceptions=True,
+    )
+    results = []
+    for file, store_result in zip(files, store_results):
+        if isinstance(store_result, HTTPException):
+            results.append(
+                {
+                    "filename": file.filename,
+                    "status_code": store_result.status_code,
+                    "detail": store_result.detail,
+                    "photo": None,
+                }
+            )
+        elif isinstance(store_result, StorageUnavailableError):
+            # The other files may already be uploaded, so they are still created.
+            results.append(
+                {
+                    "filename": file.filename,
+                    "status_code": status.HTTP_503_SERVICE_UNAVAILABLE,
+                    "detail": str(store_result),
+                    "photo": None,
+                }
+            )
+        elif isinstance(store_result, Exception):
+            logger.error(
+                "Photo %s wasn't stored", file.filename, exc_info=store_result
+            )
+            results.append(
+                {
+                    "filename": file.filename,
+                    "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    "detail": "Error uploading photo",
+                    "photo": None,
+                }
+            )
+        else:
+            photo_url, content_hash = store_result
+            results.append(
+                {
+                    "filename": file.filename,
+                    "status_code": status.HTTP_201_CREATED,
+                    "detail": None,
+                    "photo": {
+                        "url": photo_url,
+                        "public_id": _get_public_id_from_url(photo_url),
+                        "description": description,
+                        "created_by": current_user.id,
+                        "content_hash": content_hash,
+                    },
+                }
+            )
+
+    uploaded = [result for result in results if result["photo"] is not None]
+    if uploaded:
+        photos = db.scalars(
+            insert(Photo).returning(Photo, sort_by_parameter_order=True),
+            [result["photo"] for result in uploaded],
+        ).all()
+        db.commit()
+        for result, photo in zip(uploaded, photos):
+            result["photo"] = photo
+    return results
+
+
+async def create_signed_upload(current_user: User, r: Redis) -> dict:
+    """
+    Creates signed parameters for the direct upload of a photo to the storage and
+    remembers the issued public id for the current user until they expire.
+
+    :param current_user: User who is going to upload a photo
+    :type current_user: User
+    :param r: Redis instance
+    :type r: Redis
+    :return: Public id, upload URL, form fields and expiration date
+    :rtype: dict
+    """
+    public_id = _get_new_public_id(current_user)
+    ttl = settings.signed_upload_ttl_seconds
+    signed_upload = get_storage().sign_upload(public_id=public_id, expires_in=ttl)
+    await r.set(f"signed_upload:{public_id}", current_user.id, ex=ttl)
+    return {
+        "public_id": public_id,
+        "expires_at": datetime.utcnow() + timedelta(seconds=ttl),
+        **signed_upload,
+    }
+
+
+async def _validate_stored_photo(photo_url: str, public_id: str, r: Redis) -> str:
+    """
+    Validates the photo uploaded directly to the storage and returns SHA-256 of
+    its content. No more than the upload size limit is downloaded. The invalid
+    photo is deleted from the storage and can't be confirmed anymore.
+
+    :param photo_url: Url of the uploaded photo
+    :type photo_url: str
+    :param public_id: Public id of the uploaded photo
+    :type public_id: str
+    :param r: Enqueue the deletion of the invalid photo
+    :type r: Redis
+    :return: The hex digest of the photo content
+    :rtype: str
+    """
+    data = await get_storage().download_async(
+        photo_url, max_bytes=settings.upload_max_bytes
+    )
+    try:
+        return await validate_upload(UploadFile(BytesIO(data)))
+    except HTTPException as e:
+        await r.delete(f"signed_upload:{public_id}")
+        await enqueue_storage_deletion(public_ids=[public_id], r=r)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.detail
+        )
+
+
+async def confirm_signed_upload(
+    public_id: str,
+    description: str | None,
+    current_user: User,
+    db: Session,
+    r: Redis,
+) -> Photo:
+    """
+    Verifies that the photo was uploaded to the storage with the signed parameters
+    issued to the current user and creates the photo in the database. The
+    uploaded file is validated the same way as the files uploaded through the
+    API and is deleted from the storage if it isn't a valid image. When a photo
+    with the same content is already stored, its url is reused and the uploaded
+    file is deleted.
+
+    :param public_id: Public id of the uploaded photo
+    :type public_id: str
+    :param description: Description of the photo
+    :type description: str | None
+    :param current_user: User who uploaded the photo
+    :type current_user: User
+    :param db: Connect to the database
+    :type db: Session
+    :param r: Redis instance
+    :type r: Redis
+    :return: A photo object
+    :rtype: Photo
+    """
+    signed_upload_key = f"signed_upload:{public_id}"
+    owner_id = await r.get(signed_upload_key)
+    if owner_id is None or int(owner_id) != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Signed upload wasn't found or has expired",
+        )
+    photo_url = await get_storage().get_resource_url_async(public_id)
+    if photo_url is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Photo wasn't uploaded to the storage",
+        )
+    content_hash = await _validate_stored_photo(
+        photo_url=photo_url, public_id=public_id, r=r
+    )
+    if not await r.delete(signed_upload_key):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Signed upload is already confirmed",
+        )
+    stored_photo_url = await _get_stored_photo_url(
+        content_hash=content_hash, current_user=current_user, db=db
+    )
+    if stored_photo_url is not None:
+        await enqueue_storage_deletion(public_ids=[public_id], r=r)
+        photo_url = stored_photo_url
+    photo = Photo(
+        url=photo_url,
+        public_id=_get_public_id_from_url(photo_url),
+        description=description,
+        created_by=current_user.id,
+        content_hash=content_hash,
+    )
     db.add(photo)
     db.commit()
     db.refresh(photo)
@@ -157,60 +506,135 @@ def _get_public_id_from_url(photo_url: str) -> str:
     Returns the public_id of that image.
 
     :param photo_url: photo_url is a string that represents the URL of a photo
-    on the
-    cloudinary server
+    in the storage
     :type photo_url: str
     :return: The public id of the photo
     :rtype: str
     """
-    parts = photo_url.split("/")
-    index = parts.index("PhotoShareApp")
-    parts = parts[index:]
-    parts[-1] = parts[-1].split(".")[0]
-    public_id = "/".join(parts)
-    return public_id
+    return get_storage().get_public_id_from_url(photo_url)
 
 
-def _delete_photo_from_cloudinary(photo_url: str):
+def _get_photo_tree(photo_id: int, db: Session) -> dict[int, str | None]:
     """
-    The _delete_photo_from_cloudinary function takes in a photo_url parameter,
-    which is the URL of the photo to be deleted.
-    It then uses Cloudinary's Python SDK to delete that image from Cloudinary
+    Returns the photo and all photos transformed from it, directly or from its
+    transformed photos, with a single recursive query.
 
-    :param photo_url: Pass the photo url to the function
-    :type photo_url: str
-    :return: A dictionary
-    :rtype: dict
+    :param photo_id: Identifier of the original photo
+    :type photo_id: int
+    :param db: Access the database
+    :type db: Session
+    :return: Public ids of the stored files of the photos by their identifiers
+    :rtype: dict[int, str | None]
     """
+    photo_tree = (
+        select(Photo.id, Photo.public_id)
+        .where(Photo.id == photo_id)
+        .cte("photo_tree", recursive=True)
+    )
+    photo_tree = photo_tree.union_all(
+        select(Photo.id, Photo.public_id).where(
+            Photo.original_photo_id == photo_tree.c.id
+        )
+    )
+    return dict(db.execute(select(photo_tree.c.id, photo_tree.c.public_id)).all())
 
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True,
+
+async def get_photo_versions(
+    photo_id: int, max_depth: int, db: Session
+) -> list[tuple[Photo, int]]:
+    """
+    Returns the photos the photo was transformed from and the photos transformed
+    from it, directly or from its transformed photos, with a single recursive
+    query on the indexed original photo identifier. The depth of the photos the
+    photo was transformed from is negative, of the photo itself is zero and of
+    its transformed photos is positive.
+
+    :param photo_id: Identifier of the photo
+    :type photo_id: int
+    :param max_depth: The number of transformation steps walked in each direction
+    :type max_depth: int
+    :param db: Access the database
+    :type db: Session
+    :return: Photos of the version tree with their depth ordered by the depth,
+        empty if the photo doesn't exist
+    :rtype: list[tuple[Photo, int]]
+    """
+    root_depth = literal_column("0").label("depth")
+    ancestors = (
+        select(Photo.id, Photo.original_photo_id, root_depth)
+        .where(Photo.id == photo_id)
+        .cte("ancestors", recursive=True)
+    )
+    ancestors = ancestors.union_all(
+        select(Photo.id, Photo.original_photo_id, ancestors.c.depth - 1).where(
+            Photo.id == ancestors.c.original_photo_id,
+            ancestors.c.depth > -max_depth,
+        )
     )
-    public_ids = _get_public_id_from_url(photo_url)
-    image_delete_result = cloudinary.api.delete_resources(
-        public_ids, resource_type="image", type="upload"
+    descendants = (
+        select(Photo.id, root_depth)
+        .where(Photo.id == photo_id)
+        .cte("descendants", recursive=True)
     )
-    print(image_delete_result)
+    descendants = descendants.union_all(
+        select(Photo.id, descendants.c.depth + 1).where(
+            Photo.original_photo_id == descendants.c.id,
+            descendants.c.depth < max_depth,
+        )
+    )
+    versions = (
+        select(ancestors.c.id, ancestors.c.depth)
+        .where(ancestors.c.depth < 0)
+        .union_all(select(descendants.c.id, descendants.c.depth))
+        .subquery("versions")
+    )
+    return [
+        (photo, depth)
+        for photo, depth in db.execute(
+            select(Photo, versions.c.depth)
+            .join(versions, Photo.id == versions.c.id)
+            .order_by(versions.c.depth, Photo.id)
+        ).all()
+    ]
 
 
-async def delete_photo(photo: Photo, db: Session):
+async def delete_photo(photo: Photo, db: Session, r: Redis):
     """
-    The delete_photo_by_id function deletes a photo from the database and
-    cloudinary.
+    The delete_photo_by_id function deletes a photo together with all photos
+    transformed from it from the database and enqueues the deletion of their
+    files from the storage, so the response doesn't wait for the storage.
+    The stored files are kept while other photos reuse them, directly or by
+    delivery URLs of transformations.
 
     :param photo: Photo to be deleted
     :type photo: Photo
     :param db: Access the database
     :type db: Session
+    :param r: Enqueue the deletion of the stored files
+    :type r: Redis
     :return: The photo object
     :rtype: Photo
     """
-    _delete_photo_from_cloudinary(photo_url=photo.url)
-    db.delete(photo)
+    photo_tree = _get_photo_tree(photo_id=photo.id, db=db)
+    photo_ids = list(photo_tree)
+    public_ids = {public_id for public_id in photo_tree.values() if public_id}
+    db.execute(delete(photos_tags).where(photos_tags.c.photo_id.in_(photo_ids)))
+    db.execute(delete(Photo).where(Photo.id.in_(photo_ids)))
+    shared_public_ids = set()
+    if public_ids:
+        # Delivery URLs of transformed photos refer to the file of the source
+        # image, so their photos keep the public id of that file.
+        shared_public_ids = set(
+            db.scalars(
+                select(Photo.public_id)
+                .where(Photo.public_id.in_(public_ids))
+                .distinct()
+            )
+        )
     db.commit()
+    public_ids = list(public_ids - shared_public_ids)
+    if public_ids:
+        await enqueue_storage_deletion(public_ids=public_ids, r=r)
     return photo
 
 
@@ -222,7 +646,8 @@ async def find_photos(
     skip: int = 0,
 ) -> list[Type[Photo]] | None:
     """
-    Find photos based on optional filtering parameters.
+    Find photos based on optional filtering parameters. Only photos uploaded
+    to the storage are returned.
 
     :param db: Database session
     :type db: Session
@@ -238,7 +663,7 @@ async def find_photos(
     found
     :rtype: Union[List[Photo], None]
     """
-    query = db.query(Photo)
+    query = db.query(Photo).filter(Photo.status == PhotoStatus.READY.value)
     if photo_id is not None:
         query = query.filter(Photo.id == photo_id)
     if user_id is not None:
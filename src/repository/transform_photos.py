@@ -1,20 +1,38 @@
 from __future__ import annotations
 
-from typing import Type
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+from io import BytesIO
+from typing import AsyncIterator, Type
 
 import cloudinary
-from cloudinary import uploader
 from fastapi import HTTPException, status
-from qrcode.image.styledpil import StyledPilImage
+from redis.asyncio import Redis
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 import uuid
 
+from src.cache.qr_codes import QrCodeCache, get_qr_code_key
 from src.conf.config import settings
 from src.database.models.photo import Photo
 from src.database.models.user import User
-from src.schemas import TransformPhotoModel, PhotoQrCodeModel
+from src.enums import PhotoStatus, TransformEngine, TransformMode, UploadDedupScope
+from src.schemas import TransformChainModel, TransformPhotoModel, PhotoQrCodeModel
+from src.services.process_pool import ProcessPoolBusyError, get_process_pool
+from src.storage.circuit_breaker import StorageUnavailableError
+from src.storage.client import get_storage
 from src.utils.data_convertor import get_enum_value
-from src.utils.qr_code import generate_qr_code
+from src.utils.image_transform import is_transformation_supported, transform_image
+from src.utils.qr_code import QrCodeTooLargeError, render_qr_code
+
+logger = logging.getLogger(__name__)
+
+# Storage uploads abandoned for the local fallback, referenced until they are
+# cleaned up.
+_late_uploads: set[asyncio.Task] = set()
 
 
 async def _update_orig_photo_with_transformed_photo(
@@ -23,6 +41,7 @@ async def _update_orig_photo_with_transformed_photo(
     photo_url: str,
     updated_by: int,
     photo_description: str,
+    transformation_key: str | None = None,
 ):
     """
     Method updates the original photo in the db with a transformed photo.
@@ -37,12 +56,17 @@ async def _update_orig_photo_with_transformed_photo(
     :type updated_by: int.
     :param photo_description: Photo description.
     :type photo_description: str.
+    :param transformation_key: Key of the transformation the photo was made with.
+    :type transformation_key: str | None.
     :return: Photo instance.
     :rtype: Photo.
     """
     orig_photo.url = photo_url
+    orig_photo.public_id = get_storage().get_public_id_from_url(photo_url)
     orig_photo.updated_by = updated_by
     orig_photo.is_transformed = True
+    orig_photo.content_hash = None
+    orig_photo.transformation_key = transformation_key
     if photo_description:
         orig_photo.description = photo_description
     db.add(orig_photo)
@@ -57,6 +81,7 @@ async def _create_transformed_photo_in_db(
     photo_url: str,
     updated_by: int,
     photo_description: str,
+    transformation_key: str | None = None,
 ) -> Photo:
     """
     Method that creates the new row in the DB table public.photos for transformed photo.
@@ -71,15 +96,19 @@ async def _create_transformed_photo_in_db(
     :type updated_by: int.
     :param photo_description: Photo description.
     :type photo_description: str.
+    :param transformation_key: Key of the transformation the photo was made with.
+    :type transformation_key: str | None.
     :return: Photo instance.
     :rtype: Photo.
     """
     transformed_photo = Photo(
         url=photo_url,
+        public_id=get_storage().get_public_id_from_url(photo_url),
         description=photo_description,
         created_by=updated_by,
         original_photo_id=orig_photo.id,
         is_transformed=True,
+        transformation_key=transformation_key,
     )
     db.add(transformed_photo)
     db.commit()
@@ -94,6 +123,7 @@ async def _save_transformed_photo_to_db(
     to_override_orig_photo,
     photo_description: str,
     orig_photo: Photo,
+    transformation_key: str | None = None,
 ) -> Type[Photo] | None | Photo:
     """
     Method covers the logic of saving transformed photo in the DB.
@@ -111,6 +141,8 @@ async def _save_transformed_photo_to_db(
     :type photo_description: str.
     :param orig_photo: Original photo.
     :type orig_photo: Photo.
+    :param transformation_key: Key of the transformation the photo was made with.
+    :type transformation_key: str | None.
     :return: Photo instance.
     :rtype: Type[Photo] | None | Photo.
     """
@@ -121,6 +153,7 @@ async def _save_transformed_photo_to_db(
             photo_url=transformed_photo_url,
             updated_by=updated_by,
             photo_description=photo_description,
+            transformation_key=transformation_key,
         )
     return await _create_transformed_photo_in_db(
         db=db,
@@ -128,6 +161,396 @@ async def _save_transformed_photo_to_db(
         photo_url=transformed_photo_url,
         updated_by=updated_by,
         photo_description=photo_description,
+        transformation_key=transformation_key,
+    )
+
+
+def _get_layer(params: dict) -> dict:
+    """
+    Method returns the storage transformation layer from the set transformation
+    parameters.
+
+    :param params: Transformation parameters.
+    :type params: dict.
+    :return: Transformation layer.
+    :rtype: dict.
+    """
+    return {
+        k: get_enum_value(v)
+        for k, v in params.items()
+        if k not in ("to_override", "description", "engine") and v is not None
+    }
+
+
+def _get_transformation(body: TransformPhotoModel) -> list[dict]:
+    """
+    Method returns the storage transformation from the transformation parameters.
+
+    :param body: Transformation parameters.
+    :type body: TransformPhotoModel.
+    :return: Transformation layers.
+    :rtype: list[dict].
+    """
+    return [_get_layer(dict(body))]
+
+
+def _get_chain_transformation(body: TransformChainModel) -> list[dict]:
+    """
+    Method returns the storage transformation with a layer per step of the
+    transformation chain. Steps without parameters are skipped.
+
+    :param body: Transformation chain parameters.
+    :type body: TransformChainModel.
+    :return: Transformation layers.
+    :rtype: list[dict].
+    """
+    return [layer for layer in map(_get_layer, map(dict, body.steps)) if layer]
+
+
+def get_transformation_key(photo_url: str, transformation: list[dict]) -> str:
+    """
+    Method returns the key which identifies the result of the transformation of
+    the photo. Parameters which aren't set don't affect the result, so they
+    are left out of the key.
+
+    :param photo_url: URL of the source photo.
+    :type photo_url: str.
+    :param transformation: Transformation layers.
+    :type transformation: list[dict].
+    :return: SHA-256 of the source and the canonical transformation.
+    :rtype: str.
+    """
+    canonical = json.dumps(
+        {
+            "source": photo_url,
+            "transformation": [
+                {k: v for k, v in layer.items() if v is not None}
+                for layer in transformation
+            ],
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def _get_transformed_photo(
+    orig_photo: Photo, transformation_key: str, db: Session
+) -> Photo | None:
+    """
+    Method returns the photo already transformed from the original photo with the
+    same transformation.
+
+    :param orig_photo: Original photo.
+    :type orig_photo: Photo.
+    :param transformation_key: Key of the transformation.
+    :type transformation_key: str.
+    :param db: DB instance.
+    :type db: Session.
+    :return: Transformed photo or None.
+    :rtype: Photo | None.
+    """
+    return (
+        db.query(Photo)
+        .filter(
+            Photo.original_photo_id == orig_photo.id,
+            Photo.transformation_key == transformation_key,
+            Photo.status == PhotoStatus.READY.value,
+        )
+        .first()
+    )
+
+
+async def _get_transformed_photo_url(
+    transformation_key: str, updated_by: User, db: Session
+) -> str | None:
+    """
+    Method returns the URL of the already stored result of the transformation,
+    so the upload can be skipped. The search scope is defined by the
+    upload_dedup_scope setting.
+
+    :param transformation_key: Key of the transformation.
+    :type transformation_key: str.
+    :param updated_by: User who transforms a photo.
+    :type updated_by: User.
+    :param db: DB instance.
+    :type db: Session.
+    :return: URL of the stored result or None.
+    :rtype: str | None.
+    """
+    if settings.upload_dedup_scope == UploadDedupScope.DISABLED:
+        return None
+    query = db.query(Photo.url).filter(
+        Photo.transformation_key == transformation_key, Photo.url.is_not(None)
+    )
+    if settings.upload_dedup_scope == UploadDedupScope.USER:
+        query = query.filter(Photo.created_by == updated_by.id)
+    stored_photo = query.first()
+    return stored_photo.url if stored_photo else None
+
+
+def _get_transformed_public_id(updated_by: User) -> str:
+    """
+    Method returns a new public identifier of the transformed photo.
+
+    :param updated_by: User who transforms a photo.
+    :type updated_by: User.
+    :return: Public identifier.
+    :rtype: str.
+    """
+    return f"PhotoShareApp/{updated_by.user_name}/{str(uuid.uuid4())}"
+
+
+async def _upload_transformed_photo(
+    photo: Photo,
+    updated_by: User,
+    to_override: bool,
+    transformation: list[dict],
+) -> str:
+    """
+    Method uploads the transformed photo to the storage.
+
+    :param photo: Original photo.
+    :type photo: Photo.
+    :param updated_by: User who transforms a photo.
+    :type updated_by: User.
+    :param to_override: Parameter responsible for overriding an original photo.
+    :type to_override: bool.
+    :param transformation: Transformation layers.
+    :type transformation: list[dict].
+    :return: URL of the transformed photo.
+    :rtype: str.
+    """
+    try:
+        return await get_storage().upload_async(
+            photo.url,
+            public_id=_get_transformed_public_id(updated_by),
+            overwrite=to_override,
+            transformation=transformation,
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Image transformation took too long",
+        )
+    except (cloudinary.exceptions.Error, OSError) as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error occurred during image transformation: '{str(err)}'",
+        )
+
+
+async def _transform_photo_locally(
+    photo: Photo, updated_by: User, transformation: list[dict]
+) -> str:
+    """
+    Method applies the transformation with the local engine and uploads the
+    transformed photo to the storage.
+
+    :param photo: Original photo.
+    :type photo: Photo.
+    :param updated_by: User who transforms a photo.
+    :type updated_by: User.
+    :param transformation: Transformation layers supported by the local engine.
+    :type transformation: list[dict].
+    :return: URL of the transformed photo.
+    :rtype: str.
+    """
+    storage = get_storage()
+    try:
+        data = await storage.download_async(photo.url)
+        transformed_data = await get_process_pool().run(
+            transform_image, data, transformation
+        )
+        return await storage.upload_async(
+            BytesIO(transformed_data), public_id=_get_transformed_public_id(updated_by)
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Image transformation took too long",
+        )
+    except (cloudinary.exceptions.Error, OSError) as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error occurred during image transformation: '{str(err)}'",
+        )
+
+
+async def _delete_late_upload(upload: asyncio.Task) -> None:
+    """
+    Method waits for the storage upload abandoned for the local fallback and
+    deletes the transformed photo it stored, as no photo refers to it.
+
+    :param upload: Task of the storage upload.
+    :type upload: asyncio.Task.
+    :return: None.
+    :rtype: None.
+    """
+    try:
+        photo_url = await upload
+    except Exception:
+        return
+    storage = get_storage()
+    try:
+        await storage.delete_resources_async(
+            [storage.get_public_id_from_url(photo_url)]
+        )
+    except Exception:
+        logger.warning(
+            "Abandoned transformed photo %s wasn't deleted", photo_url, exc_info=True
+        )
+
+
+def _discard_late_upload(upload: asyncio.Task) -> None:
+    """
+    Method lets the abandoned storage upload finish in the background and
+    cleans up its result.
+
+    :param upload: Task of the storage upload.
+    :type upload: asyncio.Task.
+    :return: None.
+    :rtype: None.
+    """
+    cleanup = asyncio.create_task(_delete_late_upload(upload))
+    _late_uploads.add(cleanup)
+    cleanup.add_done_callback(_late_uploads.discard)
+
+
+async def _make_transformed_photo_url(
+    photo: Photo,
+    updated_by: User,
+    to_override: bool,
+    transformation: list[dict],
+    engine: TransformEngine | None = None,
+) -> str:
+    """
+    Method returns the URL of the transformed photo. The local engine processes
+    the photo itself, otherwise according to the transform mode the photo gets
+    the delivery URL of the source image with the transformation or is uploaded
+    transformed by the storage. When the local fallback is enabled and the
+    storage is slower than the fallback timeout, the photo is transformed with
+    the local engine. The storage upload isn't interrupted then, so the circuit
+    breaker doesn't count the slow upload as failed, and the photo it stores is
+    deleted when it finishes. The photos of the storages which don't transform
+    images are always processed by the local engine.
+
+    :param photo: Original photo.
+    :type photo: Photo.
+    :param updated_by: User who transforms a photo.
+    :type updated_by: User.
+    :param to_override: Parameter responsible for overriding an original photo.
+    :type to_override: bool.
+    :param transformation: Transformation layers.
+    :type transformation: list[dict].
+    :param engine: Transform engine, the configured one if not passed.
+    :type engine: TransformEngine | None.
+    :return: URL of the transformed photo.
+    :rtype: str.
+    """
+    is_local_supported = is_transformation_supported(transformation)
+    if (
+        engine or settings.transform_engine
+    ) == TransformEngine.LOCAL or not get_storage().supports_transformations:
+        if not is_local_supported:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Transformation isn't supported by the local engine",
+            )
+        return await _transform_photo_locally(
+            photo=photo, updated_by=updated_by, transformation=transformation
+        )
+    if settings.transform_mode == TransformMode.DELIVERY_URL:
+        return get_storage().get_transformed_url(photo.url, transformation)
+
+    fallback_timeout = (
+        settings.transform_local_fallback_seconds if is_local_supported else None
+    )
+    upload = _upload_transformed_photo(
+        photo=photo,
+        updated_by=updated_by,
+        to_override=to_override,
+        transformation=transformation,
+    )
+    if fallback_timeout is None:
+        return await upload
+    upload = asyncio.create_task(upload)
+    try:
+        done, _ = await asyncio.wait({upload}, timeout=fallback_timeout)
+    except BaseException:
+        _discard_late_upload(upload)
+        raise
+    if done:
+        return upload.result()
+    _discard_late_upload(upload)
+    return await _transform_photo_locally(
+        photo=photo, updated_by=updated_by, transformation=transformation
+    )
+
+
+async def _apply_transformation(
+    photo: Photo,
+    updated_by: User,
+    transformation: list[dict],
+    to_override: bool,
+    description: str | None,
+    db: Session,
+    engine: TransformEngine | None = None,
+) -> Photo:
+    """
+    Method applies the transformation layers to the photo and stores the result
+    as a single transformed photo. When the photo was already transformed the
+    same way the existing transformed photo is returned, and when the result
+    of the transformation is already stored it's reused instead of uploading it
+    again. In the delivery URL transform mode nothing is uploaded, the photo
+    gets the URL the source image is delivered by with the transformation.
+
+    :param photo: Original photo.
+    :type photo: Photo.
+    :param updated_by: User who updated a photo.
+    :type updated_by: User.
+    :param transformation: Transformation layers.
+    :type transformation: list[dict].
+    :param to_override: Parameter responsible for overriding an original photo.
+    :type to_override: bool.
+    :param description: Transformed photo description.
+    :type description: str | None.
+    :param db: DB instance.
+    :type db: Session.
+    :param engine: Transform engine, the configured one if not passed.
+    :type engine: TransformEngine | None.
+    :return: Transformed photo.
+    :rtype: Photo.
+    """
+    transformation_key = get_transformation_key(photo.url, transformation)
+    if not to_override:
+        transformed_photo = await _get_transformed_photo(
+            orig_photo=photo, transformation_key=transformation_key, db=db
+        )
+        if transformed_photo and description in (
+            None, transformed_photo.description
+        ):
+            return transformed_photo
+
+    transformed_url = await _get_transformed_photo_url(
+        transformation_key=transformation_key, updated_by=updated_by, db=db
+    )
+    if transformed_url is None:
+        transformed_url = await _make_transformed_photo_url(
+            photo=photo,
+            updated_by=updated_by,
+            to_override=to_override,
+            transformation=transformation,
+            engine=engine,
+        )
+    return await _save_transformed_photo_to_db(
+        db=db,
+        transformed_photo_url=transformed_url,
+        updated_by=updated_by.id,
+        to_override_orig_photo=to_override,
+        photo_description=description,
+        orig_photo=photo,
+        transformation_key=transformation_key,
     )
 
 
@@ -151,57 +574,513 @@ async def apply_transformation(
     :return: Transformed photo.
     :rtype: Type[Photo].
     """
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True,
+    return await _apply_transformation(
+        photo=photo,
+        updated_by=updated_by,
+        transformation=_get_transformation(body),
+        to_override=body.to_override,
+        description=body.description,
+        db=db,
+        engine=body.engine,
     )
+
+
+async def apply_transformation_chain(
+    photo: Photo,
+    updated_by: User,
+    body: TransformChainModel,
+    db: Session,
+) -> Photo:
+    """
+    Method applies the chain of transformation steps to the photo at once, so
+    a single transformed photo is stored without intermediate photos.
+
+    :param photo: Original photo.
+    :type photo: Photo.
+    :param updated_by: User who updated a photo.
+    :type updated_by: User.
+    :param body: Transformation chain parameters.
+    :type body: TransformChainModel.
+    :param db: DB instance.
+    :type db: Session.
+    :return: Transformed photo.
+    :rtype: Photo.
+    """
+    transformation = _get_chain_transformation(body)
+    if not transformation:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Transformation steps have no parameters",
+        )
+    return await _apply_transformation(
+        photo=photo,
+        updated_by=updated_by,
+        transformation=transformation,
+        to_override=body.to_override,
+        description=body.description,
+        db=db,
+        engine=body.engine,
+    )
+
+
+def _get_batch_item_result(
+    photo_id: int,
+    transformation_index: int,
+    status_code: int,
+    detail: str | None = None,
+    photo: Photo | None = None,
+) -> dict:
+    """
+    Method returns the result of the transformation of the photo in the batch.
+
+    :param photo_id: Original photo identifier.
+    :type photo_id: int.
+    :param transformation_index: Index of the transformation in the batch.
+    :type transformation_index: int.
+    :param status_code: Status code of the transformation.
+    :type status_code: int.
+    :param detail: Error detail.
+    :type detail: str | None.
+    :param photo: Transformed photo.
+    :type photo: Photo | None.
+    :return: Result of the transformation.
+    :rtype: dict.
+    """
+    return {
+        "photo_id": photo_id,
+        "transformation_index": transformation_index,
+        "status_code": status_code,
+        "detail": detail,
+        "photo": photo,
+    }
+
+
+def _get_batch_item_error(item: dict, err: Exception) -> dict:
+    """
+    Method returns the result of the transformation of the batch failed with
+    the error.
+
+    :param item: Transformation of the photo in the batch.
+    :type item: dict.
+    :param err: Error of the transformation.
+    :type err: Exception.
+    :return: Result of the transformation.
+    :rtype: dict.
+    """
+    if isinstance(err, StorageUnavailableError):
+        return _get_batch_item_result(
+            item["photo"].id, item["index"], status.HTTP_503_SERVICE_UNAVAILABLE,
+            "Photo storage is temporarily unavailable",
+        )
+    if isinstance(err, ProcessPoolBusyError):
+        return _get_batch_item_result(
+            item["photo"].id, item["index"], status.HTTP_503_SERVICE_UNAVAILABLE,
+            "Server is busy processing images, try again later",
+        )
+    return _get_batch_item_result(
+        item["photo"].id, item["index"], err.status_code, err.detail
+    )
+
+
+async def _get_batch_transformed_photos(
+    photo_ids: list[int], transformation_keys: set[str], db: Session
+) -> dict[tuple[int, str], Photo]:
+    """
+    Method returns the photos already transformed from the original photos with
+    the transformations of the batch.
+
+    :param photo_ids: Original photo identifiers.
+    :type photo_ids: list[int].
+    :param transformation_keys: Keys of the transformations.
+    :type transformation_keys: set[str].
+    :param db: DB instance.
+    :type db: Session.
+    :return: Transformed photos by original photo identifier and transformation key.
+    :rtype: dict[tuple[int, str], Photo].
+    """
+    transformed_photos = db.query(Photo).filter(
+        Photo.original_photo_id.in_(photo_ids),
+        Photo.transformation_key.in_(transformation_keys),
+        Photo.status == PhotoStatus.READY.value,
+    )
+    return {
+        (photo.original_photo_id, photo.transformation_key): photo
+        for photo in transformed_photos
+    }
+
+
+async def _get_batch_transformed_photo_urls(
+    transformation_keys: set[str], updated_by: User, db: Session
+) -> dict[str, str]:
+    """
+    Method returns the URLs of the already stored results of the transformations
+    of the batch. The search scope is defined by the upload_dedup_scope setting.
+
+    :param transformation_keys: Keys of the transformations.
+    :type transformation_keys: set[str].
+    :param updated_by: User who transforms photos.
+    :type updated_by: User.
+    :param db: DB instance.
+    :type db: Session.
+    :return: URLs of the stored results by transformation key.
+    :rtype: dict[str, str].
+    """
+    if settings.upload_dedup_scope == UploadDedupScope.DISABLED:
+        return {}
+    query = db.query(Photo.transformation_key, Photo.url).filter(
+        Photo.transformation_key.in_(transformation_keys), Photo.url.is_not(None)
+    )
+    if settings.upload_dedup_scope == UploadDedupScope.USER:
+        query = query.filter(Photo.created_by == updated_by.id)
+    return {transformation_key: url for transformation_key, url in query}
+
+
+async def _make_batch_transformed_photo_url(
+    transformation_key: str,
+    photo: Photo,
+    updated_by: User,
+    transformation: list[dict],
+    semaphore: asyncio.Semaphore,
+    engine: TransformEngine | None = None,
+) -> tuple[str, str | Exception]:
+    """
+    Method returns the URL of the transformed photo of the batch or the error
+    the transformation failed with. The transformation starts when the
+    semaphore of the batch lets it in.
+
+    :param transformation_key: Key of the transformation.
+    :type transformation_key: str.
+    :param photo: Original photo.
+    :type photo: Photo.
+    :param updated_by: User who transforms photos.
+    :type updated_by: User.
+    :param transformation: Transformation layers.
+    :type transformation: list[dict].
+    :param semaphore: Semaphore bounding the transformations of the batch.
+    :type semaphore: asyncio.Semaphore.
+    :param engine: Transform engine, the configured one if not passed.
+    :type engine: TransformEngine | None.
+    :return: Key of the transformation and URL of the transformed photo or error.
+    :rtype: tuple[str, str | Exception].
+    """
+    try:
+        async with semaphore:
+            return transformation_key, await _make_transformed_photo_url(
+                photo=photo,
+                updated_by=updated_by,
+                to_override=False,
+                transformation=transformation,
+                engine=engine,
+            )
+    except (HTTPException, StorageUnavailableError, ProcessPoolBusyError) as err:
+        return transformation_key, err
+
+
+async def apply_transformations(
+    photo_ids: list[int],
+    transformations: list[TransformPhotoModel],
+    updated_by: User,
+    db: Session,
+) -> AsyncIterator[dict]:
+    """
+    Method applies every transformation to every photo. The storage work runs
+    concurrently, no more transformations at once than the process pool has
+    workers, so the local engine doesn't overfill the pool queue, and is done
+    once for the same result. The result of every pair is yielded as soon as
+    it's known: missing photos, failures and photos already transformed the same
+    way right away, the created transformed photos after all of them are
+    inserted with a single bulk insert.
+
+    :param photo_ids: Original photo identifiers.
+    :type photo_ids: list[int].
+    :param transformations: Transformation parameters.
+    :type transformations: list[TransformPhotoModel].
+    :param updated_by: User who transforms photos.
+    :type updated_by: User.
+    :param db: DB instance.
+    :type db: Session.
+    :return: Results of the transformations.
+    :rtype: AsyncIterator[dict].
+    """
+    photo_ids = list(dict.fromkeys(photo_ids))
+    photos = {
+        photo.id: photo for photo in db.query(Photo).filter(Photo.id.in_(photo_ids))
+    }
+    items = []
+    for photo_id in photo_ids:
+        photo = photos.get(photo_id)
+        for index, body in enumerate(transformations):
+            if photo is None:
+                yield _get_batch_item_result(
+                    photo_id, index, status.HTTP_404_NOT_FOUND,
+                    f"Photo with id {photo_id} wasn't found",
+                )
+            elif photo.status != PhotoStatus.READY.value:
+                yield _get_batch_item_result(
+                    photo_id, index, status.HTTP_409_CONFLICT,
+                    f"Photo with id {photo_id} isn't uploaded yet",
+                )
+            else:
+                transformation = _get_transformation(body)
+                items.append(
+                    {
+                        "index": index,
+                        "body": body,
+                        "photo": photo,
+                        "transformation": transformation,
+                        "key": get_transformation_key(photo.url, transformation),
+                    }
+                )
+    if not items:
+        return
+
+    transformation_keys = {item["key"] for item in items}
+    transformed_photos = await _get_batch_transformed_photos(
+        photo_ids=list(photos), transformation_keys=transformation_keys, db=db
+    )
+    transformed_urls = await _get_batch_transformed_photo_urls(
+        transformation_keys=transformation_keys, updated_by=updated_by, db=db
+    )
+    pending_items = []
+    tasks = {}
+    semaphore = asyncio.Semaphore(get_process_pool().max_workers)
+    for item in items:
+        transformed_photo = transformed_photos.get((item["photo"].id, item["key"]))
+        if transformed_photo and item["body"].description in (
+            None, transformed_photo.description
+        ):
+            yield _get_batch_item_result(
+                item["photo"].id, item["index"], status.HTTP_200_OK,
+                photo=transformed_photo,
+            )
+            continue
+        pending_items.append(item)
+        if item["key"] not in transformed_urls and item["key"] not in tasks:
+            tasks[item["key"]] = asyncio.create_task(
+                _make_batch_transformed_photo_url(
+                    transformation_key=item["key"],
+                    photo=item["photo"],
+                    updated_by=updated_by,
+                    transformation=item["transformation"],
+                    semaphore=semaphore,
+                    engine=item["body"].engine,
+                )
+            )
+
+    try:
+        for task in asyncio.as_completed(tasks.values()):
+            transformation_key, transformed_url = await task
+            if isinstance(transformed_url, Exception):
+                for item in pending_items:
+                    if item["key"] == transformation_key:
+                        yield _get_batch_item_error(item, transformed_url)
+            else:
+                transformed_urls[transformation_key] = transformed_url
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+    created_items = [item for item in pending_items if item["key"] in transformed_urls]
+    if not created_items:
+        return
+    created_photos = db.scalars(
+        insert(Photo).returning(Photo, sort_by_parameter_order=True),
+        [
+            {
+                "url": transformed_urls[item["key"]],
+                "public_id": get_storage().get_public_id_from_url(
+                    transformed_urls[item["key"]]
+                ),
+                "description": item["body"].description,
+                "created_by": updated_by.id,
+                "original_photo_id": item["photo"].id,
+                "is_transformed": True,
+                "transformation_key": item["key"],
+            }
+            for item in created_items
+        ],
+    ).all()
+    db.commit()
+    for item, created_photo in zip(created_items, created_photos):
+        yield _get_batch_item_result(
+            item["photo"].id, item["index"], status.HTTP_201_CREATED,
+            photo=created_photo,
+        )
+
+
+async def generate_photo_qr_code(photo: Photo, params: PhotoQrCodeModel) -> bytes:
+    """
+    Method generates QR code for the photo URL in a worker process.
+    :param photo: Photo instance.
+    :type photo: Photo.
+    :param params: QR code image parameters.
+    :type params: PhotoQrCodeModel.
+    :return: Encoded QR code image.
+    :rtype: bytes.
+    :raises ProcessPoolBusyError: If the queue of the process pool is full.
+    """
     try:
-        public_id = f"PhotoShareApp/{updated_by.user_name}/{str(uuid.uuid4())}"
-        transformed_img = uploader.upload(
+        return await get_process_pool().run(
+            render_qr_code,
             photo.url,
-            public_id=public_id,
-            overwrite=body.to_override,
-            transformation=[
-                {
-                    k: get_enum_value(v)
-                    for k, v in dict(body).items()
-                    if k not in ("to_override", "description")
-                }
-            ],
+            params.module_drawer,
+            params.color_mask,
+            params.box_size,
+            params.format,
+            settings.qr_code_max_image_size,
         )
-    except cloudinary.exceptions.Error as err:
+    except QrCodeTooLargeError as err:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Error occurred during image transformation: '{str(err)}'",
+            detail=f"{err}, use a smaller box size",
         )
-    transformed_url = transformed_img["secure_url"]
-    return await _save_transformed_photo_to_db(
-        db=db,
-        transformed_photo_url=transformed_url,
-        updated_by=updated_by.id,
-        to_override_orig_photo=body.to_override,
-        photo_description=body.description,
-        orig_photo=photo,
-    )
 
 
-async def generate_photo_qr_code(
-    photo: Photo, params: PhotoQrCodeModel
-) -> StyledPilImage:
+async def get_photo_qr_code(
+    photo: Photo, params: PhotoQrCodeModel, qr_code_key: str, r: Redis
+) -> bytes:
     """
-    Method generates QR code for the photo URL.
+    Method returns the cached QR code for the photo URL, generating and caching
+    it when it isn't cached.
     :param photo: Photo instance.
     :type photo: Photo.
     :param params: QR code image parameters.
     :type params: PhotoQrCodeModel.
-    :return: QR code image.
-    :rtype: StyledPilImage.
+    :param qr_code_key: Key of the QR code image.
+    :type qr_code_key: str.
+    :param r: Redis instance.
+    :type r: Redis.
+    :return: Encoded QR code image.
+    :rtype: bytes.
     """
-    return generate_qr_code(
-        photo_url=photo.url,
-        module_drawer=params.module_drawer,
-        color_mask=params.color_mask,
-        box_size=params.box_size,
-    )
+    cache = QrCodeCache(r)
+    img_bytes = await cache.get(qr_code_key)
+    if img_bytes is None:
+        img_bytes = await generate_photo_qr_code(photo=photo, params=params)
+        await cache.set(qr_code_key, img_bytes)
+    return img_bytes
+
+
+async def _get_export_qr_code(
+    photo: Photo, params: PhotoQrCodeModel, r: Redis
+) -> dict:
+    """
+    Method returns the result of the QR code of the exported photo. The QR code
+    is retried while the process pool is busy, as the export has no way to ask
+    the client to retry.
+
+    :param photo: Photo instance.
+    :type photo: Photo.
+    :param params: QR code image parameters.
+    :type params: PhotoQrCodeModel.
+    :param r: Redis instance.
+    :type r: Redis.
+    :return: Result of the QR code.
+    :rtype: dict.
+    """
+    qr_code_key = get_qr_code_key(photo.url, params)
+    while True:
+        try:
+            qr_code = await get_photo_qr_code(
+                photo=photo, params=params, qr_code_key=qr_code_key, r=r
+            )
+        except ProcessPoolBusyError as err:
+            await asyncio.sleep(min(err.retry_after, 1))
+        except HTTPException as err:
+            return _get_qr_code_result(photo.id, err.status_code, err.detail)
+        else:
+            return _get_qr_code_result(
+                photo.id, status.HTTP_200_OK, qr_code=qr_code
+            )
+
+
+def _get_qr_code_result(
+    photo_id: int,
+    status_code: int,
+    detail: str | None = None,
+    qr_code: bytes | None = None,
+) -> dict:
+    """
+    Method returns the result of the QR code of the exported photo.
+
+    :param photo_id: Photo identifier.
+    :type photo_id: int.
+    :param status_code: Status code of the QR code.
+    :type status_code: int.
+    :param detail: Error description.
+    :type detail: str | None.
+    :param qr_code: Encoded QR code image.
+    :type qr_code: bytes | None.
+    :return: Result of the QR code.
+    :rtype: dict.
+    """
+    return {
+        "photo_id": photo_id,
+        "status_code": status_code,
+        "detail": detail,
+        "qr_code": qr_code,
+    }
+
+
+async def generate_photos_qr_codes(
+    photo_ids: list[int], params: PhotoQrCodeModel, db: Session, r: Redis
+) -> AsyncIterator[dict]:
+    """
+    Method generates QR codes for the photo URLs. The QR codes are rendered in
+    the process pool, as many at once as there are worker processes, and every
+    QR code is yielded as soon as it's ready, so the memory doesn't grow with
+    the number of photos. Missing photos are yielded right away.
+
+    :param photo_ids: Photo identifiers.
+    :type photo_ids: list[int].
+    :param params: QR code image parameters.
+    :type params: PhotoQrCodeModel.
+    :param db: DB instance.
+    :type db: Session.
+    :param r: Redis instance.
+    :type r: Redis.
+    :return: Results of the QR codes.
+    :rtype: AsyncIterator[dict].
+    """
+    photo_ids = list(dict.fromkeys(photo_ids))
+    photos = {
+        photo.id: photo for photo in db.query(Photo).filter(Photo.id.in_(photo_ids))
+    }
+    ready_photos = []
+    for photo_id in photo_ids:
+        photo = photos.get(photo_id)
+        if photo is None:
+            yield _get_qr_code_result(
+                photo_id, status.HTTP_404_NOT_FOUND,
+                f"Photo with id {photo_id} wasn't found",
+            )
+        elif photo.status != PhotoStatus.READY.value:
+            yield _get_qr_code_result(
+                photo_id, status.HTTP_409_CONFLICT,
+                f"Photo with id {photo_id} isn't uploaded yet",
+            )
+        else:
+            ready_photos.append(photo)
+
+    ready_photos = iter(ready_photos)
+    tasks = {
+        asyncio.create_task(_get_export_qr_code(photo=photo, params=params, r=r))
+        for photo in itertools.islice(ready_photos, get_process_pool().max_workers)
+    }
+    try:
+        while tasks:
+            done, tasks = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_COMPLETED
+            )
+            # The next QR codes are rendered while the finished ones are sent.
+            for photo in itertools.islice(ready_photos, len(done)):
+                tasks.add(
+                    asyncio.create_task(
+                        _get_export_qr_code(photo=photo, params=params, r=r)
+                    )
+                )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
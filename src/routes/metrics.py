@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from redis.asyncio import Redis
+
+from src.cache.async_redis import get_redis
+from src.enums import Roles
+from src.schemas import (
+    CircuitBreakerMetricsResponse,
+    JobQueueMetricsResponse,
+    ProcessPoolMetricsResponse,
+    RequeuedJobsResponse,
+)
+from src.security.role_permissions import RoleChecker
+from src.services.job_queue import JobQueue
+from src.services.photo_upload_jobs import get_photo_upload_queue_name
+from src.services.process_pool import get_process_pool
+from src.services.storage_jobs import STORAGE_DELETE_QUEUE
+from src.storage.client import get_storage
+
+JOB_QUEUES = (STORAGE_DELETE_QUEUE, get_photo_upload_queue_name())
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    dependencies=[Depends(RoleChecker(allowed_roles=[Roles.ADMIN.value]))],
+)
+
+
+@router.get("/jobs", response_model=dict[str, JobQueueMetricsResponse])
+async def get_job_queues_metrics(r: Redis = Depends(get_redis)):
+    """
+    Method returns the depth and the processed jobs counters of the background
+    job queues.
+
+    :param r: Redis instance.
+    :type r: redis.asyncio.Redis.
+    :return: Metrics by the queue name.
+    :rtype: dict[str, JobQueueMetricsResponse].
+    """
+    return {
+        queue_name: await JobQueue(r, queue_name).get_metrics()
+        for queue_name in JOB_QUEUES
+    }
+
+
+@router.post("/jobs/{queue_name}/requeue", response_model=RequeuedJobsResponse)
+async def requeue_dead_jobs(
+    queue_name: str,
+    limit: int | None = Query(default=None, ge=1),
+    r: Redis = Depends(get_redis),
+):
+    """
+    Method moves the jobs of the queue from the dead letter list back to the
+    queue, e.g. after the storage outage the jobs couldn't outlast.
+
+    :param queue_name: Name of the queue.
+    :type queue_name: str.
+    :param limit: The maximum number of jobs to requeue, all if not passed.
+    :type limit: int | None.
+    :param r: Redis instance.
+    :type r: redis.asyncio.Redis.
+    :return: Number of requeued jobs.
+    :rtype: RequeuedJobsResponse.
+    """
+    if queue_name not in JOB_QUEUES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Queue {queue_name} wasn't found",
+        )
+    return {"requeued": await JobQueue(r, queue_name).requeue_dead(limit=limit)}
+
+
+@router.get("/storage", response_model=CircuitBreakerMetricsResponse)
+async def get_storage_metrics():
+    """
+    Method returns the state and the calls counters of the storage circuit
+    breaker of the current worker process.
+
+    :return: Circuit breaker metrics.
+    :rtype: CircuitBreakerMetricsResponse.
+    """
+    return get_storage().circuit_breaker.get_metrics()
+
+
+@router.get("/process_pool", response_model=ProcessPoolMetricsResponse)
+async def get_process_pool_metrics():
+    """
+    Method returns the queue depth, the jobs counters and the queue wait and
+    execution time of the CPU-bound jobs of the current worker process.
+
+    :return: Process pool metrics.
+    :rtype: ProcessPoolMetricsResponse.
+    """
+    return get_process_pool().get_metrics()
@@ -1,8 +1,7 @@
 from __future__ import annotations
 
 
-from fastapi import UploadFile, File, status, HTTPException, Query
-from fastapi.openapi.models import Response
+from fastapi import UploadFile, File, status, HTTPException, Query, Request, Response
 
 from redis.asyncio import Redis
 from typing import Optional, List, Union, Dict
@@ -13,6 +12,7 @@ from fastapi.security import (
 )
 
 from src.cache.async_redis import get_redis
+from src.cache.idempotency import IdempotencyKey, IdempotentRequest
 from src.database.models.user import User
 from src.enums import Roles
 from src.repository import users as repository_users
@@ -21,11 +21,17 @@ from src.database.db import get_db
 from src.repository.users import get_current_user
 from src.schemas import PhotoResponseWithTags
 from src.schemas import PhotoResponse, PhotoUpdate
+from src.schemas import SignedUploadResponse, SignedUploadConfirmModel
+from src.schemas import BatchUploadResponse, PhotoUploadStatusResponse
+from src.schemas import PhotoVersionResponse
+from src.conf.config import settings
+from src.security.rate_limiter import UserRateLimiter
 from fastapi.responses import JSONResponse
 
 
 router = APIRouter(prefix="/photos", tags=["photos"])
 security = HTTPBearer()
+create_rate_limiter = UserRateLimiter(scope="photos:create")
 
 
 @router.get("/", response_model=Dict[str, Union[List[PhotoResponse], PhotoResponse]])
@@ -80,31 +86,271 @@ async def get_photos(
     return {"photos": photos}
 
 
-@router.post("/", response_model=PhotoResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=PhotoResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_202_ACCEPTED: {"model": PhotoUploadStatusResponse},
+    },
+    dependencies=[Depends(create_rate_limiter)],
+)
 async def create_photo(
+    request: Request,
     description: Optional[str] = None,
+    async_upload: bool = Query(False, alias="async"),
     db: Session = Depends(get_db),
     current_user: User = Depends(repository_users.get_current_user),
+    r: Redis = Depends(get_redis),
+    idempotency: IdempotentRequest = Depends(IdempotencyKey(scope="photos:create")),
     file: UploadFile = File(),
 ):
     """
     Create a new photo.
-
+    With async=true the photo is created in the pending state and the response
+    is returned before the file is uploaded to the storage. The upload status
+    is available by the URL from the response.
+    Retries of the request with the same Idempotency-Key header get the
+    response of the first request instead of uploading the photo again.
+
+    :param request: Request: Incoming request.
+    :type request: Request
     :param description: Optional[str]: Description of the photo.
     :type description: Optional[str]
+    :param async_upload: bool: Whether to upload the file in the background.
+    :type async_upload: bool
     :param db: Session: Database session.
     :type db: Session
     :param current_user: User: Current authenticated user.
     :type current_user: User
+    :param r: Redis: Redis connection.
+    :type r: Redis
+    :param idempotency: IdempotentRequest: Idempotency state of the request.
+    :type idempotency: IdempotentRequest
     :param file: UploadFile: Image file to upload.
     :type file: UploadFile
-    :return: PhotoResponse: Response containing the created photo information.
-    :rtype: PhotoResponse
+    :return: PhotoResponse: Response containing the created photo information,
+    or the upload status if the file is uploaded in the background.
+    :rtype: JSONResponse
     """
+    if idempotency.replay:
+        return idempotency.replay
+
+    if async_upload:
+        new_photo = await repository_photos.create_photo_async(
+            description=description, current_user=current_user, db=db, r=r,
+            file=file,
+        )
+        status_url = str(request.url_for("get_photo_status", photo_id=new_photo.id))
+        upload_status = PhotoUploadStatusResponse(
+            id=new_photo.id,
+            status=new_photo.status,
+            url=new_photo.url,
+            status_url=status_url,
+        )
+        return await idempotency.save(
+            upload_status,
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Location": status_url},
+        )
+
     new_photo = await repository_photos.create_photo(
         description=description, current_user=current_user, db=db, file=file
     )
 
+    return await idempotency.save(
+        PhotoResponse(
+            id=new_photo.id,
+            url=new_photo.url,
+            description=new_photo.description,
+            created_by=new_photo.created_by,
+            created_at=new_photo.created_at,
+        ),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+@router.get("/{photo_id}/status", response_model=PhotoUploadStatusResponse)
+async def get_photo_status(
+    photo_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Get the upload status of a photo.
+
+    :param photo_id: int: ID of the photo.
+    :type photo_id: int
+    :param request: Request: Incoming request.
+    :type request: Request
+    :param db: Session: Database session.
+    :type db: Session
+    :return: PhotoUploadStatusResponse: Upload status and URL of the photo.
+    :rtype: PhotoUploadStatusResponse
+    """
+    photo = await repository_photos.get_photo_by_photo_id(photo_id=photo_id, db=db)
+    if photo is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found"
+        )
+    return PhotoUploadStatusResponse(
+        id=photo.id,
+        status=photo.status,
+        url=photo.url,
+        status_url=str(request.url_for("get_photo_status", photo_id=photo.id)),
+    )
+
+
+@router.get("/{photo_id}/versions", response_model=List[PhotoVersionResponse])
+async def get_photo_versions(
+    photo_id: int,
+    max_depth: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Get the version tree of a photo: the photos it was transformed from and the
+    photos transformed from it.
+
+    :param photo_id: int: ID of the photo.
+    :type photo_id: int
+    :param max_depth: int: The number of transformation steps walked in each direction.
+    :type max_depth: int
+    :param db: Session: Database session.
+    :type db: Session
+    :return: List[PhotoVersionResponse]: Photos of the version tree ordered by the depth.
+    :rtype: List[PhotoVersionResponse]
+    """
+    versions = await repository_photos.get_photo_versions(
+        photo_id=photo_id, max_depth=max_depth, db=db
+    )
+    if not versions:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found"
+        )
+    return [
+        PhotoVersionResponse(
+            id=photo.id,
+            url=photo.url,
+            description=photo.description,
+            status=photo.status,
+            created_at=photo.created_at,
+            updated_at=photo.updated_at,
+            created_by=photo.created_by,
+            updated_by=photo.updated_by,
+            original_photo_id=photo.original_photo_id,
+            is_transformed=photo.is_transformed,
+            depth=depth,
+        )
+        for photo, depth in versions
+    ]
+
+
+@router.post("/batch", response_model=BatchUploadResponse)
+async def create_photos_batch(
+    response: Response,
+    description: Optional[str] = None,
+    db: Session = Depends(get_db),
+    r: Redis = Depends(get_redis),
+    current_user: User = Depends(repository_users.get_current_user),
+    files: List[UploadFile] = File(),
+):
+    """
+    Create many photos at once. Every file is charged to the rate limit quota,
+    so a batch holds no more files than the quota of the user's role.
+
+    :param response: Response: Response to set the rate limit headers to.
+    :type response: Response
+    :param description: Optional[str]: Description of the photos.
+    :type description: Optional[str]
+    :param db: Session: Database session.
+    :type db: Session
+    :param r: Redis: Redis connection.
+    :type r: Redis
+    :param current_user: User: Current authenticated user.
+    :type current_user: User
+    :param files: List[UploadFile]: Image files to upload.
+    :type files: List[UploadFile]
+    :return: BatchUploadResponse: Upload status of every file.
+    :rtype: BatchUploadResponse
+    """
+    max_files = min(
+        settings.upload_batch_max_files,
+        await create_rate_limiter.get_limit(current_user=current_user, db=db, r=r),
+    )
+    if len(files) > max_files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No more than {max_files} files can be uploaded at once",
+        )
+    response.headers.update(
+        await create_rate_limiter.consume(
+            current_user=current_user, db=db, r=r, cost=len(files)
+        )
+    )
+    results = await repository_photos.create_photos(
+        description=description, current_user=current_user, db=db, files=files
+    )
+    return {"results": results}
+
+
+@router.post(
+    "/signed_upload",
+    response_model=SignedUploadResponse,
+    dependencies=[Depends(create_rate_limiter)],
+)
+async def create_signed_upload(
+    current_user: User = Depends(repository_users.get_current_user),
+    r: Redis = Depends(get_redis),
+):
+    """
+    Issue short-lived signed parameters for uploading a photo directly to the
+    storage, bypassing the API.
+
+    :param current_user: User: Current authenticated user.
+    :type current_user: User
+    :param r: Redis: Redis connection.
+    :type r: Redis
+    :return: SignedUploadResponse: Public id, upload URL and form fields.
+    :rtype: SignedUploadResponse
+    """
+    signed_upload = await repository_photos.create_signed_upload(
+        current_user=current_user, r=r
+    )
+    return SignedUploadResponse(**signed_upload)
+
+
+@router.post(
+    "/signed_upload/confirm",
+    response_model=PhotoResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def confirm_signed_upload(
+    body: SignedUploadConfirmModel,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(repository_users.get_current_user),
+    r: Redis = Depends(get_redis),
+):
+    """
+    Confirm the photo uploaded directly to the storage and create it.
+
+    :param body: SignedUploadConfirmModel: Public id and description of the photo.
+    :type body: SignedUploadConfirmModel
+    :param db: Session: Database session.
+    :type db: Session
+    :param current_user: User: Current authenticated user.
+    :type current_user: User
+    :param r: Redis: Redis connection.
+    :type r: Redis
+    :return: PhotoResponse: Response containing the created photo information.
+    :rtype: PhotoResponse
+    """
+    new_photo = await repository_photos.confirm_signed_upload(
+        public_id=body.public_id,
+        description=body.description,
+        current_user=current_user,
+        db=db,
+        r=r,
+    )
     return PhotoResponse(
         id=new_photo.id,
         url=new_photo.url,
@@ -150,7 +396,9 @@ async def delete_photo(
         current_user_role.name == Roles.ADMIN.value
         or photo.created_by == current_user.id
     ):
-        deleted_photo = await repository_photos.delete_photo(photo=photo, db=db)
+        deleted_photo = await repository_photos.delete_photo(
+            photo=photo, db=db, r=r
+        )
     else:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
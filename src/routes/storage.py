@@ -0,0 +1,66 @@
+from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
+from fastapi.responses import FileResponse
+
+from src.storage.client import get_storage
+from src.storage.local_storage import LocalStorage
+from src.utils.upload_validator import validate_upload
+
+router = APIRouter(prefix="/storage", tags=["storage"])
+
+
+@router.get("/{file_path:path}", response_class=FileResponse)
+async def get_stored_file(file_path: str):
+    """
+    Method serves the photo kept in the local storage.
+
+    :param file_path: Path of the file relative to the storage.
+    :type file_path: str.
+    :return: Photo file.
+    :rtype: FileResponse.
+    """
+    storage = get_storage()
+    path = storage.get_path(file_path) if isinstance(storage, LocalStorage) else None
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
+        )
+    return FileResponse(
+        path, headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+
+@router.post("/{public_id:path}", status_code=status.HTTP_201_CREATED)
+async def upload_signed_file(
+    public_id: str,
+    expires: int = Form(),
+    signature: str = Form(),
+    file: UploadFile = File(),
+):
+    """
+    Method stores the photo uploaded directly to the local storage with the signed
+    upload parameters.
+
+    :param public_id: Public identifier of the photo.
+    :type public_id: str.
+    :param expires: Expiration timestamp of the upload parameters.
+    :type expires: int.
+    :param signature: Signature of the upload parameters.
+    :type signature: str.
+    :param file: Image file to upload.
+    :type file: UploadFile.
+    :return: Public identifier and URL of the stored photo.
+    :rtype: dict.
+    """
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Not found"
+        )
+    if not storage.verify_upload_signature(public_id, expires, signature):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired upload signature",
+        )
+    await validate_upload(file)
+    photo_url = await storage.upload_async(file.file, public_id=public_id)
+    return {"public_id": public_id, "secure_url": photo_url}
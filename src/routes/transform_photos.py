@@ -1,40 +1,277 @@
-from io import BytesIO
-from typing import Type
+import json
+from typing import AsyncIterator, Type
 
-from fastapi import APIRouter, status, Depends, HTTPException
-from qrcode.image.styledpil import StyledPilImage
+from fastapi import APIRouter, status, Depends, Header, HTTPException
+from fastapi.encoders import jsonable_encoder
+from redis.asyncio import Redis
 from sqlalchemy.orm import Session
-from starlette.responses import StreamingResponse
+from starlette.responses import Response, StreamingResponse
 
+from src.cache.async_redis import get_redis
+from src.cache.idempotency import IdempotencyKey, IdempotentRequest
+from src.cache.qr_codes import get_qr_code_key
+from src.conf.config import settings
 from src.database.db import get_db
 from src.database.models.photo import Photo
 from src.database.models.user import User
+from src.enums import PhotoStatus, QrCodeFormat, Roles
 from src.repository.users import get_current_user
 from src.schemas import (
+    BatchTransformItemResponse,
+    BatchTransformModel,
+    TransformChainModel,
     TransformedPhotoModelResponse,
     TransformPhotoModel,
     PhotoQrCodeModel,
-    PhotoQrCodeModelResponse,
+    QrCodeExportModel,
 )
 from src.repository import transform_photos as repository_transform
 from src.repository import photos as repository_photos
+from src.security.rate_limiter import UserRateLimiter
+from src.utils.qr_code import qr_code_extension_map, qr_code_media_type_map
+from src.utils.zip_stream import ZipStream
 
 router = APIRouter(prefix="/transform", tags=["transform"])
+create_rate_limiter = UserRateLimiter(scope="transform:create")
+export_rate_limiter = UserRateLimiter(
+    scope="qr_codes:export",
+    quotas={
+        Roles.ADMIN.value: settings.qr_code_export_admin_quota,
+        Roles.MODERATOR.value: settings.qr_code_export_moderator_quota,
+        Roles.USER.value: settings.qr_code_export_user_quota,
+    },
+)
+
+QR_CODE_RESPONSES = {
+    status.HTTP_200_OK: {
+        "content": {
+            media_type: {} for media_type in qr_code_media_type_map.values()
+        },
+        "description": "QR code image in the requested format.",
+    },
+    status.HTTP_304_NOT_MODIFIED: {
+        "description": "The client already has the QR code image.",
+    },
+}
+
+
+def _is_etag_matched(if_none_match: str | None, etag: str) -> bool:
+    """
+    Method checks whether the client already has the representation with the ETag.
+
+    :param if_none_match: Value of the If-None-Match header.
+    :type if_none_match: str | None.
+    :param etag: ETag of the current representation.
+    :type etag: str.
+    :return: True if the header matches the ETag.
+    :rtype: bool.
+    """
+    if if_none_match is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def _stream_batch_results(results: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """
+    Method serializes the results of the batch transformation as NDJSON lines.
+
+    :param results: Results of the transformations.
+    :type results: AsyncIterator[dict].
+    :return: NDJSON lines.
+    :rtype: AsyncIterator[str].
+    """
+    async for result in results:
+        item = BatchTransformItemResponse(
+            photo_id=result["photo_id"],
+            transformation_index=result["transformation_index"],
+            status_code=result["status_code"],
+            detail=result["detail"],
+            photo=result["photo"] and TransformedPhotoModelResponse.from_orm(
+                result["photo"]
+            ),
+        )
+        yield json.dumps(jsonable_encoder(item)) + "\n"
+
+
+async def _stream_qr_codes_zip(
+    results: AsyncIterator[dict], image_format: QrCodeFormat
+) -> AsyncIterator[bytes]:
+    """
+    Method writes the QR codes to the ZIP archive as they are generated. The
+    photos the QR codes failed for are listed in errors.txt at the end.
+
+    :param results: Results of the QR codes.
+    :type results: AsyncIterator[dict].
+    :param image_format: Format of the QR code images.
+    :type image_format: QrCodeFormat.
+    :return: Bytes of the archive.
+    :rtype: AsyncIterator[bytes].
+    """
+    archive = ZipStream()
+    errors = []
+    async for result in results:
+        if result["qr_code"] is None:
+            errors.append(
+                f"{result['photo_id']}\t{result['status_code']}\t{result['detail']}"
+            )
+            continue
+        yield archive.add(
+            f"qr_code_{result['photo_id']}.{qr_code_extension_map[image_format]}",
+            result["qr_code"],
+            # Raster images are compressed already, unlike the SVG markup.
+            compress=image_format == QrCodeFormat.SVG,
+        )
+    if errors:
+        yield archive.add("errors.txt", "\n".join(errors).encode(), compress=True)
+    yield archive.close()
+
+
+@router.post(
+    "/batch",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"application/x-ndjson": {}},
+            "description": "BatchTransformItemResponse per line.",
+        }
+    },
+)
+async def transform_photos_batch(
+    body: BatchTransformModel,
+    db: Session = Depends(get_db),
+    r: Redis = Depends(get_redis),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Method applies every transformation to every photo. The result of every
+    photo and transformation pair is streamed as an NDJSON line as soon as
+    it's known. Every pair is charged to the rate limit quota, so the batch
+    holds no more pairs than the quota of the user's role.
+
+    :param body: Photo identifiers and transformation parameters.
+    :type body: BatchTransformModel.
+    :param db: DB instance.
+    :type db: Session.
+    :param r: Redis instance.
+    :type r: Redis.
+    :param current_user: Authorized user.
+    :type current_user: User.
+    :return: Results of the transformations.
+    :rtype: StreamingResponse.
+    """
+    items_count = len(set(body.photo_ids)) * len(body.transformations)
+    max_items = min(
+        settings.transform_batch_max_items,
+        await create_rate_limiter.get_limit(current_user=current_user, db=db, r=r),
+    )
+    if items_count > max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No more than {max_items} photo transformations can be made "
+            f"at once",
+        )
+    if any(transformation.to_override for transformation in body.transformations):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Photos can't be overridden by the batch transformation",
+        )
+    rate_limit_headers = await create_rate_limiter.consume(
+        current_user=current_user, db=db, r=r, cost=items_count
+    )
+    results = repository_transform.apply_transformations(
+        photo_ids=body.photo_ids,
+        transformations=body.transformations,
+        updated_by=current_user,
+        db=db,
+    )
+    return StreamingResponse(
+        _stream_batch_results(results),
+        media_type="application/x-ndjson",
+        headers=rate_limit_headers,
+    )
+
+
+@router.post(
+    "/qr_codes",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"application/zip": {}},
+            "description": "ZIP archive of the QR code images.",
+        }
+    },
+)
+async def export_photos_qr_codes(
+    body: QrCodeExportModel,
+    db: Session = Depends(get_db),
+    r: Redis = Depends(get_redis),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Method exports QR codes of the photo URLs as a ZIP archive. The archive is
+    streamed while the QR codes are rendered in parallel, every QR code is sent
+    as soon as it's ready, so the memory doesn't grow with the number of photos.
+    Every photo is charged to the QR code export quota, separate from the quota
+    of the transformations, so the archive holds no more QR codes than the
+    export quota of the user's role.
+
+    :param body: Photo identifiers and QR code params.
+    :type body: QrCodeExportModel.
+    :param db: DB session instance.
+    :type db: Session.
+    :param r: Redis instance.
+    :type r: Redis.
+    :param current_user: Authorized user info.
+    :type current_user: User.
+    :return: ZIP archive of the QR codes.
+    :rtype: StreamingResponse.
+    """
+    items_count = len(set(body.photo_ids))
+    max_items = min(
+        settings.qr_code_export_max_items,
+        await export_rate_limiter.get_limit(current_user=current_user, db=db, r=r),
+    )
+    if items_count > max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No more than {max_items} QR codes can be exported at once",
+        )
+    rate_limit_headers = await export_rate_limiter.consume(
+        current_user=current_user, db=db, r=r, cost=items_count
+    )
+    results = repository_transform.generate_photos_qr_codes(
+        photo_ids=body.photo_ids, params=body, db=db, r=r
+    )
+    return StreamingResponse(
+        _stream_qr_codes_zip(results, body.format),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="qr_codes.zip"',
+            **rate_limit_headers,
+        },
+    )
 
 
 @router.post(
     "/{photo_id}",
     response_model=TransformedPhotoModelResponse,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(create_rate_limiter)],
 )
 async def transform_photo(
     photo_id: int,
     body: TransformPhotoModel = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency: IdempotentRequest = Depends(
+        IdempotencyKey(scope="transform:create")
+    ),
 ):
     """
-    Method makes photo transformation with storing data to DB.
+    Method makes photo transformation with storing data to DB. Retries of the
+    request with the same Idempotency-Key header get the response of the first
+    request instead of transforming the photo again.
     :param body: Transformation parameters.
     :type body: TransformPhotoModel.
     :param photo_id: Original photo identifier.
@@ -43,9 +280,14 @@ async def transform_photo(
     :type db: Session.
     :param current_user: Authorized user.
     :type current_user: User.
+    :param idempotency: Idempotency state of the request.
+    :type idempotency: IdempotentRequest.
     :return: Transformed photo instance.
-    :rtype: TransformedPhotoModelResponse
+    :rtype: JSONResponse
     """
+    if idempotency.replay:
+        return idempotency.replay
+
     photo: Photo = await repository_photos.get_photo_by_photo_id(
         photo_id=photo_id, db=db
     )
@@ -54,54 +296,145 @@ async def transform_photo(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Photo with id {photo_id} wasn't found",
         )
+    if photo.status != PhotoStatus.READY.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Photo with id {photo_id} isn't uploaded yet",
+        )
     transformed_photo: Type[Photo] = await repository_transform.apply_transformation(
         photo=photo, updated_by=current_user, body=body, db=db
     )
-    return TransformedPhotoModelResponse(
-        id=transformed_photo.id,
-        url=transformed_photo.url,
-        description=transformed_photo.description,
-        created_at=transformed_photo.created_at,
-        updated_at=transformed_photo.updated_at,
-        created_by=transformed_photo.created_by,
-        updated_by=transformed_photo.updated_by,
-        original_photo_id=transformed_photo.original_photo_id,
-        is_transformed=transformed_photo.is_transformed,
+    return await idempotency.save(
+        TransformedPhotoModelResponse(
+            id=transformed_photo.id,
+            url=transformed_photo.url,
+            description=transformed_photo.description,
+            created_at=transformed_photo.created_at,
+            updated_at=transformed_photo.updated_at,
+            created_by=transformed_photo.created_by,
+            updated_by=transformed_photo.updated_by,
+            original_photo_id=transformed_photo.original_photo_id,
+            is_transformed=transformed_photo.is_transformed,
+        ),
+        status_code=status.HTTP_201_CREATED,
     )
 
 
 @router.post(
-    "/{photo_id}/qr_code",
-    response_model=PhotoQrCodeModelResponse,
+    "/{photo_id}/chain",
+    response_model=TransformedPhotoModelResponse,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(create_rate_limiter)],
+)
+async def transform_photo_chain(
+    photo_id: int,
+    body: TransformChainModel,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency: IdempotentRequest = Depends(
+        IdempotencyKey(scope="transform:create")
+    ),
+):
+    """
+    Method applies the chain of transformation steps to the photo with a single
+    transformation, so only the final transformed photo is stored.
+
+    :param photo_id: Original photo identifier.
+    :type photo_id: int.
+    :param body: Transformation chain parameters.
+    :type body: TransformChainModel.
+    :param db: DB instance.
+    :type db: Session.
+    :param current_user: Authorized user.
+    :type current_user: User.
+    :param idempotency: Idempotency state of the request.
+    :type idempotency: IdempotentRequest.
+    :return: Transformed photo instance.
+    :rtype: JSONResponse
+    """
+    if idempotency.replay:
+        return idempotency.replay
+
+    photo: Photo = await repository_photos.get_photo_by_photo_id(
+        photo_id=photo_id, db=db
+    )
+    if not photo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Photo with id {photo_id} wasn't found",
+        )
+    if photo.status != PhotoStatus.READY.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Photo with id {photo_id} isn't uploaded yet",
+        )
+    transformed_photo = await repository_transform.apply_transformation_chain(
+        photo=photo, updated_by=current_user, body=body, db=db
+    )
+    return await idempotency.save(
+        TransformedPhotoModelResponse.from_orm(transformed_photo),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+@router.get(
+    "/{photo_id}/qr_code", response_class=Response, responses=QR_CODE_RESPONSES
+)
+@router.post(
+    "/{photo_id}/qr_code", response_class=Response, responses=QR_CODE_RESPONSES
 )
 async def get_photo_url_qr_code(
     photo_id: int,
     body: PhotoQrCodeModel = Depends(),
+    if_none_match: str | None = Header(default=None),
     db: Session = Depends(get_db),
+    r: Redis = Depends(get_redis),
     _: User = Depends(get_current_user),
 ):
     """
-    Method generates QR code with an embedded link inside it.
+    Method generates QR code with an embedded link inside it as JPEG, PNG or
+    SVG rendered from the QR code modules without the raster image. The image is
+    cached by the photo URL and the QR code params, which also make its ETag,
+    so a repeated request gets the cached image or 304 if the client has it.
 
     :param photo_id: Photo identifier.
     :type photo_id: int.
     :param body: QR code params.
     :type body: PhotoQrCodeModel
+    :param if_none_match: ETag of the QR code image the client has.
+    :type if_none_match: str | None.
     :param db: DB session instance.
     :type db: Session.
+    :param r: Redis instance.
+    :type r: Redis.
     :param _: Authorized user info.
     :type _: User.
     :return: QR code image.
-    :rtype: StreamingResponse.
+    :rtype: Response.
     """
     photo: Photo = await repository_photos.get_photo_by_photo_id(
         photo_id=photo_id, db=db
     )
-    img: StyledPilImage = await repository_transform.generate_photo_qr_code(
-        photo=photo, params=body
+    if not photo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Photo with id {photo_id} wasn't found",
+        )
+    if photo.status != PhotoStatus.READY.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Photo with id {photo_id} isn't uploaded yet",
+        )
+    qr_code_key = get_qr_code_key(photo.url, body)
+    headers = {
+        "ETag": f'"{qr_code_key}"',
+        "Cache-Control": f"private, max-age={settings.qr_code_cache_ttl_seconds}",
+    }
+    if _is_etag_matched(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    img_bytes: bytes = await repository_transform.get_photo_qr_code(
+        photo=photo, params=body, qr_code_key=qr_code_key, r=r
+    )
+    return Response(
+        img_bytes, media_type=qr_code_media_type_map[body.format], headers=headers
     )
-    img_bytes = BytesIO()
-    img.save(img_bytes, format="JPEG")
-    img_bytes.seek(0)
-    return StreamingResponse(img_bytes, media_type="image/jpeg")
@@ -7,9 +7,12 @@ from src.enums import (
     Roles,
     QrModuleDrawer,
     QrColorMask,
+    QrCodeFormat,
     PhotoEffect,
     PhotoCrop,
     PhotoGravity,
+    PhotoStatus,
+    TransformEngine,
 )
 
 
@@ -59,7 +62,7 @@ class TokenModelResponse(BaseModel):
 class PhotoBase(BaseModel):
     description: str | None = Field(max_length=500)
     id: int
-    url: str
+    url: str | None
     created_by: int
     created_at: datetime
 
@@ -75,6 +78,36 @@ class PhotoUpdate(PhotoBase):
     updated_at: datetime
 
 
+class PhotoUploadStatusResponse(BaseModel):
+    id: int
+    status: PhotoStatus
+    url: str | None
+    status_url: str
+
+
+class BatchUploadItemResponse(BaseModel):
+    filename: str
+    status_code: int
+    detail: str | None
+    photo: PhotoResponse | None
+
+
+class BatchUploadResponse(BaseModel):
+    results: list[BatchUploadItemResponse]
+
+
+class SignedUploadResponse(BaseModel):
+    public_id: str
+    upload_url: str
+    fields: dict[str, str | int]
+    expires_at: datetime
+
+
+class SignedUploadConfirmModel(BaseModel):
+    public_id: str
+    description: str | None = Field(max_length=500)
+
+
 class TagModel(BaseModel):
     name: str
     id: int
@@ -89,7 +122,7 @@ class TagResponse(TagModel):
 
 class PhotoResponseWithTags(PhotoBase):
     id: int
-    url: str
+    url: str | None
     created_by: int
     created_at: datetime
     tags: list[TagResponse]
@@ -98,14 +131,6 @@ class PhotoResponseWithTags(PhotoBase):
         orm_mode = True
 
 
-class PhotoResponse(PhotoBase):
-    pass
-
-
-class PhotoUpdate(PhotoBase):
-    updated_at: datetime
-
-
 class TransformPhotoModel(BaseModel):
     to_override: bool = False
     description: str | None = Field(min_length=5, title="Photo description")
@@ -115,6 +140,23 @@ class TransformPhotoModel(BaseModel):
     gravity: PhotoGravity | None = PhotoGravity.AUTO.value
     width: int | None = Field(title="Photo width", gt=0, le=1000)
     height: int | None = Field(title="Photo height", gt=0, le=1000)
+    engine: TransformEngine | None = None
+
+
+class TransformStepModel(BaseModel):
+    effect: PhotoEffect | None = None
+    angle: int | None = Field(gt=0, le=360, title="Angle of photo rotation")
+    crop: PhotoCrop | None = None
+    gravity: PhotoGravity | None = None
+    width: int | None = Field(title="Photo width", gt=0, le=1000)
+    height: int | None = Field(title="Photo height", gt=0, le=1000)
+
+
+class TransformChainModel(BaseModel):
+    to_override: bool = False
+    description: str | None = Field(min_length=5, title="Photo description")
+    steps: list[TransformStepModel] = Field(min_items=1, max_items=10)
+    engine: TransformEngine | None = None
 
 
 class TransformedPhotoModelResponse(BaseModel):
@@ -132,14 +174,34 @@ class TransformedPhotoModelResponse(BaseModel):
         orm_mode = True
 
 
+class PhotoVersionResponse(TransformedPhotoModelResponse):
+    url: str | None
+    status: PhotoStatus
+    depth: int
+
+
+class BatchTransformModel(BaseModel):
+    photo_ids: list[int] = Field(min_items=1)
+    transformations: list[TransformPhotoModel] = Field(min_items=1)
+
+
+class BatchTransformItemResponse(BaseModel):
+    photo_id: int
+    transformation_index: int
+    status_code: int
+    detail: str | None
+    photo: TransformedPhotoModelResponse | None
+
+
 class PhotoQrCodeModel(BaseModel):
     module_drawer: QrModuleDrawer = QrModuleDrawer.ROUNDED
     color_mask: QrColorMask = QrColorMask.SOLID
-    box_size: int = Field(title="QR code box size", gt=0, default=10)
+    box_size: int = Field(title="QR code box size", gt=0, le=100, default=10)
+    format: QrCodeFormat = QrCodeFormat.JPEG
 
 
-class PhotoQrCodeModelResponse(BaseModel):
-    qr_code: str
+class QrCodeExportModel(PhotoQrCodeModel):
+    photo_ids: list[int] = Field(min_items=1)
 
 
 class RateModel(BaseModel):
@@ -191,3 +253,41 @@ class CommentResponse(CommentSchema):
 
     class Config:
         from_attributes = True
+
+
+class JobQueueMetricsResponse(BaseModel):
+    pending: int
+    processing: int
+    delayed: int
+    dead_letter: int
+    completed: int
+    retried: int
+    postponed: int
+    dead: int
+
+
+class RequeuedJobsResponse(BaseModel):
+    requeued: int
+
+
+class CircuitBreakerMetricsResponse(BaseModel):
+    state: str
+    consecutive_failures: int
+    successes: int
+    failures: int
+    rejected: int
+    opened: int
+
+
+class ProcessPoolMetricsResponse(BaseModel):
+    workers: int
+    max_queue_depth: int
+    pending: int
+    queued: int
+    completed: int
+    failed: int
+    rejected: int
+    queue_wait_seconds_total: float
+    queue_wait_seconds_max: float
+    execution_seconds_total: float
+    execution_seconds_max: float
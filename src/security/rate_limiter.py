@@ -0,0 +1,173 @@
+import math
+import time
+import uuid
+
+from fastapi import Depends, HTTPException, Response, status
+from redis.asyncio import Redis
+from sqlalchemy.orm import Session
+
+from src.cache.async_redis import get_redis
+from src.conf.config import settings
+from src.database.db import get_db
+from src.database.models.user import User
+from src.enums import Roles
+from src.repository.users import get_current_user, get_user_role
+
+# Sliding window log kept in a sorted set scored by request time in milliseconds.
+# Trimming, counting and recording the request happen atomically in one round trip.
+# A request costing several units is recorded as that many entries.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local cost = tonumber(ARGV[5])
+
+redis.call("ZREMRANGEBYSCORE", key, "-inf", now - window)
+local count = redis.call("ZCARD", key)
+local allowed = 0
+if count + cost <= limit then
+    for i = 1, cost do
+        redis.call("ZADD", key, now, ARGV[4] .. ":" .. i)
+    end
+    redis.call("PEXPIRE", key, window)
+    count = count + cost
+    allowed = 1
+end
+
+-- The rejected request fits once enough of the oldest entries expire.
+local index = 0
+if allowed == 0 then
+    index = count + cost - limit - 1
+end
+local reset = window
+local oldest = redis.call("ZRANGE", key, index, index, "WITHSCORES")
+if oldest[2] then
+    reset = tonumber(oldest[2]) + window - now
+end
+return {allowed, count, reset}
+"""
+
+ROLE_QUOTAS = {
+    Roles.ADMIN.value: settings.rate_limit_admin_quota,
+    Roles.MODERATOR.value: settings.rate_limit_moderator_quota,
+    Roles.USER.value: settings.rate_limit_user_quota,
+}
+
+
+class UserRateLimiter:
+    """
+    Per-user sliding window rate limiter used as a route dependency. Requests are
+    counted per scope, so different groups of routes have separate quotas.
+
+    :param scope: str: The name of the group of routes sharing the quota.
+    :type scope: str
+    :param window_seconds: int: The length of the sliding window.
+    :type window_seconds: int
+    :param quotas: dict[str, int] | None: The number of requests per window by the role name, the quotas from the settings if not set.
+    :type quotas: dict[str, int] | None
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        window_seconds: int = settings.rate_limit_window_seconds,
+        quotas: dict[str, int] | None = None,
+    ):
+        self.scope = scope
+        self.window_ms = window_seconds * 1000
+        self.quotas = quotas or ROLE_QUOTAS
+
+    async def get_limit(self, current_user: User, db: Session, r: Redis) -> int:
+        """
+        Method returns the quota of the current user's role within the sliding
+        window, which is also the most a single request can cost.
+
+        :param current_user: Authorized user.
+        :type current_user: User.
+        :param db: DB session object.
+        :type db: Session.
+        :param r: Redis instance.
+        :type r: redis.asyncio.Redis.
+        :return: Number of quota units per window.
+        :rtype: int.
+        """
+        role = await get_user_role(user_id=current_user.id, db=db, r=r)
+        return self.quotas.get(
+            role.name if role else Roles.USER.value, self.quotas[Roles.USER.value]
+        )
+
+    async def consume(
+        self, current_user: User, db: Session, r: Redis, cost: int = 1
+    ) -> dict[str, str]:
+        """
+        Method charges the request of the current user to the quota of the user's
+        role within the sliding window. Requests creating many items cost one
+        unit per item.
+
+        :param current_user: Authorized user.
+        :type current_user: User.
+        :param db: DB session object.
+        :type db: Session.
+        :param r: Redis instance.
+        :type r: redis.asyncio.Redis.
+        :param cost: Number of quota units the request takes.
+        :type cost: int.
+        :return: X-RateLimit-* headers of the response.
+        :rtype: dict[str, str].
+        :raises HTTPException: If the quota is exhausted or is smaller than the cost.
+        """
+        limit = await self.get_limit(current_user=current_user, db=db, r=r)
+        if cost > limit:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No more than {limit} items can be created within "
+                f"{self.window_ms // 1000} seconds",
+            )
+        now_ms = int(time.time() * 1000)
+        script = r.register_script(SLIDING_WINDOW_SCRIPT)
+        allowed, count, reset_ms = await script(
+            keys=[f"rate_limit:{self.scope}:{current_user.id}"],
+            args=[now_ms, self.window_ms, limit, f"{now_ms}:{uuid.uuid4().hex}", cost],
+        )
+        reset_seconds = max(math.ceil(int(reset_ms) / 1000), 1)
+        headers = {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(max(limit - int(count), 0)),
+            "X-RateLimit-Reset": str(reset_seconds),
+        }
+        if not int(allowed):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, try again later",
+                headers={**headers, "Retry-After": str(reset_seconds)},
+            )
+        return headers
+
+    async def __call__(
+        self,
+        response: Response,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+        r: Redis = Depends(get_redis),
+    ) -> None:
+        """
+        Dependency function that limits the number of requests of the current user
+        within the sliding window according to the quota of the user's role.
+        Sets X-RateLimit-* headers to the response and raises an HTTPException
+        with the Retry-After header when the quota is exhausted.
+
+        :param response: Response instance to set rate limit headers to.
+        :type response: Response.
+        :param current_user: Authorized user.
+        :type current_user: User.
+        :param db: DB session object.
+        :type db: Session.
+        :param r: Redis instance.
+        :type r: redis.asyncio.Redis.
+        :return: None.
+        :rtype: None.
+        """
+        response.headers.update(
+            await self.consume(current_user=current_user, db=db, r=r)
+        )
@@ -0,0 +1,361 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+from redis.asyncio import Redis
+
+from src.conf.config import settings
+from src.storage.circuit_breaker import StorageUnavailableError
+from src.utils.backoff import get_backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Claiming is atomic: jobs whose visibility timeout expired (the worker died while
+# processing them) and delayed jobs that are due are moved back to the queue, then
+# up to the limit of jobs are moved to the processing set scored by the claim time.
+CLAIM_SCRIPT = """
+local queue = KEYS[1]
+local processing = KEYS[2]
+local delayed = KEYS[3]
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local visibility_timeout = tonumber(ARGV[3])
+
+local expired = redis.call("ZRANGEBYSCORE", processing, "-inf", now - visibility_timeout)
+for _, job in ipairs(expired) do
+    redis.call("ZREM", processing, job)
+    redis.call("RPUSH", queue, job)
+end
+local due = redis.call("ZRANGEBYSCORE", delayed, "-inf", now)
+for _, job in ipairs(due) do
+    redis.call("ZREM", delayed, job)
+    redis.call("LPUSH", queue, job)
+end
+
+local jobs = {}
+for i = 1, limit do
+    local job = redis.call("RPOP", queue)
+    if not job then
+        break
+    end
+    redis.call("ZADD", processing, now, job)
+    jobs[i] = job
+end
+return jobs
+"""
+
+# Dead jobs are moved back to the queue with the attempts reset, so every job
+# gets all its attempts again.
+REQUEUE_DEAD_SCRIPT = """
+local dead = KEYS[1]
+local queue = KEYS[2]
+local limit = tonumber(ARGV[1])
+
+local requeued = 0
+while limit < 0 or requeued < limit do
+    local raw = redis.call("RPOP", dead)
+    if not raw then
+        break
+    end
+    local job = cjson.decode(raw)
+    job["attempts"] = 0
+    redis.call("LPUSH", queue, cjson.encode(job))
+    requeued = requeued + 1
+end
+return requeued
+"""
+
+
+class Job:
+    """
+    Job claimed from the queue. The raw value identifies the job in Redis. The
+    handler sets the retry delay of the job which failed because a dependency
+    is unavailable, such job is retried after the delay without taking an attempt.
+    """
+
+    def __init__(self, raw: bytes | str):
+        data = json.loads(raw)
+        self.raw = raw
+        self.id: str = data["id"]
+        self.payload: Any = data["payload"]
+        self.attempts: int = data["attempts"]
+        self.retry_after: float | None = None
+
+
+class JobQueue:
+    """
+    Durable Redis-backed job queue. Pending jobs are kept in a list, claimed jobs
+    in a processing set until they are completed, failed jobs wait for the retry
+    in a delayed set and jobs that exhausted their attempts are moved to the dead
+    letter list.
+    """
+
+    def __init__(
+        self,
+        r: Redis,
+        name: str,
+        visibility_timeout: float = settings.job_visibility_timeout_seconds,
+        max_attempts: int = settings.job_max_attempts,
+        retry_base_delay: float = settings.job_retry_base_delay_seconds,
+        retry_max_delay: float = settings.job_retry_max_delay_seconds,
+    ):
+        self.r = r
+        self.name = name
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.queue_key = f"jobs:{name}:queue"
+        self.processing_key = f"jobs:{name}:processing"
+        self.delayed_key = f"jobs:{name}:delayed"
+        self.dead_key = f"jobs:{name}:dead"
+        self.stats_key = f"jobs:{name}:stats"
+
+    @staticmethod
+    def _dump_job(payload: Any, attempts: int = 0, job_id: str | None = None) -> str:
+        """
+        Method serializes the job.
+
+        :param payload: Job payload.
+        :type payload: Any.
+        :param attempts: Number of failed attempts.
+        :type attempts: int.
+        :param job_id: Job identifier, a new one is generated if not passed.
+        :type job_id: str | None.
+        :return: Serialized job.
+        :rtype: str.
+        """
+        return json.dumps(
+            {"id": job_id or uuid.uuid4().hex, "payload": payload, "attempts": attempts}
+        )
+
+    async def enqueue(self, payloads: list[Any]) -> None:
+        """
+        Method adds jobs to the queue.
+
+        :param payloads: Payloads of the jobs.
+        :type payloads: list[Any].
+        :return: None.
+        :rtype: None.
+        """
+        if payloads:
+            await self.r.lpush(
+                self.queue_key, *(self._dump_job(payload) for payload in payloads)
+            )
+
+    async def claim(self, limit: int) -> list[Job]:
+        """
+        Method moves up to the limit of jobs from the queue to the processing set.
+
+        :param limit: The maximum number of jobs to claim.
+        :type limit: int.
+        :return: Claimed jobs.
+        :rtype: list[Job].
+        """
+        script = self.r.register_script(CLAIM_SCRIPT)
+        jobs = await script(
+            keys=[self.queue_key, self.processing_key, self.delayed_key],
+            args=[time.time(), limit, self.visibility_timeout],
+        )
+        return [Job(raw) for raw in jobs]
+
+    async def complete(self, jobs: list[Job]) -> None:
+        """
+        Method removes the processed jobs from the processing set.
+
+        :param jobs: Processed jobs.
+        :type jobs: list[Job].
+        :return: None.
+        :rtype: None.
+        """
+        if not jobs:
+            return
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.processing_key, *(job.raw for job in jobs))
+            pipe.hincrby(self.stats_key, "completed", len(jobs))
+            await pipe.execute()
+
+    def get_retry_delay(self, attempts: int) -> float:
+        """
+        Method returns the exponential backoff delay before the next attempt.
+
+        :param attempts: Number of failed attempts.
+        :type attempts: int.
+        :return: Delay in seconds.
+        :rtype: float.
+        """
+        return get_backoff_delay(attempts, self.retry_base_delay, self.retry_max_delay)
+
+    async def fail(self, jobs: list[Job]) -> None:
+        """
+        Method schedules the failed jobs for the retry with backoff or moves them
+        to the dead letter list when all attempts are exhausted. The jobs with the
+        retry delay are postponed by the delay and keep their attempts.
+
+        :param jobs: Failed jobs.
+        :type jobs: list[Job].
+        :return: None.
+        :rtype: None.
+        """
+        if not jobs:
+            return
+        now = time.time()
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.processing_key, *(job.raw for job in jobs))
+            for job in jobs:
+                if job.retry_after is not None:
+                    postponed_job = self._dump_job(job.payload, job.attempts, job.id)
+                    pipe.zadd(self.delayed_key, {postponed_job: now + job.retry_after})
+                    pipe.hincrby(self.stats_key, "postponed", 1)
+                    continue
+                attempts = job.attempts + 1
+                failed_job = self._dump_job(job.payload, attempts, job.id)
+                if attempts >= self.max_attempts:
+                    pipe.lpush(self.dead_key, failed_job)
+                    pipe.hincrby(self.stats_key, "dead", 1)
+                else:
+                    pipe.zadd(
+                        self.delayed_key,
+                        {failed_job: now + self.get_retry_delay(attempts)},
+                    )
+                    pipe.hincrby(self.stats_key, "retried", 1)
+            await pipe.execute()
+
+    async def requeue_dead(self, limit: int | None = None) -> int:
+        """
+        Method moves the jobs from the dead letter list back to the queue, the
+        oldest first. The requeued jobs get all their attempts again.
+
+        :param limit: The maximum number of jobs to requeue, all if not passed.
+        :type limit: int | None.
+        :return: Number of requeued jobs.
+        :rtype: int.
+        """
+        script = self.r.register_script(REQUEUE_DEAD_SCRIPT)
+        return int(
+            await script(
+                keys=[self.dead_key, self.queue_key],
+                args=[-1 if limit is None else limit],
+            )
+        )
+
+    async def get_metrics(self) -> dict:
+        """
+        Method returns the queue depth and the processed jobs counters.
+
+        :return: Queue metrics.
+        :rtype: dict.
+        """
+        async with self.r.pipeline(transaction=False) as pipe:
+            pipe.llen(self.queue_key)
+            pipe.zcard(self.processing_key)
+            pipe.zcard(self.delayed_key)
+            pipe.llen(self.dead_key)
+            pipe.hgetall(self.stats_key)
+            pending, processing, delayed, dead_letter, stats = await pipe.execute()
+        stats = {key.decode() if isinstance(key, bytes) else key: int(value)
+                 for key, value in stats.items()}
+        return {
+            "pending": pending,
+            "processing": processing,
+            "delayed": delayed,
+            "dead_letter": dead_letter,
+            "completed": stats.get("completed", 0),
+            "retried": stats.get("retried", 0),
+            "postponed": stats.get("postponed", 0),
+            "dead": stats.get("dead", 0),
+        }
+
+
+class JobWorker:
+    """
+    Background task that claims jobs by batches and passes them to the handler.
+    The handler returns the jobs that failed, they are retried with backoff.
+    When the storage is unavailable the whole batch is postponed until the
+    circuit breaker lets the calls through again.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[list[Job]], Awaitable[list[Job]]],
+        batch_size: int,
+        poll_interval: float = settings.job_poll_interval_seconds,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    async def process_batch(self) -> int:
+        """
+        Method claims and processes one batch of jobs.
+
+        :return: Number of claimed jobs.
+        :rtype: int.
+        """
+        jobs = await self.queue.claim(self.batch_size)
+        if not jobs:
+            return 0
+        try:
+            failed_jobs = await self.handler(jobs)
+        except StorageUnavailableError as e:
+            for job in jobs:
+                job.retry_after = e.retry_after
+            failed_jobs = jobs
+        except Exception:
+            logger.exception("Jobs of the '%s' queue failed", self.queue.name)
+            failed_jobs = jobs
+        failed_ids = {job.id for job in failed_jobs}
+        await self.queue.complete([job for job in jobs if job.id not in failed_ids])
+        await self.queue.fail(failed_jobs)
+        return len(jobs)
+
+    async def run(self) -> None:
+        """
+        Method processes jobs until the worker is stopped. The queue is polled
+        when it's empty.
+
+        :return: None.
+        :rtype: None.
+        """
+        while not self._stopping.is_set():
+            try:
+                claimed = await self.process_batch()
+            except Exception:
+                logger.exception("Worker of the '%s' queue failed", self.queue.name)
+                claimed = 0
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self._stopping.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        """
+        Method starts the worker in the background.
+
+        :return: None.
+        :rtype: None.
+        """
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Method stops the worker after the current batch is processed.
+
+        :return: None.
+        :rtype: None.
+        """
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
@@ -0,0 +1,233 @@
+import asyncio
+import os
+import shutil
+import uuid
+from functools import partial
+from pathlib import Path
+
+from fastapi import UploadFile
+from redis.asyncio import Redis
+from sqlalchemy import update
+from starlette.concurrency import run_in_threadpool
+
+from src.conf.config import settings
+from src.database.db import SessionLocal
+from src.database.models.photo import Photo
+from src.enums import PhotoStatus
+from src.services.job_queue import Job, JobQueue, JobWorker
+from src.services.storage_jobs import enqueue_storage_deletion
+from src.storage.circuit_breaker import StorageUnavailableError
+from src.storage.client import get_storage
+
+PHOTO_UPLOAD_QUEUE = "photo_upload"
+
+_photo_upload_worker: JobWorker | None = None
+
+
+def get_photo_upload_queue_name() -> str:
+    """
+    Method returns the name of the queue of the photo uploads spooled on this
+    node. The spool is kept on the local disk, so the uploads are queued per
+    node unless the nodes share the spool directory and the node name.
+
+    :return: Name of the queue.
+    :rtype: str.
+    """
+    return f"{PHOTO_UPLOAD_QUEUE}:{settings.upload_spool_node}"
+
+
+def get_spool_path(spool_name: str) -> Path:
+    """
+    Method returns the path of the spooled file.
+
+    :param spool_name: Name of the spooled file.
+    :type spool_name: str.
+    :return: Path of the file.
+    :rtype: Path.
+    """
+    return Path(settings.upload_spool_dir) / spool_name
+
+
+def _copy_to_spool(file: UploadFile, spool_path: Path) -> None:
+    """
+    Method copies the uploaded file to the spool.
+
+    :param file: Uploaded file.
+    :type file: UploadFile.
+    :param spool_path: Path of the spooled file.
+    :type spool_path: Path.
+    :return: None.
+    :rtype: None.
+    """
+    spool_path.parent.mkdir(parents=True, exist_ok=True)
+    file.file.seek(0)
+    with open(spool_path, "wb") as spool_file:
+        shutil.copyfileobj(file.file, spool_file)
+
+
+async def spool_upload(file: UploadFile) -> str:
+    """
+    Method keeps the uploaded file on the local disk until it's uploaded to the
+    storage in the background.
+
+    :param file: Uploaded file.
+    :type file: UploadFile.
+    :return: Name of the spooled file.
+    :rtype: str.
+    """
+    spool_name = uuid.uuid4().hex
+    await run_in_threadpool(_copy_to_spool, file, get_spool_path(spool_name))
+    return spool_name
+
+
+def remove_spooled_file(spool_name: str) -> None:
+    """
+    Method removes the spooled file if it exists.
+
+    :param spool_name: Name of the spooled file.
+    :type spool_name: str.
+    :return: None.
+    :rtype: None.
+    """
+    try:
+        os.remove(get_spool_path(spool_name))
+    except FileNotFoundError:
+        pass
+
+
+async def enqueue_photo_upload(
+    photo_id: int, public_id: str, spool_name: str, r: Redis
+) -> None:
+    """
+    Method enqueues the upload of the spooled photo file to the storage.
+
+    :param photo_id: Identifier of the pending photo.
+    :type photo_id: int.
+    :param public_id: Public identifier of the photo in the storage.
+    :type public_id: str.
+    :param spool_name: Name of the spooled file.
+    :type spool_name: str.
+    :param r: Redis instance.
+    :type r: redis.asyncio.Redis.
+    :return: None.
+    :rtype: None.
+    """
+    await JobQueue(r, get_photo_upload_queue_name()).enqueue(
+        [{"photo_id": photo_id, "public_id": public_id, "spool_name": spool_name}]
+    )
+
+
+def _finish_photo_upload(photo_id: int, photo_url: str | None) -> bool:
+    """
+    Method sets the URL of the pending photo and marks it as ready, or marks it
+    as failed if the URL isn't passed.
+
+    :param photo_id: Identifier of the pending photo.
+    :type photo_id: int.
+    :param photo_url: URL of the uploaded photo.
+    :type photo_url: str | None.
+    :return: False if the photo was deleted while it was uploaded.
+    :rtype: bool.
+    """
+    values = (
+        {
+            "url": photo_url,
+            "public_id": get_storage().get_public_id_from_url(photo_url),
+            "status": PhotoStatus.READY.value,
+        }
+        if photo_url
+        else {"status": PhotoStatus.FAILED.value}
+    )
+    with SessionLocal() as db:
+        result = db.execute(
+            update(Photo)
+            .where(Photo.id == photo_id, Photo.status == PhotoStatus.PENDING.value)
+            .values(**values)
+        )
+        db.commit()
+    return result.rowcount > 0
+
+
+async def _upload_spooled_photo(job: Job, r: Redis) -> bool:
+    """
+    Method uploads the spooled photo file to the storage and completes the photo.
+    Transient storage errors and a missing spooled file, e.g. not yet visible
+    on the shared spool, are retried, other errors fail the photo. While the
+    storage is unavailable the upload is postponed without taking an attempt.
+
+    :param job: Job with the photo identifier, public identifier and spooled
+    file name as payload.
+    :type job: Job.
+    :param r: Redis instance.
+    :type r: redis.asyncio.Redis.
+    :return: False if the upload should be retried.
+    :rtype: bool.
+    """
+    photo_id = job.payload["photo_id"]
+    public_id = job.payload["public_id"]
+    spool_name = job.payload["spool_name"]
+    storage = get_storage()
+    try:
+        with open(get_spool_path(spool_name), "rb") as spool_file:
+            photo_url = await storage.upload_async(spool_file, public_id=public_id)
+    except StorageUnavailableError as e:
+        job.retry_after = e.retry_after
+        return False
+    except Exception as e:
+        is_retryable = isinstance(e, FileNotFoundError) or storage.is_transient_error(e)
+        if is_retryable and job.attempts + 1 < settings.job_max_attempts:
+            return False
+        photo_url = None
+    if not await run_in_threadpool(_finish_photo_upload, photo_id, photo_url):
+        if photo_url:
+            await enqueue_storage_deletion(public_ids=[public_id], r=r)
+    remove_spooled_file(spool_name)
+    return True
+
+
+async def upload_spooled_photos(jobs: list[Job], r: Redis) -> list[Job]:
+    """
+    Method uploads the spooled photo files of the jobs concurrently.
+
+    :param jobs: Photo upload jobs.
+    :type jobs: list[Job].
+    :param r: Redis instance.
+    :type r: redis.asyncio.Redis.
+    :return: Jobs to retry.
+    :rtype: list[Job].
+    """
+    results = await asyncio.gather(*(_upload_spooled_photo(job, r) for job in jobs))
+    return [job for job, is_done in zip(jobs, results) if not is_done]
+
+
+def start_photo_upload_worker(r: Redis) -> JobWorker:
+    """
+    Method starts the background worker that uploads the spooled photo files.
+    Called once on the application startup.
+
+    :param r: Redis instance.
+    :type r: redis.asyncio.Redis.
+    :return: Worker.
+    :rtype: JobWorker.
+    """
+    global _photo_upload_worker
+    _photo_upload_worker = JobWorker(
+        queue=JobQueue(r, get_photo_upload_queue_name()),
+        handler=partial(upload_spooled_photos, r=r),
+        batch_size=settings.upload_max_concurrency,
+    )
+    _photo_upload_worker.start()
+    return _photo_upload_worker
+
+
+async def stop_photo_upload_worker() -> None:
+    """
+    Method stops the background worker that uploads the spooled photo files.
+
+    :return: None.
+    :rtype: None.
+    """
+    global _photo_upload_worker
+    if _photo_upload_worker is not None:
+        await _photo_upload_worker.stop()
+        _photo_upload_worker = None
@@ -0,0 +1,221 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from src.conf.config import settings
+
+
+class ProcessPoolBusyError(Exception):
+    """
+    Raised without submitting the job while the queue of the process pool is full.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__("Process pool is busy")
+        self.retry_after = retry_after
+
+
+def _run_timed(func: Callable[..., Any], *args: Any) -> tuple[Any, float, float]:
+    """
+    Method calls the function in the worker process and measures the call.
+
+    :param func: Module level function.
+    :type func: Callable[..., Any].
+    :param args: Positional arguments of the function.
+    :type args: Any.
+    :return: Result of the function, the wall-clock time the call started at and
+        the duration of the call.
+    :rtype: tuple[Any, float, float].
+    """
+    started_at = time.time()
+    started = time.perf_counter()
+    result = func(*args)
+    return result, started_at, time.perf_counter() - started
+
+
+class ProcessPoolRunner:
+    """
+    Runner of CPU-bound jobs in worker processes, so the jobs neither block the
+    event loop nor hold the GIL of the API process. The number of jobs submitted
+    and not finished is bounded: when all workers are busy and the queue depth
+    is reached new jobs are rejected until some jobs finish. Jobs run in the
+    thread pool of the process until the worker processes are started, e.g. in
+    scripts and tests.
+    """
+
+    def __init__(self, max_workers: int | None = None, max_queue_depth: int = 32):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue_depth = max_queue_depth
+        self.pending = 0
+        self.stats = {
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+            "execution_seconds_total": 0.0,
+            "execution_seconds_max": 0.0,
+        }
+        self._executor: ProcessPoolExecutor | None = None
+
+    def start(self) -> None:
+        """
+        Method starts the worker processes. Called once on the application startup.
+
+        :return: None.
+        :rtype: None.
+        """
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def close(self) -> None:
+        """
+        Method stops the worker processes, the queued jobs are cancelled.
+
+        :return: None.
+        :rtype: None.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _get_retry_after(self) -> float:
+        """
+        Method estimates the number of seconds the submitted jobs take to finish.
+
+        :return: Number of seconds.
+        :rtype: float.
+        """
+        if not self.stats["completed"]:
+            return 1
+        average_execution = self.stats["execution_seconds_total"] / self.stats[
+            "completed"
+        ]
+        return average_execution * self.pending / self.max_workers
+
+    def _record(self, queue_wait: float, execution: float) -> None:
+        """
+        Method records the finished job.
+
+        :param queue_wait: Number of seconds the job waited for a worker.
+        :type queue_wait: float.
+        :param execution: Number of seconds the job was executed.
+        :type execution: float.
+        :return: None.
+        :rtype: None.
+        """
+        self.stats["completed"] += 1
+        self.stats["queue_wait_seconds_total"] += queue_wait
+        self.stats["queue_wait_seconds_max"] = max(
+            self.stats["queue_wait_seconds_max"], queue_wait
+        )
+        self.stats["execution_seconds_total"] += execution
+        self.stats["execution_seconds_max"] = max(
+            self.stats["execution_seconds_max"], execution
+        )
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Method runs the function in a worker process. The function, the arguments
+        and the result are pickled, so the function has to be defined on the
+        module level.
+
+        :param func: Module level function.
+        :type func: Callable[..., Any].
+        :param args: Positional arguments of the function.
+        :type args: Any.
+        :return: Result of the function.
+        :rtype: Any.
+        :raises ProcessPoolBusyError: If the queue of the pool is full.
+        """
+        if self.pending >= self.max_workers + self.max_queue_depth:
+            self.stats["rejected"] += 1
+            raise ProcessPoolBusyError(self._get_retry_after())
+        self.pending += 1
+        submitted_at = time.time()
+        try:
+            if self._executor is None:
+                result, started_at, execution = await run_in_threadpool(
+                    _run_timed, func, *args
+                )
+            else:
+                loop = asyncio.get_running_loop()
+                result, started_at, execution = await loop.run_in_executor(
+                    self._executor, _run_timed, func, *args
+                )
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self.pending -= 1
+        self._record(max(started_at - submitted_at, 0), execution)
+        return result
+
+    def get_metrics(self) -> dict:
+        """
+        Method returns the size of the pool, the number of the submitted jobs and
+        the jobs counters.
+
+        :return: Process pool metrics.
+        :rtype: dict.
+        """
+        return {
+            "workers": self.max_workers,
+            "max_queue_depth": self.max_queue_depth,
+            "pending": self.pending,
+            "queued": max(self.pending - self.max_workers, 0),
+            **self.stats,
+        }
+
+
+_pool: ProcessPoolRunner | None = None
+
+
+def get_process_pool() -> ProcessPoolRunner:
+    """
+    Method returns the process pool runner, creating it if it wasn't done on
+    startup. The worker processes aren't started by this method.
+
+    :return: Process pool runner.
+    :rtype: ProcessPoolRunner.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolRunner(
+            max_workers=settings.process_pool_workers,
+            max_queue_depth=settings.process_pool_max_queue_depth,
+        )
+    return _pool
+
+
+def init_process_pool() -> ProcessPoolRunner:
+    """
+    Method starts the worker processes of the process pool runner. Called once
+    on the application startup.
+
+    :return: Process pool runner.
+    :rtype: ProcessPoolRunner.
+    """
+    pool = get_process_pool()
+    pool.start()
+    return pool
+
+
+def close_process_pool() -> None:
+    """
+    Method stops the worker processes of the process pool runner.
+
+    :return: None.
+    :rtype: None.
+    """
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
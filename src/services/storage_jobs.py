@@ -0,0 +1,73 @@
+from redis.asyncio import Redis
+
+from src.conf.config import settings
+from src.services.job_queue import Job, JobQueue, JobWorker
+from src.storage.client import get_storage
+
+STORAGE_DELETE_QUEUE = "storage_delete"
+# Statuses of the storage delete result which mean the file is gone.
+DELETED_STATUSES = ("deleted", "not_found")
+
+_storage_delete_worker: JobWorker | None = None
+
+
+async def enqueue_storage_deletion(public_ids: list[str], r: Redis) -> None:
+    """
+    Method enqueues the stored files for the deletion in the background.
+
+    :param public_ids: Public identifiers of the stored files.
+    :type public_ids: list[str].
+    :param r: Redis instance.
+    :type r: redis.asyncio.Redis.
+    :return: None.
+    :rtype: None.
+    """
+    await JobQueue(r, STORAGE_DELETE_QUEUE).enqueue(public_ids)
+
+
+async def delete_stored_files(jobs: list[Job]) -> list[Job]:
+    """
+    Method deletes the stored files of the jobs with a single storage call.
+
+    :param jobs: Jobs with public identifiers of the files as payloads.
+    :type jobs: list[Job].
+    :return: Jobs which files weren't deleted.
+    :rtype: list[Job].
+    """
+    public_ids = list({job.payload for job in jobs})
+    result = await get_storage().delete_resources_async(public_ids)
+    deleted = result.get("deleted", {})
+    return [job for job in jobs if deleted.get(job.payload) not in DELETED_STATUSES]
+
+
+def start_storage_delete_worker(r: Redis) -> JobWorker:
+    """
+    Method starts the background worker that deletes the stored files. Called
+    once on the application startup.
+
+    :param r: Redis instance.
+    :type r: redis.asyncio.Redis.
+    :return: Worker.
+    :rtype: JobWorker.
+    """
+    global _storage_delete_worker
+    _storage_delete_worker = JobWorker(
+        queue=JobQueue(r, STORAGE_DELETE_QUEUE),
+        handler=delete_stored_files,
+        batch_size=settings.storage_delete_batch_size,
+    )
+    _storage_delete_worker.start()
+    return _storage_delete_worker
+
+
+async def stop_storage_delete_worker() -> None:
+    """
+    Method stops the background worker that deletes the stored files.
+
+    :return: None.
+    :rtype: None.
+    """
+    global _storage_delete_worker
+    if _storage_delete_worker is not None:
+        await _storage_delete_worker.stop()
+        _storage_delete_worker = None
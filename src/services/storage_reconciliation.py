@@ -0,0 +1,192 @@
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.conf.config import settings
+from src.database.db import SessionLocal
+from src.database.models.photo import Photo
+from src.storage.base import StorageBackend
+from src.storage.client import get_storage
+
+PHOTOS_PREFIX = "PhotoShareApp/"
+
+ORPHANED_FILE = "orphaned_file"
+MISSING_FILE = "missing_file"
+# Orphaned files younger than the minimum age and the deleted orphaned files.
+SKIPPED_FILE = "skipped_file"
+DELETED_FILE = "deleted_file"
+
+
+def get_db_public_ids(db: Session, batch_size: int = 1000) -> Iterator[str]:
+    """
+    Method streams public identifiers of the photo files referenced by the DB,
+    sorted by code points, through a server-side cursor.
+
+    :param db: DB session object.
+    :type db: Session.
+    :param batch_size: Number of rows fetched from the cursor at once.
+    :type batch_size: int.
+    :return: Public identifiers.
+    :rtype: Iterator[str].
+    """
+    query = (
+        select(Photo.public_id)
+        .where(Photo.public_id.is_not(None))
+        .order_by(Photo.public_id.collate("C"))
+        .execution_options(yield_per=batch_size)
+    )
+    yield from db.scalars(query)
+
+
+def _iter_unique(
+    items: Iterable[tuple[str, datetime | None]], source: str
+) -> Iterator[tuple[str, datetime | None]]:
+    """
+    Method skips items with repeated public identifiers of the sorted sequence
+    and checks it's sorted, as the merge of unsorted sequences would report wrong
+    differences.
+
+    :param items: Public identifiers with the upload time, sorted.
+    :type items: Iterable[tuple[str, datetime | None]].
+    :param source: Name of the sequence used in the error message.
+    :type source: str.
+    :return: Items with unique public identifiers.
+    :rtype: Iterator[tuple[str, datetime | None]].
+    """
+    previous = None
+    for item in items:
+        if previous is not None and item[0] <= previous:
+            if item[0] == previous:
+                continue
+            raise ValueError(
+                f"{source} isn't sorted: '{item[0]}' follows '{previous}'"
+            )
+        previous = item[0]
+        yield item
+
+
+def diff_sorted(
+    storage_resources: Iterable[tuple[str, datetime]], db_public_ids: Iterable[str]
+) -> Iterator[tuple[str, str, datetime | None]]:
+    """
+    Method merges the sorted storage listing with the sorted DB public identifiers
+    keeping a single item of each sequence in memory.
+
+    :param storage_resources: Public identifiers of the stored files with their
+    upload time, sorted by the public identifier.
+    :type storage_resources: Iterable[tuple[str, datetime]].
+    :param db_public_ids: Public identifiers referenced by the DB, sorted.
+    :type db_public_ids: Iterable[str].
+    :return: Kind of the difference, the public identifier and the upload time
+    of the file if it's stored.
+    :rtype: Iterator[tuple[str, str, datetime | None]].
+    """
+    stored = _iter_unique(storage_resources, "Storage listing")
+    referenced = _iter_unique(
+        ((public_id, None) for public_id in db_public_ids), "DB public identifiers"
+    )
+    stored_item = next(stored, None)
+    referenced_item = next(referenced, None)
+    while stored_item is not None or referenced_item is not None:
+        if referenced_item is None or (
+            stored_item is not None and stored_item[0] < referenced_item[0]
+        ):
+            yield ORPHANED_FILE, *stored_item
+            stored_item = next(stored, None)
+        elif stored_item is None or referenced_item[0] < stored_item[0]:
+            yield MISSING_FILE, *referenced_item
+            referenced_item = next(referenced, None)
+        else:
+            stored_item = next(stored, None)
+            referenced_item = next(referenced, None)
+
+
+def reconcile(
+    storage: StorageBackend,
+    db: Session,
+    delete_orphans: bool = False,
+    min_age: timedelta = timedelta(hours=1),
+    batch_size: int = settings.storage_delete_batch_size,
+) -> Iterator[tuple[str, str]]:
+    """
+    Method finds the stored photo files no photo refers to and the photos which
+    files are missing in the storage, optionally deleting the orphaned files.
+    Files younger than the minimum age are skipped, as they may belong to uploads
+    which aren't saved to the DB yet. The differences are yielded while the
+    storage listing is merged with the DB, the orphaned files are deleted by
+    batches as they are found.
+
+    :param storage: Storage client.
+    :type storage: StorageBackend.
+    :param db: DB session object.
+    :type db: Session.
+    :param delete_orphans: Whether to delete the orphaned files.
+    :type delete_orphans: bool.
+    :param min_age: The minimum age of the orphaned file to delete it.
+    :type min_age: timedelta.
+    :param batch_size: Number of files deleted with a single storage call.
+    :type batch_size: int.
+    :return: Kind of the difference and the public identifier, the skipped and
+        the deleted files are yielded too.
+    :rtype: Iterator[tuple[str, str]].
+    """
+    uploaded_before = datetime.now(timezone.utc) - min_age
+    to_delete = []
+    for kind, public_id, uploaded_at in diff_sorted(
+        storage.list_resources(PHOTOS_PREFIX), get_db_public_ids(db)
+    ):
+        if kind == ORPHANED_FILE and uploaded_at > uploaded_before:
+            yield SKIPPED_FILE, public_id
+            continue
+        yield kind, public_id
+        if kind == ORPHANED_FILE and delete_orphans:
+            to_delete.append(public_id)
+            if len(to_delete) >= batch_size:
+                storage.delete_resources(to_delete)
+                yield from ((DELETED_FILE, deleted) for deleted in to_delete)
+                to_delete = []
+    if to_delete:
+        storage.delete_resources(to_delete)
+        yield from ((DELETED_FILE, deleted) for deleted in to_delete)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Find stored photo files no photo refers to and photos "
+        "which files are missing in the storage."
+    )
+    parser.add_argument(
+        "--delete", action="store_true", help="delete the orphaned files"
+    )
+    parser.add_argument(
+        "--min-age-minutes",
+        type=int,
+        default=60,
+        help="skip files uploaded less than this number of minutes ago",
+    )
+    args = parser.parse_args()
+
+    counts = dict.fromkeys(
+        (ORPHANED_FILE, MISSING_FILE, DELETED_FILE, SKIPPED_FILE), 0
+    )
+    db = SessionLocal()
+    try:
+        for kind, public_id in reconcile(
+            storage=get_storage(),
+            db=db,
+            delete_orphans=args.delete,
+            min_age=timedelta(minutes=args.min_age_minutes),
+        ):
+            counts[kind] += 1
+            if kind in (ORPHANED_FILE, MISSING_FILE):
+                print(f"{kind}\t{public_id}")
+    finally:
+        db.close()
+    print(", ".join(f"{kind}: {count}" for kind, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Callable
+
+from src.services.process_pool import close_process_pool, init_process_pool
+from src.storage.base import StorageBackend
+from src.storage.client import get_storage
+from src.utils.image_transform import is_transformation_supported, transform_image
+
+BENCHMARK_PREFIX = "PhotoShareApp/benchmark"
+
+
+def _measure(func: Callable[[], object], repeat: int) -> list[float]:
+    """
+    Method measures the duration of the calls in seconds.
+
+    :param func: Measured call.
+    :type func: Callable[[], object].
+    :param repeat: Number of calls.
+    :type repeat: int.
+    :return: Durations of the calls.
+    :rtype: list[float].
+    """
+    durations = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started_at)
+    return durations
+
+
+async def _measure_pool(
+    data: bytes, transformation: list[dict], repeat: int
+) -> list[float]:
+    """
+    Method measures the duration of the transformations in the worker processes
+    of the local engine, including the transfer of the image to the worker.
+
+    :param data: Encoded image.
+    :type data: bytes.
+    :param transformation: Transformation layers.
+    :type transformation: list[dict].
+    :param repeat: Number of transformations.
+    :type repeat: int.
+    :return: Durations of the transformations.
+    :rtype: list[float].
+    """
+    pool = init_process_pool()
+    try:
+        # The first call starts the worker process, it isn't measured.
+        await pool.run(transform_image, data, transformation)
+        durations = []
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            await pool.run(transform_image, data, transformation)
+            durations.append(time.perf_counter() - started_at)
+        return durations
+    finally:
+        close_process_pool()
+
+
+def benchmark(
+    storage: StorageBackend, photo_url: str, transformation: list[dict], repeat: int
+) -> dict[str, list[float]]:
+    """
+    Method compares the local engine with the transformation by the storage.
+    The download of the source image and the local engine in the process and in
+    the worker pool are measured separately, the storage is measured uploading
+    the transformed image, the uploaded images are deleted afterwards.
+
+    :param storage: Storage client.
+    :type storage: StorageBackend.
+    :param photo_url: URL of the source image.
+    :type photo_url: str.
+    :param transformation: Transformation layers.
+    :type transformation: list[dict].
+    :param repeat: Number of measured calls of every path.
+    :type repeat: int.
+    :return: Durations of the calls by the path.
+    :rtype: dict[str, list[float]].
+    """
+    data = storage.download(photo_url)
+    results = {
+        "download": _measure(lambda: storage.download(photo_url), repeat),
+        "local": _measure(lambda: transform_image(data, transformation), repeat),
+        "local_pool": asyncio.run(_measure_pool(data, transformation, repeat)),
+    }
+    public_ids = []
+
+    def upload_remote() -> None:
+        public_ids.append(f"{BENCHMARK_PREFIX}/{uuid.uuid4()}")
+        storage.upload(
+            photo_url, public_id=public_ids[-1], transformation=transformation
+        )
+
+    try:
+        results["remote"] = _measure(upload_remote, repeat)
+    finally:
+        if public_ids:
+            storage.delete_resources(public_ids)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the local transform engine with the transformation "
+        "by the photo storage."
+    )
+    parser.add_argument("photo_url", help="URL of the source image")
+    parser.add_argument("--effect", help="effect, e.g. sepia")
+    parser.add_argument("--angle", type=int, help="rotation angle")
+    parser.add_argument("--crop", help="crop mode, e.g. fill")
+    parser.add_argument("--gravity", help="crop gravity, e.g. center")
+    parser.add_argument("--width", type=int, help="width in pixels")
+    parser.add_argument("--height", type=int, help="height in pixels")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="number of measured calls of every path"
+    )
+    args = parser.parse_args()
+
+    layer = {
+        param: getattr(args, param)
+        for param in ("effect", "angle", "crop", "gravity", "width", "height")
+        if getattr(args, param) is not None
+    }
+    transformation = [layer]
+    if not is_transformation_supported(transformation):
+        parser.error("Transformation isn't supported by the local engine")
+
+    results = benchmark(get_storage(), args.photo_url, transformation, args.repeat)
+    for path, durations in results.items():
+        print(
+            f"{path}\tmedian: {statistics.median(durations) * 1000:.1f} ms, "
+            f"min: {min(durations) * 1000:.1f} ms, "
+            f"max: {max(durations) * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
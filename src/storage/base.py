@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import asyncio
+import urllib.request
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Iterator
+
+from starlette.concurrency import run_in_threadpool
+
+from src.storage.circuit_breaker import CircuitBreaker
+from src.utils.backoff import get_backoff_delay
+
+
+class StorageBackend(ABC):
+    """
+    Interface of the photo storage. Implementations keep images under public
+    identifiers like 'PhotoShareApp/{user_name}/{unique_name}' and return URLs
+    the images are served from.
+    """
+
+    # Whether the storage applies transformations itself. Photos of the storages
+    # that don't are transformed with the local engine.
+    supports_transformations = True
+
+    def __init__(
+        self,
+        upload_max_concurrency: int = 4,
+        upload_timeout: float = 60,
+        call_timeout: float = 10,
+        retry_attempts: int = 3,
+        retry_base_delay: float = 0.2,
+        retry_max_delay: float = 2,
+        circuit_breaker: CircuitBreaker | None = None,
+    ):
+        self.upload_timeout = upload_timeout
+        self.call_timeout = call_timeout
+        self.retry_attempts = retry_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._upload_semaphore = asyncio.Semaphore(upload_max_concurrency)
+
+    def init(self) -> None:
+        """
+        Method prepares the storage for usage. Called once on the application startup.
+
+        :return: None.
+        :rtype: None.
+        """
+
+    def close(self) -> None:
+        """
+        Method releases resources held by the storage.
+
+        :return: None.
+        :rtype: None.
+        """
+
+    @abstractmethod
+    def upload(self, file: BinaryIO | str, public_id: str, **options: Any) -> str:
+        """
+        Method stores a file or an image available by URL under the public identifier.
+
+        :param file: File object or URL of the image to upload.
+        :type file: BinaryIO | str.
+        :param public_id: Public identifier of the uploaded asset.
+        :type public_id: str.
+        :param options: Additional upload options, e.g. transformation.
+        :type options: Any.
+        :return: URL of the stored image.
+        :rtype: str.
+        """
+
+    @abstractmethod
+    def delete_resources(self, public_ids: list[str]) -> dict:
+        """
+        Method deletes stored images.
+
+        :param public_ids: Public identifiers of the images.
+        :type public_ids: list[str].
+        :return: Delete result.
+        :rtype: dict.
+        """
+
+    @abstractmethod
+    def sign_upload(self, public_id: str, expires_in: int) -> dict:
+        """
+        Method creates signed parameters that allow the client to upload an image
+        with the public identifier directly to the storage.
+
+        :param public_id: Public identifier of the image to upload.
+        :type public_id: str.
+        :param expires_in: Number of seconds the parameters are valid for.
+        :type expires_in: int.
+        :return: Upload URL and form fields to send with the file.
+        :rtype: dict.
+        """
+
+    @abstractmethod
+    def get_resource_url(self, public_id: str) -> str | None:
+        """
+        Method returns the URL of the stored image by its public identifier.
+
+        :param public_id: Public identifier of the image.
+        :type public_id: str.
+        :return: URL of the image or None if the image isn't stored.
+        :rtype: str | None.
+        """
+
+    @abstractmethod
+    def get_transformed_url(self, photo_url: str, transformation: list[dict]) -> str:
+        """
+        Method returns the URL the stored image is delivered by with the
+        transformation applied, without storing a transformed copy.
+
+        :param photo_url: URL of the stored image.
+        :type photo_url: str.
+        :param transformation: Transformation layers.
+        :type transformation: list[dict].
+        :return: URL of the transformed image.
+        :rtype: str.
+        """
+
+    @abstractmethod
+    def list_resources(self, prefix: str) -> Iterator[tuple[str, datetime]]:
+        """
+        Method lists the stored images which public identifiers start with the
+        prefix page by page. The images are ordered by the public identifier
+        compared by code points, so the listing can be merged with other sorted
+        sequences.
+
+        :param prefix: Prefix of the public identifiers.
+        :type prefix: str.
+        :return: Public identifiers of the images and their upload time in UTC.
+        :rtype: Iterator[tuple[str, datetime]].
+        """
+
+    def download(self, photo_url: str, max_bytes: int | None = None) -> bytes:
+        """
+        Method returns the content of the stored image.
+
+        :param photo_url: URL of the stored image.
+        :type photo_url: str.
+        :param max_bytes: The maximum number of bytes to read, one byte more is
+            read so the caller can tell the image is larger. The whole image is
+            read if not passed.
+        :type max_bytes: int | None.
+        :return: Content of the image.
+        :rtype: bytes.
+        """
+        with urllib.request.urlopen(photo_url, timeout=self.call_timeout) as response:
+            return response.read() if max_bytes is None else response.read(max_bytes + 1)
+
+    def get_public_id_from_url(self, photo_url: str) -> str:
+        """
+        Method returns the public identifier of the image stored by the URL.
+
+        :param photo_url: URL of the stored image.
+        :type photo_url: str.
+        :return: Public identifier of the image.
+        :rtype: str.
+        """
+        parts = photo_url.split("/")
+        index = parts.index("PhotoShareApp")
+        parts = parts[index:]
+        parts[-1] = parts[-1].split(".")[0]
+        return "/".join(parts)
+
+    def is_transient_error(self, error: Exception) -> bool:
+        """
+        Method checks whether the error means the storage is unavailable rather
+        than the request is wrong. Only transient errors are retried and counted
+        by the circuit breaker.
+
+        :param error: Error raised by the storage call.
+        :type error: Exception.
+        :return: True if the error is transient.
+        :rtype: bool.
+        """
+        # TimeoutError is an OSError only since Python 3.11.
+        return isinstance(error, (OSError, asyncio.TimeoutError))
+
+    @staticmethod
+    async def _start_call(
+        func: Callable[..., Any],
+        *args: Any,
+        semaphore: asyncio.Semaphore | None = None,
+        **kwargs: Any,
+    ) -> asyncio.Future:
+        """
+        Method starts the storage method in the thread pool. The thread can't be
+        stopped, so the returned future completes only when the thread finishes
+        and the semaphore slot is held until then, even if the caller stops
+        waiting for the result.
+
+        :param func: Storage method.
+        :type func: Callable[..., Any].
+        :param args: Positional arguments of the method.
+        :type args: Any.
+        :param semaphore: Semaphore bounding the number of running calls.
+        :type semaphore: asyncio.Semaphore | None.
+        :param kwargs: Keyword arguments of the method.
+        :type kwargs: Any.
+        :return: Future of the result of the method.
+        :rtype: asyncio.Future.
+        """
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            call = asyncio.ensure_future(run_in_threadpool(func, *args, **kwargs))
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+
+        def _on_done(future: asyncio.Future) -> None:
+            if semaphore is not None:
+                semaphore.release()
+            # The result of the abandoned call is never awaited.
+            if not future.cancelled():
+                future.exception()
+
+        call.add_done_callback(_on_done)
+        return call
+
+    async def _call(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        timeout: float,
+        idempotent: bool = False,
+        semaphore: asyncio.Semaphore | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Method calls the storage in the thread pool, so the event loop isn't
+        blocked. The call is limited by the timeout and guarded by the circuit
+        breaker, idempotent calls are retried on transient errors with backoff.
+
+        :param func: Storage method.
+        :type func: Callable[..., Any].
+        :param args: Positional arguments of the method.
+        :type args: Any.
+        :param timeout: The maximum duration of a single attempt.
+        :type timeout: float.
+        :param idempotent: Whether the call is safe to retry.
+        :type idempotent: bool.
+        :param semaphore: Semaphore bounding the number of running calls.
+        :type semaphore: asyncio.Semaphore | None.
+        :param kwargs: Keyword arguments of the method.
+        :type kwargs: Any.
+        :return: Result of the method.
+        :rtype: Any.
+        :raises StorageUnavailableError: If the circuit breaker is open.
+        :raises asyncio.TimeoutError: If the call took longer than the timeout.
+        """
+        attempts = self.retry_attempts if idempotent else 1
+        for attempt in range(1, attempts + 1):
+            self.circuit_breaker.before_call()
+            try:
+                call = await self._start_call(
+                    func, *args, semaphore=semaphore, **kwargs
+                )
+                # The shield keeps the call future running after the timeout,
+                # so it completes along with the thread.
+                result = await asyncio.wait_for(asyncio.shield(call), timeout=timeout)
+            except Exception as e:
+                if not self.is_transient_error(e):
+                    self.circuit_breaker.record_success()
+                    raise
+                self.circuit_breaker.record_failure()
+                if attempt == attempts:
+                    raise
+                await asyncio.sleep(
+                    get_backoff_delay(
+                        attempt, self.retry_base_delay, self.retry_max_delay
+                    )
+                )
+            else:
+                self.circuit_breaker.record_success()
+                return result
+
+    async def upload_async(
+        self,
+        file: BinaryIO | str,
+        public_id: str,
+        timeout: float | None = None,
+        **options: Any,
+    ) -> str:
+        """
+        Method uploads a file without blocking the event loop. The number of
+        simultaneous uploads is bounded and every upload is limited by the upload
+        timeout. An upload that timed out keeps its slot until its thread
+        finishes. Uploads aren't retried, as the file may be partially consumed.
+
+        :param file: File object or URL of the image to upload.
+        :type file: BinaryIO | str.
+        :param public_id: Public identifier of the uploaded asset.
+        :type public_id: str.
+        :param timeout: Timeout of the upload, the upload timeout if not passed.
+        :type timeout: float | None.
+        :param options: Additional upload options, e.g. transformation.
+        :type options: Any.
+        :return: URL of the stored image.
+        :rtype: str.
+        :raises StorageUnavailableError: If the circuit breaker is open.
+        :raises asyncio.TimeoutError: If the upload took longer than the timeout.
+        """
+        return await self._call(
+            self.upload,
+            file,
+            public_id,
+            timeout=timeout or self.upload_timeout,
+            semaphore=self._upload_semaphore,
+            **options,
+        )
+
+    async def delete_resources_async(self, public_ids: list[str]) -> dict:
+        """
+        Method deletes stored images without blocking the event loop, retrying
+        on transient errors.
+
+        :param public_ids: Public identifiers of the images.
+        :type public_ids: list[str].
+        :return: Delete result.
+        :rtype: dict.
+        :raises StorageUnavailableError: If the circuit breaker is open.
+        """
+        return await self._call(
+            self.delete_resources,
+            public_ids,
+            timeout=self.call_timeout,
+            idempotent=True,
+        )
+
+    async def download_async(
+        self, photo_url: str, max_bytes: int | None = None
+    ) -> bytes:
+        """
+        Method returns the content of the stored image without blocking the
+        event loop, retrying on transient errors.
+
+        :param photo_url: URL of the stored image.
+        :type photo_url: str.
+        :param max_bytes: The maximum number of bytes to read, one byte more is
+            read so the caller can tell the image is larger. The whole image is
+            read if not passed.
+        :type max_bytes: int | None.
+        :return: Content of the image.
+        :rtype: bytes.
+        :raises StorageUnavailableError: If the circuit breaker is open.
+        """
+        return await self._call(
+            self.download,
+            photo_url,
+            max_bytes,
+            timeout=self.upload_timeout,
+            idempotent=True,
+        )
+
+    async def get_resource_url_async(self, public_id: str) -> str | None:
+        """
+        Method returns the URL of the stored image without blocking the event
+        loop, retrying on transient errors.
+
+        :param public_id: Public identifier of the image.
+        :type public_id: str.
+        :return: URL of the image or None if the image isn't stored.
+        :rtype: str | None.
+        :raises StorageUnavailableError: If the circuit breaker is open.
+        """
+        return await self._call(
+            self.get_resource_url,
+            public_id,
+            timeout=self.call_timeout,
+            idempotent=True,
+        )
@@ -0,0 +1,101 @@
+import time
+
+from src.enums import CircuitState
+
+
+class StorageUnavailableError(Exception):
+    """
+    Raised without calling the storage while the circuit breaker is open.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__("Storage is temporarily unavailable")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of the storage calls. After the number of consecutive
+    failures reaches the threshold the circuit opens and calls fail fast until
+    the recovery timeout passes. Then a limited number of trial calls is let
+    through: a success closes the circuit, a failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30,
+        half_open_max_calls: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def before_call(self) -> None:
+        """
+        Method checks whether the call is allowed.
+
+        :return: None.
+        :rtype: None.
+        :raises StorageUnavailableError: If the circuit is open.
+        """
+        if self.state == CircuitState.OPEN:
+            retry_after = self.opened_at + self.recovery_timeout - time.monotonic()
+            if retry_after > 0:
+                self.stats["rejected"] += 1
+                raise StorageUnavailableError(retry_after)
+            self.state = CircuitState.HALF_OPEN
+            self.half_open_calls = 0
+        if self.state == CircuitState.HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.stats["rejected"] += 1
+                raise StorageUnavailableError(self.recovery_timeout)
+            self.half_open_calls += 1
+
+    def record_success(self) -> None:
+        """
+        Method records the successful call and closes the circuit.
+
+        :return: None.
+        :rtype: None.
+        """
+        self.stats["successes"] += 1
+        self.consecutive_failures = 0
+        self.state = CircuitState.CLOSED
+
+    def record_failure(self) -> None:
+        """
+        Method records the failed call and opens the circuit when the threshold
+        is reached or the trial call failed.
+
+        :return: None.
+        :rtype: None.
+        """
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        if (
+            self.state == CircuitState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != CircuitState.OPEN:
+                self.stats["opened"] += 1
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+    def get_metrics(self) -> dict:
+        """
+        Method returns the circuit state and the calls counters.
+
+        :return: Circuit breaker metrics.
+        :rtype: dict.
+        """
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            **self.stats,
+        }
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from src.conf.config import settings
+from src.enums import StorageBackendName
+from src.storage.base import StorageBackend
+from src.storage.circuit_breaker import CircuitBreaker
+from src.storage.cloudinary_storage import CloudinaryStorage
+from src.storage.local_storage import LocalStorage
+
+_storage: StorageBackend | None = None
+
+
+def init_storage() -> StorageBackend:
+    """
+    Method initiates the storage selected in the settings. Called once on the
+    application startup.
+
+    :return: Storage client.
+    :rtype: StorageBackend.
+    """
+    global _storage
+    upload_options = {
+        "upload_max_concurrency": settings.upload_max_concurrency,
+        "upload_timeout": settings.upload_timeout_seconds,
+        "call_timeout": settings.storage_call_timeout_seconds,
+        "retry_attempts": settings.storage_retry_attempts,
+        "retry_base_delay": settings.storage_retry_base_delay_seconds,
+        "retry_max_delay": settings.storage_retry_max_delay_seconds,
+        "circuit_breaker": CircuitBreaker(
+            failure_threshold=settings.storage_circuit_failure_threshold,
+            recovery_timeout=settings.storage_circuit_recovery_seconds,
+        ),
+    }
+    if settings.storage_backend == StorageBackendName.LOCAL:
+        _storage = LocalStorage(
+            root=settings.local_storage_root,
+            base_url=settings.local_storage_base_url,
+            signing_secret=settings.secret_key,
+            **upload_options,
+        )
+    else:
+        _storage = CloudinaryStorage(
+            cloud_name=settings.cloudinary_name,
+            api_key=settings.cloudinary_api_key,
+            api_secret=settings.cloudinary_api_secret,
+            pool_maxsize=settings.cloudinary_pool_maxsize,
+            **upload_options,
+        )
+    _storage.init()
+    return _storage
+
+
+def get_storage() -> StorageBackend:
+    """
+    Method returns the storage client, initiating it if it wasn't done on startup.
+
+    :return: Storage client.
+    :rtype: StorageBackend.
+    """
+    if _storage is None:
+        return init_storage()
+    return _storage
+
+
+def close_storage() -> None:
+    """
+    Method closes the storage client connections.
+
+    :return: None.
+    :rtype: None.
+    """
+    global _storage
+    if _storage is not None:
+        _storage.close()
+        _storage = None
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import re
+import time
+from datetime import datetime
+from typing import Any, BinaryIO, Iterator
+
+import cloudinary
+import cloudinary.api
+import cloudinary.search
+import cloudinary.uploader
+import cloudinary.utils
+import cloudinary.api_client.call_api as cloudinary_call_api
+import cloudinary.exceptions
+from cloudinary.api_client.tcp_keep_alive_manager import TCPKeepAlivePoolManager
+
+from src.storage.base import StorageBackend
+
+# Prefixes of the uploader errors raised when the request didn't reach the API
+# or the API didn't respond properly, the uploader doesn't use distinct types.
+UPLOADER_TRANSIENT_ERRORS = (
+    "Unexpected error",
+    "Socket error",
+    "Error parsing server response",
+)
+
+
+# The transformation of the delivery URL goes before the optional version and the
+# public identifier of the image.
+PUBLIC_ID_PATH_PATTERN = re.compile(r"(/v\d+)?/PhotoShareApp/")
+
+
+class CloudinaryStorage(StorageBackend):
+    """
+    Cloudinary client that is configured once and shares a keep-alive connection
+    pool between all upload, transformation and delete calls.
+    """
+
+    def __init__(
+        self,
+        cloud_name: str,
+        api_key: str,
+        api_secret: str,
+        pool_maxsize: int = 10,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.cloud_name = cloud_name
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.pool_maxsize = pool_maxsize
+        self._http: TCPKeepAlivePoolManager | None = None
+
+    def init(self) -> None:
+        """
+        Method configures the Cloudinary SDK and installs the connection pool.
+        The SDK creates its pool managers at import time with a single connection
+        per host, so they are replaced with one pool sized for concurrent calls.
+
+        :return: None.
+        :rtype: None.
+        """
+        cloudinary.config(
+            cloud_name=self.cloud_name,
+            api_key=self.api_key,
+            api_secret=self.api_secret,
+            secure=True,
+        )
+        self._http = TCPKeepAlivePoolManager(
+            maxsize=self.pool_maxsize, **cloudinary.CERT_KWARGS
+        )
+        cloudinary.uploader._http = self._http
+        cloudinary_call_api._http = self._http
+
+    def close(self) -> None:
+        """
+        Method closes all pooled connections.
+
+        :return: None.
+        :rtype: None.
+        """
+        if self._http is not None:
+            self._http.clear()
+
+    def upload(self, file: BinaryIO | str, public_id: str, **options: Any) -> str:
+        """
+        Method uploads a file or a remote URL to Cloudinary.
+
+        :param file: File object or URL of the image to upload.
+        :type file: BinaryIO | str.
+        :param public_id: Public identifier of the uploaded asset.
+        :type public_id: str.
+        :param options: Additional upload options, e.g. transformation.
+        :type options: Any.
+        :return: URL of the uploaded image.
+        :rtype: str.
+        """
+        upload_result = cloudinary.uploader.upload(
+            file,
+            public_id=public_id,
+            timeout=self.upload_timeout,
+            return_error=True,
+            **options,
+        )
+        if "error" in upload_result:
+            error = upload_result["error"]
+            if error.get("http_code") == 429 or error.get("http_code", 0) >= 500:
+                raise cloudinary.exceptions.GeneralError(error["message"])
+            raise cloudinary.exceptions.Error(error["message"])
+        return upload_result["secure_url"]
+
+    def delete_resources(self, public_ids: list[str]) -> dict:
+        """
+        Method deletes uploaded images from Cloudinary.
+
+        :param public_ids: Public identifiers of the images.
+        :type public_ids: list[str].
+        :return: Delete result.
+        :rtype: dict.
+        """
+        return cloudinary.api.delete_resources(
+            public_ids,
+            resource_type="image",
+            type="upload",
+            timeout=self.call_timeout,
+        )
+
+    def is_transient_error(self, error: Exception) -> bool:
+        """
+        Method checks whether the error means Cloudinary is unavailable: the
+        connection failed, the server failed or the rate limit is exceeded.
+
+        :param error: Error raised by the Cloudinary call.
+        :type error: Exception.
+        :return: True if the error is transient.
+        :rtype: bool.
+        """
+        if isinstance(
+            error,
+            (cloudinary.exceptions.GeneralError, cloudinary.exceptions.RateLimited),
+        ):
+            return True
+        if isinstance(error, cloudinary.exceptions.Error):
+            return str(error).startswith(UPLOADER_TRANSIENT_ERRORS)
+        return super().is_transient_error(error)
+
+    def sign_upload(self, public_id: str, expires_in: int) -> dict:
+        """
+        Method creates signed parameters for the direct upload to Cloudinary.
+        Cloudinary accepts the signature for an hour after the timestamp,
+        shorter lifetimes are enforced on the upload confirmation.
+
+        :param public_id: Public identifier of the image to upload.
+        :type public_id: str.
+        :param expires_in: Number of seconds the parameters are valid for.
+        :type expires_in: int.
+        :return: Upload URL and form fields to send with the file.
+        :rtype: dict.
+        """
+        params = {
+            "public_id": public_id,
+            "timestamp": int(time.time()),
+            "allowed_formats": "jpg,png",
+        }
+        signature = cloudinary.utils.api_sign_request(params, self.api_secret)
+        return {
+            "upload_url": cloudinary.utils.cloudinary_api_url(
+                "upload", resource_type="image", cloud_name=self.cloud_name
+            ),
+            "fields": {**params, "api_key": self.api_key, "signature": signature},
+        }
+
+    def get_resource_url(self, public_id: str) -> str | None:
+        """
+        Method returns the URL of the image uploaded to Cloudinary.
+
+        :param public_id: Public identifier of the image.
+        :type public_id: str.
+        :return: URL of the image or None if the image isn't uploaded.
+        :rtype: str | None.
+        """
+        try:
+            resource = cloudinary.api.resource(
+                public_id,
+                resource_type="image",
+                type="upload",
+                timeout=self.call_timeout,
+            )
+        except cloudinary.exceptions.NotFound:
+            return None
+        return resource["secure_url"]
+
+    def get_transformed_url(self, photo_url: str, transformation: list[dict]) -> str:
+        """
+        Method returns the delivery URL of the image with the transformation,
+        Cloudinary derives the transformed image on the first request. The
+        transformation is chained to the transformations already in the URL.
+
+        :param photo_url: URL of the stored image.
+        :type photo_url: str.
+        :param transformation: Transformation layers.
+        :type transformation: list[dict].
+        :return: URL of the transformed image.
+        :rtype: str.
+        """
+        transformation_string, _ = cloudinary.utils.generate_transformation_string(
+            transformation=transformation
+        )
+        index = PUBLIC_ID_PATH_PATTERN.search(photo_url).start()
+        return f"{photo_url[:index]}/{transformation_string}{photo_url[index:]}"
+
+    def list_resources(
+        self, prefix: str, page_size: int = 500
+    ) -> Iterator[tuple[str, datetime]]:
+        """
+        Method lists the images uploaded to Cloudinary which public identifiers
+        start with the prefix using the Search API, that returns the images sorted
+        by the public identifier page by page.
+
+        :param prefix: Prefix of the public identifiers.
+        :type prefix: str.
+        :param page_size: Number of images requested at once.
+        :type page_size: int.
+        :return: Public identifiers of the images and their upload time in UTC.
+        :rtype: Iterator[tuple[str, datetime]].
+        """
+        next_cursor = None
+        while True:
+            search = (
+                cloudinary.search.Search()
+                .expression(f"resource_type:image AND public_id:{prefix}*")
+                .sort_by("public_id", "asc")
+                .max_results(page_size)
+            )
+            if next_cursor:
+                search = search.next_cursor(next_cursor)
+            result = search.execute(timeout=self.call_timeout)
+            for resource in result.get("resources", []):
+                # fromisoformat doesn't accept the 'Z' suffix before Python 3.11.
+                yield (
+                    resource["public_id"],
+                    datetime.fromisoformat(
+                        resource["created_at"].replace("Z", "+00:00")
+                    ),
+                )
+            next_cursor = result.get("next_cursor")
+            if not next_cursor:
+                return
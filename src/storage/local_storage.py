@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+from src.storage.base import StorageBackend
+from src.utils.image_transform import is_transformation_supported, transform_image
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _guess_extension(header: bytes) -> str:
+    """
+    Method guesses the file extension by the first bytes of the image.
+
+    :param header: First bytes of the file.
+    :type header: bytes.
+    :return: File extension.
+    :rtype: str.
+    """
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    return "bin"
+
+
+class LocalStorage(StorageBackend):
+    """
+    Content-addressed filesystem storage. Every distinct content is written once
+    to 'blobs/' under its SHA-256 and hard-linked to 'refs/{public_id}.{ext}',
+    so identical images share the disk space and are served directly by path.
+    """
+
+    supports_transformations = False
+
+    def __init__(self, root: str, base_url: str, signing_secret: str, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+        self.signing_secret = signing_secret
+        self.blobs_dir = self.root / "blobs"
+        self.refs_dir = self.root / "refs"
+        self._lock = threading.Lock()
+
+    def init(self) -> None:
+        """
+        Method creates the storage directories.
+
+        :return: None.
+        :rtype: None.
+        """
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.refs_dir.mkdir(parents=True, exist_ok=True)
+
+    def get_path(self, file_path: str) -> Path | None:
+        """
+        Method returns the path of the stored file by its relative path in the URL.
+
+        :param file_path: Path of the file relative to the storage base URL.
+        :type file_path: str.
+        :return: Path of the file or None if it doesn't exist.
+        :rtype: Path | None.
+        """
+        path = (self.refs_dir / file_path).resolve()
+        if not path.is_relative_to(self.refs_dir) or not path.is_file():
+            return None
+        return path
+
+    def _open_source(self, file: BinaryIO | str) -> BinaryIO:
+        """
+        Method opens the image passed as a file object, a local URL or a remote URL.
+
+        :param file: File object or URL of the image.
+        :type file: BinaryIO | str.
+        :return: File object.
+        :rtype: BinaryIO.
+        """
+        if not isinstance(file, str):
+            return file
+        if file.startswith(f"{self.base_url}/"):
+            path = self.get_path(file[len(self.base_url) + 1:])
+            if path is None:
+                raise FileNotFoundError(f"File {file} doesn't exist in the storage")
+            return open(path, "rb")
+        return urllib.request.urlopen(file, timeout=self.upload_timeout)
+
+    def download(self, photo_url: str, max_bytes: int | None = None) -> bytes:
+        """
+        Method returns the content of the image stored in the local storage or
+        available by a remote URL.
+
+        :param photo_url: URL of the image.
+        :type photo_url: str.
+        :param max_bytes: The maximum number of bytes to read, one byte more is
+            read so the caller can tell the image is larger. The whole image is
+            read if not passed.
+        :type max_bytes: int | None.
+        :return: Content of the image.
+        :rtype: bytes.
+        """
+        with self._open_source(photo_url) as source:
+            return source.read() if max_bytes is None else source.read(max_bytes + 1)
+
+    def _write_temp_file(self, source: BinaryIO) -> tuple[str, str, str]:
+        """
+        Method streams the source to a temporary file while hashing it.
+
+        :param source: File object.
+        :type source: BinaryIO.
+        :return: Temporary file path, SHA-256 of the content and the file extension.
+        :rtype: tuple[str, str, str].
+        """
+        hasher = hashlib.sha256()
+        header = b""
+        fd, tmp_path = tempfile.mkstemp(dir=self.blobs_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                while chunk := source.read(CHUNK_SIZE):
+                    if not header:
+                        header = chunk[:16]
+                    hasher.update(chunk)
+                    tmp_file.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path, hasher.hexdigest(), _guess_extension(header)
+
+    def _get_blob_path(self, ref_path: Path) -> Path:
+        """
+        Method returns the blob path the reference is linked to.
+
+        :param ref_path: Path of the reference.
+        :type ref_path: Path.
+        :return: Path of the blob.
+        :rtype: Path.
+        """
+        hasher = hashlib.sha256()
+        with open(ref_path, "rb") as ref_file:
+            while chunk := ref_file.read(CHUNK_SIZE):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        return self.blobs_dir / digest[:2] / digest
+
+    def upload(self, file: BinaryIO | str, public_id: str, **options: Any) -> str:
+        """
+        Method stores a file or an image available by URL under the public identifier.
+        The transformation is applied with the local engine, other upload
+        options are ignored.
+
+        :param file: File object or URL of the image to upload.
+        :type file: BinaryIO | str.
+        :param public_id: Public identifier of the uploaded asset.
+        :type public_id: str.
+        :param options: Additional upload options, e.g. transformation.
+        :type options: Any.
+        :return: URL of the stored image.
+        :rtype: str.
+        :raises ValueError: If the transformation isn't supported by the local engine.
+        """
+        transformation = options.get("transformation")
+        if transformation:
+            if not is_transformation_supported(transformation):
+                raise ValueError("Transformation isn't supported by the local engine")
+            with self._open_source(file) as source:
+                data = source.read()
+            file = BytesIO(transform_image(data, transformation))
+        source = self._open_source(file)
+        try:
+            tmp_path, digest, extension = self._write_temp_file(source)
+        finally:
+            if source is not file:
+                source.close()
+
+        blob_path = self.blobs_dir / digest[:2] / digest
+        ref_path = self.refs_dir / f"{public_id}.{extension}"
+        ref_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_ref_path = ref_path.with_name(f".{uuid.uuid4().hex}")
+        with self._lock:
+            if blob_path.exists():
+                os.remove(tmp_path)
+            else:
+                blob_path.parent.mkdir(exist_ok=True)
+                os.replace(tmp_path, blob_path)
+            os.link(blob_path, tmp_ref_path)
+            os.replace(tmp_ref_path, ref_path)
+        return f"{self.base_url}/{public_id}.{extension}"
+
+    def delete_resources(self, public_ids: list[str]) -> dict:
+        """
+        Method deletes stored images. The content is removed from the disk when
+        no other public identifier references it.
+
+        :param public_ids: Public identifiers of the images.
+        :type public_ids: list[str].
+        :return: Delete result.
+        :rtype: dict.
+        """
+        deleted = {}
+        with self._lock:
+            for public_id in public_ids:
+                ref_dir, name = os.path.split(public_id)
+                ref_paths = list((self.refs_dir / ref_dir).glob(f"{name}.*"))
+                for ref_path in ref_paths:
+                    blob_path = self._get_blob_path(ref_path)
+                    os.remove(ref_path)
+                    if blob_path.exists() and blob_path.stat().st_nlink == 1:
+                        os.remove(blob_path)
+                deleted[public_id] = "deleted" if ref_paths else "not_found"
+        return {"deleted": deleted}
+
+    def _get_signature(self, public_id: str, expires: int) -> str:
+        """
+        Method signs the public identifier together with the expiration timestamp.
+
+        :param public_id: Public identifier of the image.
+        :type public_id: str.
+        :param expires: Expiration timestamp.
+        :type expires: int.
+        :return: Signature.
+        :rtype: str.
+        """
+        return hmac.new(
+            self.signing_secret.encode(),
+            f"{public_id}:{expires}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+
+    def sign_upload(self, public_id: str, expires_in: int) -> dict:
+        """
+        Method creates signed parameters for the direct upload to the local storage.
+
+        :param public_id: Public identifier of the image to upload.
+        :type public_id: str.
+        :param expires_in: Number of seconds the parameters are valid for.
+        :type expires_in: int.
+        :return: Upload URL and form fields to send with the file.
+        :rtype: dict.
+        """
+        expires = int(time.time()) + expires_in
+        return {
+            "upload_url": f"{self.base_url}/{public_id}",
+            "fields": {
+                "expires": expires,
+                "signature": self._get_signature(public_id, expires),
+            },
+        }
+
+    def verify_upload_signature(
+        self, public_id: str, expires: int, signature: str
+    ) -> bool:
+        """
+        Method verifies the signed parameters of the direct upload.
+
+        :param public_id: Public identifier of the image to upload.
+        :type public_id: str.
+        :param expires: Expiration timestamp.
+        :type expires: int.
+        :param signature: Signature.
+        :type signature: str.
+        :return: True if the signature is valid and isn't expired.
+        :rtype: bool.
+        """
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(signature, self._get_signature(public_id, expires))
+
+    def get_resource_url(self, public_id: str) -> str | None:
+        """
+        Method returns the URL of the image kept in the local storage.
+
+        :param public_id: Public identifier of the image.
+        :type public_id: str.
+        :return: URL of the image or None if the image isn't stored.
+        :rtype: str | None.
+        """
+        ref_dir, name = os.path.split(public_id)
+        for ref_path in (self.refs_dir / ref_dir).glob(f"{name}.*"):
+            return f"{self.base_url}/{ref_path.relative_to(self.refs_dir).as_posix()}"
+        return None
+
+    def get_transformed_url(self, photo_url: str, transformation: list[dict]) -> str:
+        """
+        Method isn't supported, the local storage serves the stored files only
+        and can't deliver transformed images.
+
+        :param photo_url: URL of the stored image.
+        :type photo_url: str.
+        :param transformation: Transformation layers.
+        :type transformation: list[dict].
+        :return: URL of the transformed image.
+        :rtype: str.
+        :raises ValueError: Always.
+        """
+        raise ValueError("Transformation URLs aren't supported by the local storage")
+
+    def _iter_refs(self, ref_dir: Path) -> Iterator[tuple[str, datetime]]:
+        """
+        Method walks the references directory depth-first in the order of the
+        public identifiers. A directory is ordered as its name followed by '/',
+        the prefix all public identifiers inside it share.
+
+        :param ref_dir: Directory to walk.
+        :type ref_dir: Path.
+        :return: Public identifiers of the images and their upload time in UTC.
+        :rtype: Iterator[tuple[str, datetime]].
+        """
+        entries = []
+        with os.scandir(ref_dir) as scanned_entries:
+            for entry in scanned_entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    entries.append((f"{entry.name}/", entry))
+                else:
+                    entries.append((entry.name.split(".")[0], entry))
+        entries.sort(key=lambda item: item[0])
+        prefix = ref_dir.relative_to(self.refs_dir).as_posix()
+        for name, entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._iter_refs(Path(entry.path))
+                continue
+            yield (
+                f"{prefix}/{name}",
+                datetime.fromtimestamp(entry.stat().st_mtime, tz=timezone.utc),
+            )
+
+    def list_resources(self, prefix: str) -> Iterator[tuple[str, datetime]]:
+        """
+        Method lists the images kept in the local storage which public identifiers
+        start with the prefix.
+
+        :param prefix: Prefix of the public identifiers.
+        :type prefix: str.
+        :return: Public identifiers of the images and their upload time in UTC.
+        :rtype: Iterator[tuple[str, datetime]].
+        """
+        ref_dir = self.refs_dir / prefix.split("/")[0]
+        if not ref_dir.is_dir():
+            return
+        for public_id, uploaded_at in self._iter_refs(ref_dir):
+            if public_id.startswith(prefix):
+                yield public_id, uploaded_at
@@ -0,0 +1,19 @@
+import random
+
+
+def get_backoff_delay(attempts: int, base_delay: float, max_delay: float) -> float:
+    """
+    Method returns the exponential backoff delay with a jitter, so the retries
+    of many clients don't hit the service at the same moment.
+
+    :param attempts: Number of failed attempts.
+    :type attempts: int.
+    :param base_delay: Delay after the first failed attempt.
+    :type base_delay: float.
+    :param max_delay: The maximum delay.
+    :type max_delay: float.
+    :return: Delay in seconds.
+    :rtype: float.
+    """
+    delay = min(base_delay * 2 ** (attempts - 1), max_delay)
+    return random.uniform(delay / 2, delay)
@@ -0,0 +1,132 @@
+from io import BytesIO
+
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+
+# Effects, crops and gravities which give the same result as the storage does.
+# Face detection and content-aware gravity aren't reproducible locally.
+LOCAL_EFFECTS = ("sepia", "vignette", "sharpen")
+LOCAL_CROPS = ("fill", "scale", "pad")
+LOCAL_GRAVITIES = ("center", "south")
+LAYER_PARAMS = ("effect", "angle", "crop", "gravity", "width", "height")
+
+# Sepia tone as the RGB conversion matrix.
+SEPIA_MATRIX = (
+    0.393, 0.769, 0.189, 0,
+    0.349, 0.686, 0.168, 0,
+    0.272, 0.534, 0.131, 0,
+)
+VIGNETTE_STRENGTH = 0.6
+PAD_COLOR = (255, 255, 255)
+
+
+def is_transformation_supported(transformation: list[dict]) -> bool:
+    """
+    Method checks whether the local engine can apply the transformation.
+
+    :param transformation: Transformation layers.
+    :type transformation: list[dict].
+    :return: True if every layer is supported.
+    :rtype: bool.
+    """
+    for layer in transformation:
+        if any(param not in LAYER_PARAMS for param in layer):
+            return False
+        if layer.get("effect") not in (None, *LOCAL_EFFECTS):
+            return False
+        if layer.get("crop") not in (None, *LOCAL_CROPS):
+            return False
+        is_cropped = layer.get("crop") == "fill" and layer.get("width") and layer.get(
+            "height"
+        )
+        if is_cropped and layer.get("gravity") not in (None, *LOCAL_GRAVITIES):
+            return False
+    return True
+
+
+def _resize(image: Image.Image, layer: dict) -> Image.Image:
+    """
+    Method resizes the image according to the crop mode of the layer. A missing
+    dimension keeps the aspect ratio.
+
+    :param image: Image.
+    :type image: Image.Image.
+    :param layer: Transformation layer.
+    :type layer: dict.
+    :return: Resized image.
+    :rtype: Image.Image.
+    """
+    width, height = layer.get("width"), layer.get("height")
+    if not width and not height:
+        return image
+    crop = layer.get("crop") or "scale"
+    if not width or not height:
+        ratio = width / image.width if width else height / image.height
+        size = (max(round(image.width * ratio), 1), max(round(image.height * ratio), 1))
+        return image.resize(size, Image.LANCZOS)
+    if crop == "fill":
+        centering = (0.5, 1.0) if layer.get("gravity") == "south" else (0.5, 0.5)
+        return ImageOps.fit(image, (width, height), Image.LANCZOS, centering=centering)
+    if crop == "pad":
+        return ImageOps.pad(image, (width, height), Image.LANCZOS, color=PAD_COLOR)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def _vignette(image: Image.Image) -> Image.Image:
+    """
+    Method darkens the image towards the edges.
+
+    :param image: Image.
+    :type image: Image.Image.
+    :return: Image with the vignette.
+    :rtype: Image.Image.
+    """
+    mask = Image.radial_gradient("L").resize(image.size, Image.BILINEAR)
+    mask = mask.point(lambda v: round(255 * (1 - VIGNETTE_STRENGTH * (v / 255) ** 2)))
+    return ImageChops.multiply(image, Image.merge("RGB", (mask, mask, mask)))
+
+
+def _apply_effect(image: Image.Image, effect: str | None) -> Image.Image:
+    """
+    Method applies the effect to the image.
+
+    :param image: Image.
+    :type image: Image.Image.
+    :param effect: Effect name.
+    :type effect: str | None.
+    :return: Image with the effect.
+    :rtype: Image.Image.
+    """
+    if effect == "sepia":
+        return image.convert("RGB", SEPIA_MATRIX)
+    if effect == "vignette":
+        return _vignette(image)
+    if effect == "sharpen":
+        return image.filter(ImageFilter.UnsharpMask(radius=2, percent=150, threshold=3))
+    return image
+
+
+def transform_image(data: bytes, transformation: list[dict]) -> bytes:
+    """
+    Method applies the transformation layers to the encoded image. Every layer
+    resizes the image, applies the effect and rotates the image clockwise by
+    the angle. The image is encoded in its source format, PNG for formats other
+    than JPEG.
+
+    :param data: Encoded image.
+    :type data: bytes.
+    :param transformation: Transformation layers supported by the local engine.
+    :type transformation: list[dict].
+    :return: Encoded transformed image.
+    :rtype: bytes.
+    """
+    with Image.open(BytesIO(data)) as source:
+        image_format = "JPEG" if source.format == "JPEG" else "PNG"
+        image = ImageOps.exif_transpose(source).convert("RGB")
+    for layer in transformation:
+        image = _resize(image, layer)
+        image = _apply_effect(image, layer.get("effect"))
+        if layer.get("angle") and layer["angle"] % 360:
+            image = image.rotate(-layer["angle"], Image.BICUBIC, expand=True)
+    output = BytesIO()
+    image.save(output, format=image_format, quality=90)
+    return output.getvalue()
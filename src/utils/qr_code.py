@@ -1,7 +1,15 @@
+import copy
+from collections import defaultdict
+from functools import lru_cache
+from io import BytesIO
+from types import SimpleNamespace
+
 import qrcode
 from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles.colormasks import QRColorMask
+from qrcode.image.styles.moduledrawers.base import QRModuleDrawer
 
-from src.enums import QrColorMask, QrModuleDrawer
+from src.enums import QrCodeFormat, QrColorMask, QrModuleDrawer
 from qrcode.image.styles.moduledrawers.pil import (
     RoundedModuleDrawer,
     CircleModuleDrawer,
@@ -18,6 +26,10 @@ from qrcode.image.styles.colormasks import (
     VerticalGradiantColorMask,
 )
 
+# Number of QR codes of distinct URLs the process keeps computed.
+QR_CODE_MATRIX_CACHE_SIZE = 1024
+QR_CODE_BORDER = 4
+
 module_drawer_map = {
     QrModuleDrawer.ROUNDED.value: RoundedModuleDrawer,
     QrModuleDrawer.CIRCLE.value: CircleModuleDrawer,
@@ -27,6 +39,23 @@ module_drawer_map = {
     QrModuleDrawer.VERTICAL.value: VerticalBarsDrawer,
 }
 
+qr_code_media_type_map = {
+    QrCodeFormat.JPEG: "image/jpeg",
+    QrCodeFormat.PNG: "image/png",
+    QrCodeFormat.SVG: "image/svg+xml",
+}
+
+qr_code_extension_map = {
+    QrCodeFormat.JPEG: "jpg",
+    QrCodeFormat.PNG: "png",
+    QrCodeFormat.SVG: "svg",
+}
+
+# Share of the module the gapped squares and the bars take, as drawn by the
+# module drawers of the raster images.
+GAPPED_SIZE_RATIO = 0.8
+BARS_SHRINK = 0.8
+
 color_mask_map = {
     QrColorMask.RADIAL.value: RadialGradiantColorMask,
     QrColorMask.SQUARE.value: SquareGradiantColorMask,
@@ -36,6 +65,104 @@ color_mask_map = {
 }
 
 
+# Color masks only hold their colors, so the instances are shared. Module drawers
+# keep the image being drawn, so a new instance is made for every render and
+# the image is released with it.
+_color_masks = {name: color_mask() for name, color_mask in color_mask_map.items()}
+
+
+class QrCodeTooLargeError(ValueError):
+    """
+    Raised without rendering the QR code image larger than the limit.
+    """
+
+    def __init__(self, size: int, max_size: int):
+        super().__init__(size, max_size)
+        self.size = size
+        self.max_size = max_size
+
+    def __str__(self) -> str:
+        return (
+            f"QR code image would be {self.size} pixels wide, "
+            f"the maximum is {self.max_size}"
+        )
+
+
+def _get_module_drawer(module_drawer: QrModuleDrawer) -> QRModuleDrawer:
+    """
+    Method returns a new module drawer instance for a single render.
+
+    :param module_drawer: QR code param that defines the shape of the image.
+    :type module_drawer: QrModuleDrawer.
+    :return: Module drawer.
+    :rtype: QRModuleDrawer.
+    """
+    return module_drawer_map[module_drawer.value]()
+
+
+def _get_color_mask(color_mask: QrColorMask) -> QRColorMask:
+    """
+    Method returns the shared color mask instance.
+
+    :param color_mask: QR code param that defines the color of the image.
+    :type color_mask: QrColorMask.
+    :return: Color mask.
+    :rtype: QRColorMask.
+    """
+    return _color_masks[color_mask.value]
+
+
+@lru_cache(maxsize=QR_CODE_MATRIX_CACHE_SIZE)
+def _make_qr_code(photo_url: str) -> qrcode.QRCode:
+    """
+    Method computes the QR code modules holding the URL. Choosing the version
+    and the mask pattern takes most of the time of small images, so the result
+    is cached by the URL.
+
+    :param photo_url: Photo URL.
+    :type photo_url: str.
+    :return: QR code with the computed modules.
+    :rtype: qrcode.QRCode.
+    """
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_L, border=QR_CODE_BORDER
+    )
+    qr.add_data(photo_url)
+    qr.make(fit=True)
+    return qr
+
+
+def _get_qr_code(photo_url: str, box_size: int) -> qrcode.QRCode:
+    """
+    Method returns the QR code holding the URL with the box size. The computed
+    modules are shared with the cached QR code and aren't changed by rendering.
+
+    :param photo_url: Photo URL.
+    :type photo_url: str.
+    :param box_size: The size of QR code image box.
+    :type box_size: int.
+    :return: QR code.
+    :rtype: qrcode.QRCode.
+    """
+    qr = copy.copy(_make_qr_code(photo_url))
+    qr.box_size = int(box_size)
+    return qr
+
+
+def get_qr_code_image_size(photo_url: str, box_size: int) -> int:
+    """
+    Method returns the width and the height of the QR code image in pixels.
+
+    :param photo_url: Photo URL.
+    :type photo_url: str.
+    :param box_size: The size of QR code image box.
+    :type box_size: int.
+    :return: Size of the image.
+    :rtype: int.
+    """
+    return (_make_qr_code(photo_url).modules_count + QR_CODE_BORDER * 2) * box_size
+
+
 def generate_qr_code(
     photo_url: str,
     module_drawer: QrModuleDrawer,
@@ -56,13 +183,283 @@ def generate_qr_code(
     :return: QR code image.
     :rtype: StyledPilImage.
     """
-    qr = qrcode.QRCode(
-        error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=box_size
-    )
-    qr.add_data(photo_url)
-    img = qr.make_image(
+    img = _get_qr_code(photo_url, box_size).make_image(
         image_factory=StyledPilImage,
-        module_drawer=module_drawer_map[module_drawer.value](),
-        color_mask=color_mask_map[color_mask.value](),
+        module_drawer=_get_module_drawer(module_drawer),
+        color_mask=_get_color_mask(color_mask),
     )
     return img
+
+
+def _format_number(number: float) -> str:
+    """
+    Method formats the coordinate of the SVG path.
+
+    :param number: Coordinate.
+    :type number: float.
+    :return: Shortest representation of the coordinate.
+    :rtype: str.
+    """
+    return f"{number:g}"
+
+
+def _get_rect_path(
+    x: float,
+    y: float,
+    width: float,
+    height: float,
+    radii: tuple[tuple[float, float], ...] = ((0, 0),) * 4,
+) -> str:
+    """
+    Method returns the SVG path of the rectangle with elliptic corners.
+
+    :param x: Left coordinate.
+    :type x: float.
+    :param y: Top coordinate.
+    :type y: float.
+    :param width: Width.
+    :type width: float.
+    :param height: Height.
+    :type height: float.
+    :param radii: Horizontal and vertical radii of the top left, top right,
+        bottom right and bottom left corners.
+    :type radii: tuple[tuple[float, float], ...].
+    :return: SVG path data.
+    :rtype: str.
+    """
+    n = _format_number
+    top_left, top_right, bottom_right, bottom_left = radii
+    path = [f"M{n(x + top_left[0])} {n(y)}"]
+    # Sides fully taken by the rounded corners have no straight segment.
+    if width > top_left[0] + top_right[0]:
+        path.append(f"H{n(x + width - top_right[0])}")
+    if top_right[0]:
+        path.append(
+            f"A{n(top_right[0])} {n(top_right[1])} 0 0 1 "
+            f"{n(x + width)} {n(y + top_right[1])}"
+        )
+    if height > top_right[1] + bottom_right[1]:
+        path.append(f"V{n(y + height - bottom_right[1])}")
+    if bottom_right[0]:
+        path.append(
+            f"A{n(bottom_right[0])} {n(bottom_right[1])} 0 0 1 "
+            f"{n(x + width - bottom_right[0])} {n(y + height)}"
+        )
+    if width > bottom_left[0] + bottom_right[0]:
+        path.append(f"H{n(x + bottom_left[0])}")
+    if bottom_left[0]:
+        path.append(
+            f"A{n(bottom_left[0])} {n(bottom_left[1])} 0 0 1 "
+            f"{n(x)} {n(y + height - bottom_left[1])}"
+        )
+    if height > top_left[1] + bottom_left[1]:
+        path.append(f"V{n(y + top_left[1])}")
+    if top_left[0]:
+        path.append(
+            f"A{n(top_left[0])} {n(top_left[1])} 0 0 1 {n(x + top_left[0])} {n(y)}"
+        )
+    return "".join(path) + "Z"
+
+
+def _get_module_path(
+    module_drawer: QrModuleDrawer,
+    matrix: list[list[bool]],
+    row: int,
+    col: int,
+    length: int = 1,
+) -> str:
+    """
+    Method returns the SVG path of the active modules the same shape the module
+    drawer of the raster image draws them. Horizontally contiguous modules are
+    drawn as a single shape by the drawers which join them.
+
+    :param module_drawer: QR code param that defines the shape of the image.
+    :type module_drawer: QrModuleDrawer.
+    :param matrix: QR code modules including the border.
+    :type matrix: list[list[bool]].
+    :param row: Row of the first module.
+    :type row: int.
+    :param col: Column of the first module.
+    :type col: int.
+    :param length: Number of contiguous modules in the row.
+    :type length: int.
+    :return: SVG path data.
+    :rtype: str.
+    """
+
+    def is_active(r: int, c: int) -> bool:
+        return 0 <= r < len(matrix) and 0 <= c < len(matrix) and matrix[r][c]
+
+    north, south = is_active(row - 1, col), is_active(row + 1, col)
+    west, east = is_active(row, col - 1), is_active(row, col + length)
+    flat = (0, 0)
+    if module_drawer == QrModuleDrawer.GAPPED:
+        gap = (1 - GAPPED_SIZE_RATIO) / 2
+        return _get_rect_path(
+            col + gap, row + gap, GAPPED_SIZE_RATIO, GAPPED_SIZE_RATIO
+        )
+    if module_drawer == QrModuleDrawer.CIRCLE:
+        return f"M{col} {_format_number(row + 0.5)}a.5 .5 0 1 0 1 0a.5 .5 0 1 0 -1 0Z"
+    if module_drawer == QrModuleDrawer.ROUNDED:
+        round_corner = (0.5, 0.5)
+        return _get_rect_path(
+            col,
+            row,
+            1,
+            1,
+            (
+                flat if north or west else round_corner,
+                flat if north or east else round_corner,
+                flat if south or east else round_corner,
+                flat if south or west else round_corner,
+            ),
+        )
+    if module_drawer == QrModuleDrawer.HORIZONTAL:
+        gap = (1 - BARS_SHRINK) / 2
+        round_end = (0.5, BARS_SHRINK / 2)
+        left, right = flat if west else round_end, flat if east else round_end
+        return _get_rect_path(
+            col, row + gap, length, BARS_SHRINK, (left, right, right, left)
+        )
+    if module_drawer == QrModuleDrawer.VERTICAL:
+        gap = (1 - BARS_SHRINK) / 2
+        round_end = (BARS_SHRINK / 2, 0.5)
+        top, bottom = flat if north else round_end, flat if south else round_end
+        return _get_rect_path(
+            col + gap, row, BARS_SHRINK, 1, (top, top, bottom, bottom)
+        )
+    return _get_rect_path(col, row, length, 1)
+
+
+def _get_svg_color(color: tuple[int, ...]) -> str:
+    """
+    Method returns the SVG representation of the RGB color.
+
+    :param color: RGB color.
+    :type color: tuple[int, ...].
+    :return: Hex color.
+    :rtype: str.
+    """
+    return "#{:02x}{:02x}{:02x}".format(*color[:3])
+
+
+def render_qr_code_svg(
+    photo_url: str,
+    module_drawer: QrModuleDrawer,
+    color_mask: QrColorMask,
+    box_size: int,
+) -> bytes:
+    """
+    Method generates QR code as SVG directly from the QR code modules, without
+    rendering the raster image. Every module is filled with the color the color
+    mask gives the center of the module, modules of the same color make a single
+    path.
+
+    :param photo_url: Photo URL.
+    :type photo_url: str.
+    :param module_drawer: QR code param that defines the shape of the image.
+    :type module_drawer: QrModuleDrawer.
+    :param color_mask: QR code param that defines the color of the image.
+    :type color_mask: QrColorMask.
+    :param box_size: The size of QR code image box.
+    :type box_size: int.
+    :return: Encoded QR code image.
+    :rtype: bytes.
+    """
+    matrix = _get_qr_code(photo_url, box_size).get_matrix()
+    size = len(matrix)
+    mask = _get_color_mask(color_mask)
+    # Color masks compute the color by the pixel position on the image, the
+    # module units give the same relative position.
+    canvas = SimpleNamespace(size=(size, size))
+    is_joined = module_drawer in (QrModuleDrawer.SQUARE, QrModuleDrawer.HORIZONTAL)
+    paths = defaultdict(list)
+    for row in range(size):
+        col = 0
+        while col < size:
+            if not matrix[row][col]:
+                col += 1
+                continue
+            color = mask.get_fg_pixel(canvas, col + 0.5, row + 0.5)
+            length = 1
+            while (
+                is_joined
+                and col + length < size
+                and matrix[row][col + length]
+                and mask.get_fg_pixel(canvas, col + length + 0.5, row + 0.5) == color
+            ):
+                length += 1
+            paths[_get_svg_color(color)].append(
+                _get_module_path(module_drawer, matrix, row, col, length)
+            )
+            col += length
+    pixels = size * box_size
+    svg = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" '
+        f'height="{pixels}" viewBox="0 0 {size} {size}">',
+        f'<rect width="{size}" height="{size}" '
+        f'fill="{_get_svg_color(mask.back_color)}"/>',
+        *(
+            f'<path fill="{color}" d="{"".join(path)}"/>'
+            for color, path in paths.items()
+        ),
+        "</svg>",
+    ]
+    return "".join(svg).encode()
+
+
+def render_qr_code(
+    photo_url: str,
+    module_drawer: QrModuleDrawer,
+    color_mask: QrColorMask,
+    box_size: int,
+    image_format: QrCodeFormat = QrCodeFormat.JPEG,
+    max_size: int | None = None,
+) -> bytes:
+    """
+    Method generates QR code with passed parameters and encodes it in the
+    format. Raster images are rendered pixel by pixel, so the method is run in
+    a worker process. PNG of the solid color QR code is saved in grayscale.
+
+    :param photo_url: Photo URL.
+    :type photo_url: str.
+    :param module_drawer: QR code param that defines the shape of the image.
+    :type module_drawer: QrModuleDrawer.
+    :param color_mask: QR code param that defines the color of the image.
+    :type color_mask: QrColorMask.
+    :param box_size: The size of QR code image box.
+    :type box_size: int.
+    :param image_format: Format of the image.
+    :type image_format: QrCodeFormat.
+    :param max_size: The maximum width of the image in pixels, not limited if not
+        passed.
+    :type max_size: int | None.
+    :return: Encoded QR code image.
+    :rtype: bytes.
+    :raises QrCodeTooLargeError: If the image is larger than the maximum size.
+    """
+    size = get_qr_code_image_size(photo_url, box_size)
+    if max_size is not None and size > max_size:
+        raise QrCodeTooLargeError(size, max_size)
+    if image_format == QrCodeFormat.SVG:
+        return render_qr_code_svg(
+            photo_url=photo_url,
+            module_drawer=module_drawer,
+            color_mask=color_mask,
+            box_size=box_size,
+        )
+    img = generate_qr_code(
+        photo_url=photo_url,
+        module_drawer=module_drawer,
+        color_mask=color_mask,
+        box_size=box_size,
+    )
+    img_bytes = BytesIO()
+    if image_format == QrCodeFormat.PNG:
+        image = img.get_image()
+        if color_mask == QrColorMask.SOLID:
+            image = image.convert("L")
+        image.save(img_bytes, format="PNG", optimize=True)
+    else:
+        img.save(img_bytes, format="JPEG")
+    return img_bytes.getvalue()
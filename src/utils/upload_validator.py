@@ -0,0 +1,170 @@
+import hashlib
+import struct
+
+from fastapi import HTTPException, UploadFile, status
+
+from src.conf.config import settings
+
+CHUNK_SIZE = 64 * 1024
+# JPEG metadata segments (EXIF, XMP, ICC profile) may precede the frame header,
+# so the dimensions are searched for within this many leading bytes.
+HEADER_MAX_BYTES = 512 * 1024
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SIGNATURE = b"\xff\xd8\xff"
+# Start of frame markers, DHT (0xC4), JPG (0xC8) and DAC (0xCC) share the range.
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers without a length field.
+JPEG_STANDALONE_MARKERS = set(range(0xD0, 0xDA)) | {0x01}
+
+
+def _get_png_size(header: bytes) -> tuple[int, int] | None:
+    """
+    Returns the dimensions of the PNG image stored in its IHDR chunk.
+
+    :param header: Leading bytes of the PNG file
+    :type header: bytes
+    :return: Width and height or None if more bytes are needed
+    :rtype: tuple[int, int] | None
+    """
+    if len(header) < 24:
+        return None
+    if header[12:16] != b"IHDR":
+        raise ValueError("IHDR chunk is missing")
+    return struct.unpack(">II", header[16:24])
+
+
+def _get_jpeg_size(header: bytes) -> tuple[int, int] | None:
+    """
+    Returns the dimensions of the JPEG image stored in its start of frame segment,
+    skipping the segments that precede it.
+
+    :param header: Leading bytes of the JPEG file
+    :type header: bytes
+    :return: Width and height or None if more bytes are needed
+    :rtype: tuple[int, int] | None
+    """
+    offset = 2
+    while offset + 4 <= len(header):
+        if header[offset] != 0xFF:
+            raise ValueError("Invalid JPEG marker")
+        marker = header[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker in JPEG_STANDALONE_MARKERS:
+            offset += 2
+            continue
+        if marker == 0xD9 or marker == 0xDA:
+            raise ValueError("Frame header is missing")
+        if marker in JPEG_SOF_MARKERS:
+            if offset + 9 > len(header):
+                return None
+            height, width = struct.unpack(">HH", header[offset + 5:offset + 9])
+            return width, height
+        (length,) = struct.unpack(">H", header[offset + 2:offset + 4])
+        if length < 2:
+            raise ValueError("Invalid JPEG segment length")
+        offset += 2 + length
+    return None
+
+
+def _get_image_size(header: bytes) -> tuple[int, int] | None:
+    """
+    Detects the image format by the magic bytes and returns the image dimensions.
+
+    :param header: Leading bytes of the file
+    :type header: bytes
+    :return: Width and height or None if more bytes are needed
+    :rtype: tuple[int, int] | None
+    """
+    if header.startswith(PNG_SIGNATURE):
+        return _get_png_size(header)
+    if header.startswith(JPEG_SIGNATURE):
+        return _get_jpeg_size(header)
+    if len(header) < len(PNG_SIGNATURE):
+        return None
+    raise ValueError("File content is not a JPEG or PNG image")
+
+
+def _check_image_header(
+    header: bytes, max_pixels: int, complete: bool = False
+) -> tuple[int, int] | None:
+    """
+    Checks the image format and dimensions by the leading bytes of the file.
+
+    :param header: Leading bytes of the file
+    :type header: bytes
+    :param max_pixels: The maximum number of pixels of the image
+    :type max_pixels: int
+    :param complete: Whether no more bytes of the header are available
+    :type complete: bool
+    :return: Width and height or None if more bytes are needed
+    :rtype: tuple[int, int] | None
+    """
+    try:
+        size = _get_image_size(header)
+        if size is None and (complete or len(header) >= HEADER_MAX_BYTES):
+            raise ValueError("Image dimensions can't be read")
+    except (ValueError, struct.error) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid image file: {str(e)}",
+        )
+    if size is not None and not all(size):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid image file: image has zero dimensions",
+        )
+    if size is not None and size[0] * size[1] > max_pixels:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image is too large. The maximum number of pixels is {max_pixels}",
+        )
+    return size
+
+
+async def validate_upload(
+    file: UploadFile,
+    max_bytes: int = settings.upload_max_bytes,
+    max_pixels: int = settings.upload_max_pixels,
+    chunk_size: int = CHUNK_SIZE,
+) -> str:
+    """
+    Validates the uploaded image in a single streaming pass and returns SHA-256
+    of its content. The real format is sniffed from the magic bytes, the reading
+    is aborted as soon as the file exceeds the size limit and images which
+    dimensions exceed the pixel limit are rejected before they are decoded
+    anywhere. The file is rewound to the beginning afterwards.
+
+    :param file: Uploaded file
+    :type file: UploadFile
+    :param max_bytes: The maximum size of the file
+    :type max_bytes: int
+    :param max_pixels: The maximum number of pixels of the image
+    :type max_pixels: int
+    :param chunk_size: Number of bytes read at once
+    :type chunk_size: int
+    :return: Hex digest of the file content
+    :rtype: str
+    """
+    hasher = hashlib.sha256()
+    header = b""
+    size = None
+    total_bytes = 0
+    await file.seek(0)
+    while chunk := await file.read(chunk_size):
+        total_bytes += len(chunk)
+        if total_bytes > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File is too large. The maximum size is {max_bytes} bytes",
+            )
+        hasher.update(chunk)
+        if size is None:
+            header += chunk[:HEADER_MAX_BYTES - len(header)]
+            size = _check_image_header(header, max_pixels)
+    if size is None:
+        _check_image_header(header, max_pixels, complete=True)
+    await file.seek(0)
+    return hasher.hexdigest()
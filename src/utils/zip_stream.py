@@ -0,0 +1,79 @@
+import io
+import zipfile
+
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    Unseekable buffer the archive is written to. The written bytes are taken
+    out as they are sent, so only the current entry is kept in memory.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def pop(self) -> bytes:
+        """
+        Method takes the bytes written since the previous call out of the buffer.
+
+        :return: Written bytes.
+        :rtype: bytes.
+        """
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ZipStream:
+    """
+    ZIP archive written incrementally. Every added file returns the bytes of the
+    archive to send, the sizes and checksums of the files are written after
+    their content, so the archive needs no seeking.
+    """
+
+    def __init__(self):
+        self._buffer = _StreamBuffer()
+        self._zip_file = zipfile.ZipFile(self._buffer, mode="w")
+
+    def add(self, name: str, data: bytes, compress: bool = False) -> bytes:
+        """
+        Method adds the file to the archive.
+
+        :param name: File name in the archive.
+        :type name: str.
+        :param data: File content.
+        :type data: bytes.
+        :param compress: Whether to deflate the content, already compressed
+            images are stored as is.
+        :type compress: bool.
+        :return: Bytes of the archive.
+        :rtype: bytes.
+        """
+        self._zip_file.writestr(
+            name,
+            data,
+            compress_type=zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED,
+        )
+        return self._buffer.pop()
+
+    def close(self) -> bytes:
+        """
+        Method finishes the archive with the central directory.
+
+        :return: The last bytes of the archive.
+        :rtype: bytes.
+        """
+        self._zip_file.close()
+        return self._buffer.pop()
@@ -0,0 +1,118 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import cloudinary.exceptions
+
+from src.enums import CircuitState
+from src.storage.circuit_breaker import CircuitBreaker, StorageUnavailableError
+from src.storage.cloudinary_storage import CloudinaryStorage
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30)
+
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == CircuitState.CLOSED
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+        with self.assertRaises(StorageUnavailableError) as err:
+            breaker.before_call()
+        assert 0 < err.exception.retry_after <= 30
+        assert breaker.get_metrics()["rejected"] == 1
+
+    @patch("src.storage.circuit_breaker.time.monotonic")
+    def test_half_open(self, mock_monotonic):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+        mock_monotonic.return_value = 100
+        breaker.record_failure()
+
+        mock_monotonic.return_value = 131
+        breaker.before_call()
+        assert breaker.state == CircuitState.HALF_OPEN
+        with self.assertRaises(StorageUnavailableError):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+
+        mock_monotonic.return_value = 162
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+
+
+class TestStorageCalls(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.storage = CloudinaryStorage(
+            cloud_name="cloud",
+            api_key="key",
+            api_secret="secret",
+            retry_attempts=3,
+            retry_base_delay=0,
+            retry_max_delay=0,
+            circuit_breaker=CircuitBreaker(failure_threshold=3),
+        )
+
+    async def test_idempotent_call_is_retried(self):
+        self.storage.get_resource_url = MagicMock(
+            side_effect=[cloudinary.exceptions.GeneralError("Socket Error"), "url"]
+        )
+
+        assert await self.storage.get_resource_url_async("public_id") == "url"
+        assert self.storage.get_resource_url.call_count == 2
+        assert self.storage.circuit_breaker.state == CircuitState.CLOSED
+
+    async def test_client_error_is_not_retried(self):
+        self.storage.delete_resources = MagicMock(
+            side_effect=cloudinary.exceptions.BadRequest("Bad request")
+        )
+
+        with self.assertRaises(cloudinary.exceptions.BadRequest):
+            await self.storage.delete_resources_async(["public_id"])
+        assert self.storage.delete_resources.call_count == 1
+        assert self.storage.circuit_breaker.consecutive_failures == 0
+
+    async def test_upload_is_not_retried_and_opens_circuit(self):
+        self.storage.upload = MagicMock(
+            side_effect=cloudinary.exceptions.Error("Socket error: timed out")
+        )
+
+        for _ in range(3):
+            with self.assertRaises(cloudinary.exceptions.Error):
+                await self.storage.upload_async(MagicMock(), public_id="public_id")
+        with self.assertRaises(StorageUnavailableError):
+            await self.storage.upload_async(MagicMock(), public_id="public_id")
+        assert self.storage.upload.call_count == 3
+
+    async def test_call_timeout(self):
+        self.storage.call_timeout = 0.01
+        self.storage.retry_attempts = 1
+        self.storage.get_resource_url = MagicMock(side_effect=lambda _: time.sleep(0.1))
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.storage.get_resource_url_async("public_id")
+        assert self.storage.circuit_breaker.consecutive_failures == 1
+
+    async def test_upload_timeout_keeps_slot_until_thread_finishes(self):
+        self.storage._upload_semaphore = asyncio.Semaphore(1)
+        finished = []
+
+        def upload(*args, **kwargs):
+            time.sleep(0.1)
+            finished.append(True)
+            return "url"
+
+        self.storage.upload = MagicMock(side_effect=upload)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.storage.upload_async(MagicMock(), "public_id", timeout=0.01)
+        assert self.storage._upload_semaphore.locked()
+
+        assert await self.storage.upload_async(MagicMock(), "public_id") == "url"
+        assert len(finished) == 2
+        assert not self.storage._upload_semaphore.locked()
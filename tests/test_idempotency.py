@@ -0,0 +1,154 @@
+import hashlib
+import io
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.datastructures import FormData
+
+from src.cache.idempotency import COMPLETED, PROCESSING, IdempotencyKey
+from src.database.models.user import User
+
+
+class TestIdempotencyKey(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redis = AsyncMock()
+        self.request = MagicMock()
+        self.request.method = "POST"
+        self.request.url.path = "/api/photos/"
+        self.request.url.query = "description=cat"
+        self.request.headers = {"content-type": "application/json"}
+        self.request.body = AsyncMock(return_value=b'{"steps": []}')
+        self.user = User(id=1)
+        self.dependency = IdempotencyKey(scope="photos:create")
+        self.fingerprint = (
+            "POST /api/photos/?description=cat "
+            + hashlib.sha256(b'{"steps": []}').hexdigest()
+        )
+
+    def _resolve(self, idempotency_key):
+        return self.dependency(
+            request=self.request,
+            current_user=self.user,
+            r=self.redis,
+            idempotency_key=idempotency_key,
+        )
+
+    async def test_without_key(self):
+        dependency = self._resolve(None)
+        idempotent_request = await anext(dependency)
+
+        response = await idempotent_request.save(
+            {"id": 1}, status_code=status.HTTP_201_CREATED
+        )
+
+        assert idempotent_request.replay is None
+        assert response.status_code == status.HTTP_201_CREATED
+        self.redis.set.assert_not_called()
+
+    async def test_first_request_saves_response(self):
+        self.redis.set.return_value = True
+        dependency = self._resolve("key")
+        idempotent_request = await anext(dependency)
+
+        await idempotent_request.save(
+            {"id": 1}, status_code=status.HTTP_202_ACCEPTED, headers={"Location": "/1"}
+        )
+        with self.assertRaises(StopAsyncIteration):
+            await anext(dependency)
+
+        lock_call, save_call = self.redis.set.call_args_list
+        assert lock_call.kwargs["nx"] is True
+        assert save_call.args[0] == lock_call.args[0]
+        assert save_call.args[0].startswith("idempotency:photos:create:1:")
+        assert json.loads(save_call.args[1]) == {
+            "state": COMPLETED,
+            "fingerprint": self.fingerprint,
+            "status_code": status.HTTP_202_ACCEPTED,
+            "content": {"id": 1},
+            "headers": {"Location": "/1"},
+        }
+        self.redis.delete.assert_not_called()
+
+    async def test_failed_request_releases_key(self):
+        self.redis.set.return_value = True
+        dependency = self._resolve("key")
+        await anext(dependency)
+
+        with self.assertRaises(HTTPException):
+            await dependency.athrow(
+                HTTPException(status_code=status.HTTP_400_BAD_REQUEST)
+            )
+
+        self.redis.delete.assert_awaited_once_with(
+            self.redis.set.call_args.args[0]
+        )
+
+    async def test_retry_replays_response(self):
+        self.redis.set.return_value = None
+        self.redis.get.return_value = json.dumps(
+            {
+                "state": COMPLETED,
+                "fingerprint": self.fingerprint,
+                "status_code": status.HTTP_201_CREATED,
+                "content": {"id": 1},
+                "headers": {},
+            }
+        )
+        dependency = self._resolve("key")
+        idempotent_request = await anext(dependency)
+
+        assert idempotent_request.replay.status_code == status.HTTP_201_CREATED
+        assert json.loads(idempotent_request.replay.body) == {"id": 1}
+        assert idempotent_request.replay.headers["Idempotent-Replayed"] == "true"
+
+    async def test_retry_while_processing(self):
+        self.redis.set.return_value = None
+        self.redis.get.return_value = json.dumps(
+            {"state": PROCESSING, "fingerprint": self.fingerprint}
+        )
+
+        with self.assertRaises(HTTPException) as e:
+            await anext(self._resolve("key"))
+
+        assert e.exception.status_code == status.HTTP_409_CONFLICT
+
+    async def test_key_reused_for_another_request(self):
+        self.redis.set.return_value = None
+        self.redis.get.return_value = json.dumps(
+            {"state": PROCESSING, "fingerprint": "POST /api/photos/?description=dog"}
+        )
+
+        with self.assertRaises(HTTPException) as e:
+            await anext(self._resolve("key"))
+
+        assert e.exception.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_key_reused_with_another_body(self):
+        self.redis.set.return_value = None
+        self.redis.get.return_value = json.dumps(
+            {"state": COMPLETED, "fingerprint": self.fingerprint}
+        )
+        self.request.body.return_value = b'{"steps": [{"width": 100}]}'
+
+        with self.assertRaises(HTTPException) as e:
+            await anext(self._resolve("key"))
+
+        assert e.exception.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_fingerprint_of_uploaded_file(self):
+        self.request.headers = {"content-type": "multipart/form-data; boundary=x"}
+        fingerprints = []
+        for content in (b"cat", b"cat", b"dog"):
+            file = UploadFile(filename="photo.png", file=io.BytesIO(content))
+            self.request.form = AsyncMock(return_value=FormData([("file", file)]))
+            fingerprints.append(await IdempotencyKey._get_body_hash(self.request))
+            assert await file.read() == content
+
+        assert fingerprints[0] == fingerprints[1] != fingerprints[2]
+        self.request.body.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
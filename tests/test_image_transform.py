@@ -0,0 +1,83 @@
+import unittest
+from io import BytesIO
+
+from PIL import Image
+
+from src.utils.image_transform import is_transformation_supported, transform_image
+
+
+def _get_image_data(size: tuple[int, int], color: tuple, image_format: str) -> bytes:
+    output = BytesIO()
+    Image.new("RGB", size, color).save(output, format=image_format)
+    return output.getvalue()
+
+
+def _open(data: bytes) -> Image.Image:
+    return Image.open(BytesIO(data))
+
+
+class TestImageTransform(unittest.TestCase):
+    def setUp(self):
+        self.data = _get_image_data((400, 200), (200, 150, 100), "PNG")
+
+    def test_is_transformation_supported(self):
+        assert is_transformation_supported(
+            [{"effect": "sepia", "width": 100}, {"angle": 90}]
+        )
+        assert is_transformation_supported(
+            [{"crop": "fill", "gravity": "auto", "width": 100}]
+        )
+        assert not is_transformation_supported([{"effect": "blur_faces"}])
+        assert not is_transformation_supported([{"crop": "thumb", "width": 100}])
+        assert not is_transformation_supported(
+            [{"crop": "fill", "gravity": "faces", "width": 100, "height": 100}]
+        )
+
+    def test_transform_image_resize(self):
+        assert _open(transform_image(self.data, [{"width": 100}])).size == (100, 50)
+        assert _open(
+            transform_image(self.data, [{"width": 100, "height": 100, "crop": "fill"}])
+        ).size == (100, 100)
+        assert _open(
+            transform_image(self.data, [{"width": 100, "height": 100, "crop": "scale"}])
+        ).size == (100, 100)
+
+    def test_transform_image_pad(self):
+        image = _open(
+            transform_image(self.data, [{"width": 100, "height": 100, "crop": "pad"}])
+        )
+
+        assert image.size == (100, 100)
+        assert image.getpixel((50, 0)) == (255, 255, 255)
+        assert image.getpixel((50, 50)) == (200, 150, 100)
+
+    def test_transform_image_rotate(self):
+        image = _open(transform_image(self.data, [{"angle": 90}]))
+
+        assert image.size == (200, 400)
+
+    def test_transform_image_sepia(self):
+        image = _open(transform_image(self.data, [{"effect": "sepia"}]))
+
+        assert image.getpixel((200, 100)) == (213, 190, 148)
+
+    def test_transform_image_vignette(self):
+        image = _open(transform_image(self.data, [{"effect": "vignette"}]))
+
+        assert sum(image.getpixel((0, 0))) < sum(image.getpixel((200, 100)))
+
+    def test_transform_image_chain(self):
+        image = _open(
+            transform_image(
+                self.data, [{"width": 200}, {"angle": 90, "effect": "sharpen"}]
+            )
+        )
+
+        assert image.size == (100, 200)
+
+    def test_transform_image_keeps_format(self):
+        jpeg_data = _get_image_data((40, 20), (0, 0, 0), "JPEG")
+        gif_data = _get_image_data((40, 20), (0, 0, 0), "GIF")
+
+        assert _open(transform_image(jpeg_data, [{"angle": 90}])).format == "JPEG"
+        assert _open(transform_image(gif_data, [{"angle": 90}])).format == "PNG"
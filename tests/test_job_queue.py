@@ -0,0 +1,143 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services.job_queue import Job, JobQueue, JobWorker
+from src.services.storage_jobs import delete_stored_files
+from src.storage.circuit_breaker import StorageUnavailableError
+
+
+def _job(payload, attempts: int = 0, job_id: str = "1") -> Job:
+    return Job(json.dumps({"id": job_id, "payload": payload, "attempts": attempts}))
+
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.r = MagicMock()
+        self.queue = JobQueue(
+            self.r, "test", max_attempts=3, retry_base_delay=1, retry_max_delay=10
+        )
+
+    async def test_enqueue(self):
+        self.r.lpush = AsyncMock()
+
+        await self.queue.enqueue(["a", "b"])
+
+        key, *jobs = self.r.lpush.call_args.args
+        assert key == "jobs:test:queue"
+        assert [json.loads(job)["payload"] for job in jobs] == ["a", "b"]
+
+    async def test_claim(self):
+        script = AsyncMock(return_value=[json.dumps(
+            {"id": "1", "payload": "a", "attempts": 0}
+        ).encode()])
+        self.r.register_script.return_value = script
+
+        jobs = await self.queue.claim(limit=100)
+
+        assert [job.payload for job in jobs] == ["a"]
+        assert script.call_args.kwargs["keys"] == [
+            "jobs:test:queue", "jobs:test:processing", "jobs:test:delayed"
+        ]
+        assert script.call_args.kwargs["args"][1] == 100
+
+    def test_get_retry_delay(self):
+        assert 0.5 <= self.queue.get_retry_delay(1) <= 1
+        assert 2 <= self.queue.get_retry_delay(3) <= 4
+        assert 5 <= self.queue.get_retry_delay(10) <= 10
+
+    async def test_fail(self):
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        self.r.pipeline.return_value.__aenter__.return_value = pipe
+
+        await self.queue.fail([_job("a", attempts=0, job_id="1"),
+                               _job("b", attempts=2, job_id="2")])
+
+        delayed_job = next(iter(pipe.zadd.call_args.args[1]))
+        assert pipe.zadd.call_args.args[0] == "jobs:test:delayed"
+        assert json.loads(delayed_job) == {"id": "1", "payload": "a", "attempts": 1}
+        dead_key, dead_job = pipe.lpush.call_args.args
+        assert dead_key == "jobs:test:dead"
+        assert json.loads(dead_job) == {"id": "2", "payload": "b", "attempts": 3}
+        pipe.execute.assert_called_once()
+
+    async def test_fail_postponed(self):
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        self.r.pipeline.return_value.__aenter__.return_value = pipe
+        job = _job("a", attempts=2)
+        job.retry_after = 30
+
+        with patch("src.services.job_queue.time.time", return_value=100):
+            await self.queue.fail([job])
+
+        delayed_job, score = next(iter(pipe.zadd.call_args.args[1].items()))
+        assert json.loads(delayed_job) == {"id": "1", "payload": "a", "attempts": 2}
+        assert score == 130
+        pipe.lpush.assert_not_called()
+
+    async def test_requeue_dead(self):
+        script = AsyncMock(return_value=2)
+        self.r.register_script.return_value = script
+
+        assert await self.queue.requeue_dead() == 2
+
+        assert script.call_args.kwargs["keys"] == ["jobs:test:dead", "jobs:test:queue"]
+        assert script.call_args.kwargs["args"] == [-1]
+
+
+class TestJobWorker(unittest.IsolatedAsyncioTestCase):
+    async def test_process_batch(self):
+        jobs = [_job("a", job_id="1"), _job("b", job_id="2")]
+        queue = MagicMock(complete=AsyncMock(), fail=AsyncMock())
+        queue.claim = AsyncMock(return_value=jobs)
+        handler = AsyncMock(return_value=[jobs[1]])
+        worker = JobWorker(queue, handler, batch_size=100)
+
+        assert await worker.process_batch() == 2
+
+        queue.claim.assert_called_once_with(100)
+        queue.complete.assert_called_once_with([jobs[0]])
+        queue.fail.assert_called_once_with([jobs[1]])
+
+    async def test_process_batch_handler_error(self):
+        jobs = [_job("a")]
+        queue = MagicMock(complete=AsyncMock(), fail=AsyncMock())
+        queue.claim = AsyncMock(return_value=jobs)
+        worker = JobWorker(
+            queue, AsyncMock(side_effect=ConnectionError), batch_size=100
+        )
+
+        await worker.process_batch()
+
+        queue.complete.assert_called_once_with([])
+        queue.fail.assert_called_once_with(jobs)
+
+    async def test_process_batch_storage_unavailable(self):
+        jobs = [_job("a")]
+        queue = MagicMock(complete=AsyncMock(), fail=AsyncMock())
+        queue.claim = AsyncMock(return_value=jobs)
+        worker = JobWorker(
+            queue, AsyncMock(side_effect=StorageUnavailableError(30)), batch_size=100
+        )
+
+        await worker.process_batch()
+
+        queue.fail.assert_called_once_with(jobs)
+        assert jobs[0].retry_after == 30
+
+
+class TestStorageJobs(unittest.IsolatedAsyncioTestCase):
+    @patch("src.services.storage_jobs.get_storage")
+    async def test_delete_stored_files(self, mock_get_storage):
+        mock_get_storage.return_value.delete_resources_async = AsyncMock(return_value={
+            "deleted": {"a": "deleted", "b": "not_found", "c": "rate_limited"}
+        })
+        jobs = [_job("a", job_id="1"), _job("b", job_id="2"), _job("c", job_id="3")]
+
+        failed_jobs = await delete_stored_files(jobs)
+
+        assert failed_jobs == [jobs[2]]
+        public_ids = mock_get_storage.return_value.delete_resources_async.call_args.args[0]
+        assert sorted(public_ids) == ["a", "b", "c"]
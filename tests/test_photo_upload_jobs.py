@@ -0,0 +1,132 @@
+import io
+import json
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import UploadFile
+
+from src.services.job_queue import Job
+from src.services.photo_upload_jobs import (
+    enqueue_photo_upload,
+    get_spool_path,
+    spool_upload,
+    upload_spooled_photos,
+)
+from src.storage.circuit_breaker import StorageUnavailableError
+
+
+def _job(spool_name: str, attempts: int = 0) -> Job:
+    payload = {"photo_id": 1, "public_id": "PhotoShareApp/u/photo", "spool_name": spool_name}
+    return Job(json.dumps({"id": "1", "payload": payload, "attempts": attempts}))
+
+
+class TestPhotoUploadJobs(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        settings_patcher = patch(
+            "src.services.photo_upload_jobs.settings",
+            MagicMock(
+                upload_spool_dir=self.tmp_dir.name,
+                upload_spool_node="node-1",
+                job_max_attempts=3,
+            ),
+        )
+        settings_patcher.start()
+        self.addCleanup(settings_patcher.stop)
+        storage_patcher = patch("src.services.photo_upload_jobs.get_storage")
+        self.storage = storage_patcher.start().return_value
+        self.storage.is_transient_error.return_value = True
+        self.addCleanup(storage_patcher.stop)
+        finish_patcher = patch(
+            "src.services.photo_upload_jobs._finish_photo_upload", return_value=True
+        )
+        self.finish_photo_upload = finish_patcher.start()
+        self.addCleanup(finish_patcher.stop)
+        self.r = AsyncMock()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def _spool(self) -> str:
+        return await spool_upload(
+            UploadFile(filename="photo.png", file=io.BytesIO(b"content"))
+        )
+
+    async def test_upload_spooled_photo(self):
+        spool_name = await self._spool()
+        self.storage.upload_async = AsyncMock(return_value="url")
+
+        failed_jobs = await upload_spooled_photos([_job(spool_name)], r=self.r)
+
+        assert failed_jobs == []
+        self.finish_photo_upload.assert_called_once_with(1, "url")
+        assert not get_spool_path(spool_name).exists()
+
+    @patch("src.services.photo_upload_jobs.enqueue_storage_deletion")
+    async def test_upload_spooled_photo_of_deleted_photo(
+        self, mock_enqueue_storage_deletion
+    ):
+        spool_name = await self._spool()
+        self.storage.upload_async = AsyncMock(return_value="url")
+        self.finish_photo_upload.return_value = False
+
+        await upload_spooled_photos([_job(spool_name)], r=self.r)
+
+        mock_enqueue_storage_deletion.assert_called_once_with(
+            public_ids=["PhotoShareApp/u/photo"], r=self.r
+        )
+
+    async def test_upload_spooled_photo_transient_error(self):
+        spool_name = await self._spool()
+        job = _job(spool_name)
+        self.storage.upload_async = AsyncMock(side_effect=StorageUnavailableError(1))
+
+        failed_jobs = await upload_spooled_photos([job], r=self.r)
+
+        assert failed_jobs == [job]
+        self.finish_photo_upload.assert_not_called()
+        assert get_spool_path(spool_name).exists()
+
+    async def test_upload_spooled_photo_storage_unavailable_on_last_attempt(self):
+        spool_name = await self._spool()
+        job = _job(spool_name, attempts=2)
+        self.storage.upload_async = AsyncMock(side_effect=StorageUnavailableError(30))
+
+        failed_jobs = await upload_spooled_photos([job], r=self.r)
+
+        assert failed_jobs == [job]
+        assert job.retry_after == 30
+        self.finish_photo_upload.assert_not_called()
+
+    async def test_upload_spooled_photo_last_attempt(self):
+        spool_name = await self._spool()
+        self.storage.upload_async = AsyncMock(side_effect=ConnectionError)
+
+        failed_jobs = await upload_spooled_photos(
+            [_job(spool_name, attempts=2)], r=self.r
+        )
+
+        assert failed_jobs == []
+        self.finish_photo_upload.assert_called_once_with(1, None)
+        assert not get_spool_path(spool_name).exists()
+
+    async def test_upload_missing_spooled_photo_is_retried(self):
+        job = _job("missing")
+        self.storage.is_transient_error.return_value = False
+        self.storage.upload_async = AsyncMock()
+
+        failed_jobs = await upload_spooled_photos([job], r=self.r)
+
+        assert failed_jobs == [job]
+        self.finish_photo_upload.assert_not_called()
+
+    @patch("src.services.photo_upload_jobs.JobQueue")
+    async def test_enqueue_photo_upload_to_node_queue(self, mock_job_queue):
+        mock_job_queue.return_value.enqueue = AsyncMock()
+
+        await enqueue_photo_upload(
+            photo_id=1, public_id="PhotoShareApp/u/photo", spool_name="name", r=self.r
+        )
+
+        mock_job_queue.assert_called_once_with(self.r, "photo_upload:node-1")
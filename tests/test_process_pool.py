@@ -0,0 +1,49 @@
+import unittest
+
+from src.services.process_pool import ProcessPoolBusyError, ProcessPoolRunner
+
+
+class TestProcessPoolRunner(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.pool = ProcessPoolRunner(max_workers=1, max_queue_depth=1)
+
+    def tearDown(self):
+        self.pool.close()
+
+    async def test_run(self):
+        self.pool.start()
+
+        result = await self.pool.run(pow, 2, 10)
+
+        metrics = self.pool.get_metrics()
+        assert result == 1024
+        assert metrics["completed"] == 1
+        assert metrics["pending"] == 0
+        assert metrics["execution_seconds_total"] >= 0
+        assert metrics["queue_wait_seconds_total"] >= 0
+
+    async def test_run_not_started(self):
+        result = await self.pool.run(pow, 2, 10)
+
+        assert result == 1024
+        assert self.pool.get_metrics()["completed"] == 1
+
+    async def test_run_failed(self):
+        with self.assertRaises(ValueError):
+            await self.pool.run(int, "not a number")
+
+        metrics = self.pool.get_metrics()
+        assert metrics["failed"] == 1
+        assert metrics["completed"] == 0
+        assert metrics["pending"] == 0
+
+    async def test_run_queue_full(self):
+        self.pool.pending = 2
+
+        with self.assertRaises(ProcessPoolBusyError) as err:
+            await self.pool.run(pow, 2, 10)
+
+        metrics = self.pool.get_metrics()
+        assert err.exception.retry_after > 0
+        assert metrics["rejected"] == 1
+        assert metrics["queued"] == 1
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from src.cache.qr_codes import BytesLRUCache, QrCodeCache, get_qr_code_key
+from src.database.models.photo import Photo
+from src.enums import QrCodeFormat, QrColorMask, QrModuleDrawer
+from src.repository.transform_photos import get_photo_qr_code
+from src.schemas import PhotoQrCodeModel
+
+
+class TestBytesLRUCache(unittest.TestCase):
+    def test_get(self):
+        cache = BytesLRUCache(max_bytes=10)
+        cache.set("a", b"123")
+
+        assert cache.get("a") == b"123"
+        assert cache.get("b") is None
+
+    def test_set_evicts_least_recently_used(self):
+        cache = BytesLRUCache(max_bytes=10)
+        cache.set("a", b"1234")
+        cache.set("b", b"1234")
+        cache.get("a")
+
+        cache.set("c", b"1234")
+
+        assert cache.get("a") == b"1234"
+        assert cache.get("b") is None
+        assert cache.get("c") == b"1234"
+        assert cache.size == 8
+
+    def test_set_replaces_value(self):
+        cache = BytesLRUCache(max_bytes=10)
+        cache.set("a", b"1234")
+
+        cache.set("a", b"12")
+
+        assert cache.get("a") == b"12"
+        assert cache.size == 2
+
+    def test_set_skips_too_large_value(self):
+        cache = BytesLRUCache(max_bytes=10)
+        cache.set("a", b"1234")
+
+        cache.set("b", b"12345678901")
+
+        assert cache.get("a") == b"1234"
+        assert cache.get("b") is None
+
+
+class TestQrCodeCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.r = AsyncMock()
+        self.memory_cache = BytesLRUCache(max_bytes=1024)
+        self.cache = QrCodeCache(self.r, memory_cache=self.memory_cache)
+        self.params = PhotoQrCodeModel(
+            module_drawer=QrModuleDrawer.CIRCLE,
+            color_mask=QrColorMask.RADIAL,
+            box_size=5,
+        )
+        self.photo = Photo(id=1, url="https://res.cloudinary.com/image/upload/a.jpg")
+
+    def test_get_qr_code_key(self):
+        key = get_qr_code_key(self.photo.url, self.params)
+
+        assert key == get_qr_code_key(self.photo.url, self.params.copy())
+        assert key != get_qr_code_key(
+            self.photo.url, self.params.copy(update={"box_size": 6})
+        )
+        assert key != get_qr_code_key("https://res.cloudinary.com/b.jpg", self.params)
+        assert key != get_qr_code_key(
+            self.photo.url, self.params.copy(update={"format": QrCodeFormat.SVG})
+        )
+
+    async def test_get_from_memory(self):
+        self.memory_cache.set("key", b"image")
+
+        assert await self.cache.get("key") == b"image"
+        self.r.get.assert_not_called()
+
+    async def test_get_from_redis(self):
+        self.r.get.return_value = b"image"
+
+        assert await self.cache.get("key") == b"image"
+        self.r.get.assert_awaited_once_with("qr_code:key")
+        assert self.memory_cache.get("key") == b"image"
+
+    async def test_set(self):
+        await self.cache.set("key", b"image")
+
+        assert self.memory_cache.get("key") == b"image"
+        assert self.r.set.call_args.args == ("qr_code:key", b"image")
+
+    @patch("src.repository.transform_photos.generate_photo_qr_code")
+    async def test_get_photo_qr_code(self, mock_generate_photo_qr_code):
+        self.r.get.return_value = None
+        mock_generate_photo_qr_code.return_value = b"image"
+
+        with patch("src.cache.qr_codes._memory_cache", self.memory_cache):
+            first = await get_photo_qr_code(self.photo, self.params, "key", self.r)
+            second = await get_photo_qr_code(self.photo, self.params, "key", self.r)
+
+        assert first == second == b"image"
+        mock_generate_photo_qr_code.assert_awaited_once()
@@ -0,0 +1,119 @@
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from src.database.models.role import Role
+from src.database.models.user import User
+from src.enums import Roles
+from src.security.rate_limiter import UserRateLimiter
+
+
+class TestUserRateLimiter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.session = MagicMock(spec=Session)
+        self.redis = MagicMock()
+        self.script = AsyncMock()
+        self.redis.register_script.return_value = self.script
+        self.user = User(id=1)
+        self.limiter = UserRateLimiter(
+            scope="photos:create",
+            window_seconds=60,
+            quotas={Roles.ADMIN.value: 10, Roles.USER.value: 2},
+        )
+
+    @patch("src.security.rate_limiter.get_user_role")
+    async def test_request_within_quota(self, mock_get_user_role):
+        mock_get_user_role.return_value = Role(name=Roles.USER.value)
+        self.script.return_value = [1, 1, 60000]
+        response = Response()
+
+        await self.limiter(
+            response=response, current_user=self.user, db=self.session, r=self.redis
+        )
+
+        keys = self.script.call_args.kwargs["keys"]
+        args = self.script.call_args.kwargs["args"]
+        assert keys == ["rate_limit:photos:create:1"]
+        assert args[1:3] == [60000, 2]
+        assert response.headers["X-RateLimit-Limit"] == "2"
+        assert response.headers["X-RateLimit-Remaining"] == "1"
+        assert response.headers["X-RateLimit-Reset"] == "60"
+
+    @patch("src.security.rate_limiter.get_user_role")
+    async def test_quota_depends_on_role(self, mock_get_user_role):
+        mock_get_user_role.return_value = Role(name=Roles.ADMIN.value)
+        self.script.return_value = [1, 3, 1500]
+        response = Response()
+
+        await self.limiter(
+            response=response, current_user=self.user, db=self.session, r=self.redis
+        )
+
+        assert response.headers["X-RateLimit-Limit"] == "10"
+        assert response.headers["X-RateLimit-Remaining"] == "7"
+        assert response.headers["X-RateLimit-Reset"] == "2"
+
+    @patch("src.security.rate_limiter.get_user_role")
+    async def test_quota_exceeded(self, mock_get_user_role):
+        mock_get_user_role.return_value = Role(name=Roles.USER.value)
+        self.script.return_value = [0, 2, 12300]
+
+        with self.assertRaises(HTTPException) as err:
+            await self.limiter(
+                response=Response(),
+                current_user=self.user,
+                db=self.session,
+                r=self.redis,
+            )
+
+        assert err.exception.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert err.exception.headers["Retry-After"] == "13"
+        assert err.exception.headers["X-RateLimit-Remaining"] == "0"
+
+    @patch("src.security.rate_limiter.get_user_role")
+    async def test_consume_cost(self, mock_get_user_role):
+        mock_get_user_role.return_value = Role(name=Roles.ADMIN.value)
+        self.script.return_value = [1, 4, 60000]
+
+        headers = await self.limiter.consume(
+            current_user=self.user, db=self.session, r=self.redis, cost=4
+        )
+
+        assert self.script.call_args.kwargs["args"][4] == 4
+        assert headers["X-RateLimit-Remaining"] == "6"
+
+    @patch("src.security.rate_limiter.get_user_role")
+    async def test_consume_cost_exceeds_quota(self, mock_get_user_role):
+        mock_get_user_role.return_value = Role(name=Roles.USER.value)
+
+        with self.assertRaises(HTTPException) as err:
+            await self.limiter.consume(
+                current_user=self.user, db=self.session, r=self.redis, cost=3
+            )
+
+        assert err.exception.status_code == status.HTTP_400_BAD_REQUEST
+        self.script.assert_not_called()
+
+    @patch("src.security.rate_limiter.get_user_role")
+    async def test_get_limit(self, mock_get_user_role):
+        mock_get_user_role.return_value = Role(name=Roles.ADMIN.value)
+
+        limit = await self.limiter.get_limit(
+            current_user=self.user, db=self.session, r=self.redis
+        )
+
+        assert limit == 10
+        self.script.assert_not_called()
+
+
+    @patch("src.security.rate_limiter.get_user_role")
+    async def test_get_limit_of_role_without_quota(self, mock_get_user_role):
+        mock_get_user_role.return_value = Role(name=Roles.MODERATOR.value)
+
+        limit = await self.limiter.get_limit(
+            current_user=self.user, db=self.session, r=self.redis
+        )
+
+        assert limit == 2
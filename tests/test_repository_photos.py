@@ -1,18 +1,43 @@
+import asyncio
+import hashlib
+import io
+import struct
 import unittest
-from unittest.mock import MagicMock, patch
-from fastapi import HTTPException
+from unittest.mock import MagicMock, AsyncMock, patch
+from fastapi import HTTPException, UploadFile, status
 from sqlalchemy.orm import Session
 
 from src.database.models.photo import Photo
 from src.database.models.user import User
-from src.repository.photos import get_photo_by_photo_id, create_photo
+from src.enums import PhotoStatus
+from src.storage.circuit_breaker import StorageUnavailableError
+from src.repository.photos import (
+    get_photo_by_photo_id,
+    create_photo,
+    create_photo_async,
+    _upload_photo_to_storage,
+    create_signed_upload,
+    confirm_signed_upload,
+    create_photos,
+    delete_photo,
+    get_photo_versions,
+    _store_photo_file,
+)
+
+PNG_CONTENT = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+    + struct.pack(">II", 1, 1)
+    + b"\x08\x02\x00\x00\x00"
+)
 
 
 class TestPhotos(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         self.session = MagicMock(spec=Session)
         self.user = User(id=1)
-        self.photo_url = "https://res.cloudinary.com/image/upload/6AQ8KKI6.jpg"
+        self.photo_url = (
+            "https://res.cloudinary.com/image/upload/PhotoShareApp/user/6AQ8KKI6.jpg"
+        )
         self.photo_id = 1
 
     async def test_get_photo_by_photo_id(self):
@@ -34,9 +59,9 @@ class TestPhotos(unittest.IsolatedAsyncioTestCase):
         file = MagicMock()
 
         with patch(
-            "src.repository.photos._upload_photo_to_cloudinary",
-            return_value="https://example.com/photo.jpg",
-        ) as mock_upload_photo_to_cloudinary:
+            "src.repository.photos._store_photo_file",
+            return_value=(self.photo_url, "content_hash"),
+        ) as mock_store_photo_file:
             photo = await create_photo(
                 description="Test photo",
                 current_user=current_user,
@@ -44,10 +69,11 @@ class TestPhotos(unittest.IsolatedAsyncioTestCase):
                 file=file,
             )
 
-            assert photo.url == "https://example.com/photo.jpg"
+            assert photo.url == self.photo_url
+            assert photo.content_hash == "content_hash"
 
-            mock_upload_photo_to_cloudinary.assert_called_once_with(
-                current_user=current_user, file=file
+            mock_store_photo_file.assert_called_once_with(
+                current_user=current_user, db=self.session, file=file
             )
 
     async def test_create_photo_negative(self):
@@ -55,9 +81,9 @@ class TestPhotos(unittest.IsolatedAsyncioTestCase):
         file = MagicMock()
 
         with patch(
-            "src.repository.photos._upload_photo_to_cloudinary"
-        ) as mock_upload_photo_to_cloudinary:
-            mock_upload_photo_to_cloudinary.side_effect = HTTPException(
+            "src.repository.photos._store_photo_file"
+        ) as mock_store_photo_file:
+            mock_store_photo_file.side_effect = HTTPException(
                 status_code=500, detail="Upload failed"
             )
 
@@ -68,3 +94,400 @@ class TestPhotos(unittest.IsolatedAsyncioTestCase):
                     db=self.session,
                     file=file,
                 )
+
+    async def test_store_photo_file_uploads_new_content(self):
+        current_user = User(user_name="test_user", id=1)
+        file = UploadFile(filename="photo.jpg", file=io.BytesIO(PNG_CONTENT))
+        self.session.query().filter().filter().first.return_value = None
+
+        with patch(
+            "src.repository.photos._upload_photo_to_storage",
+            return_value=self.photo_url,
+        ) as mock_upload_photo_to_storage:
+            photo_url, content_hash = await _store_photo_file(
+                current_user=current_user, db=self.session, file=file
+            )
+
+        assert photo_url == self.photo_url
+        assert content_hash == hashlib.sha256(PNG_CONTENT).hexdigest()
+        mock_upload_photo_to_storage.assert_called_once_with(
+            current_user=current_user, file=file
+        )
+
+    async def test_store_photo_file_reuses_stored_content(self):
+        current_user = User(user_name="test_user", id=1)
+        file = UploadFile(filename="photo.jpg", file=io.BytesIO(PNG_CONTENT))
+        self.session.query().filter().filter().first.return_value = Photo(
+            url=self.photo_url
+        )
+
+        with patch(
+            "src.repository.photos._upload_photo_to_storage"
+        ) as mock_upload_photo_to_storage:
+            photo_url, _ = await _store_photo_file(
+                current_user=current_user, db=self.session, file=file
+            )
+
+        assert photo_url == self.photo_url
+        mock_upload_photo_to_storage.assert_not_called()
+
+    @patch("src.repository.photos.enqueue_photo_upload")
+    @patch("src.repository.photos.spool_upload", return_value="spool_name")
+    async def test_create_photo_async(self, mock_spool_upload, mock_enqueue_photo_upload):
+        current_user = User(user_name="test_user", id=1)
+        file = UploadFile(filename="photo.png", file=io.BytesIO(PNG_CONTENT))
+        r = AsyncMock()
+        self.session.query().filter().filter().first.return_value = None
+
+        photo = await create_photo_async(
+            description="Test photo",
+            current_user=current_user,
+            db=self.session,
+            r=r,
+            file=file,
+        )
+
+        assert photo.url is None
+        assert photo.status == PhotoStatus.PENDING.value
+        mock_spool_upload.assert_called_once_with(file)
+        kwargs = mock_enqueue_photo_upload.call_args.kwargs
+        assert kwargs["spool_name"] == "spool_name"
+        assert kwargs["public_id"].startswith("PhotoShareApp/test_user/")
+
+    @patch("src.repository.photos.enqueue_photo_upload")
+    @patch("src.repository.photos.spool_upload")
+    async def test_create_photo_async_stored_content(
+        self, mock_spool_upload, mock_enqueue_photo_upload
+    ):
+        current_user = User(user_name="test_user", id=1)
+        file = UploadFile(filename="photo.png", file=io.BytesIO(PNG_CONTENT))
+        self.session.query().filter().filter().first.return_value = Photo(
+            url=self.photo_url
+        )
+
+        photo = await create_photo_async(
+            description="Test photo",
+            current_user=current_user,
+            db=self.session,
+            r=AsyncMock(),
+            file=file,
+        )
+
+        assert photo.url == self.photo_url
+        assert photo.status == PhotoStatus.READY.value
+        mock_spool_upload.assert_not_called()
+        mock_enqueue_photo_upload.assert_not_called()
+
+    async def test_store_photo_file_unsupported_format(self):
+        current_user = User(user_name="test_user", id=1)
+        file = UploadFile(filename="photo.gif", file=io.BytesIO(PNG_CONTENT))
+
+        with self.assertRaises(HTTPException) as err:
+            await _store_photo_file(
+                current_user=current_user, db=self.session, file=file
+            )
+
+        assert err.exception.status_code == 400
+
+    @patch("src.repository.photos.enqueue_storage_deletion")
+    async def test_delete_photo(self, mock_enqueue_storage_deletion):
+        public_ids = [
+            f"PhotoShareApp/user/{name}" for name in ("original", "transformed", "shared")
+        ]
+        photo = Photo(id=1, url=self.photo_url)
+        r = AsyncMock()
+        self.session.execute().all.return_value = list(enumerate(public_ids, 1))
+        self.session.execute.reset_mock()
+        self.session.scalars.return_value = [public_ids[2]]
+
+        deleted_photo = await delete_photo(photo=photo, db=self.session, r=r)
+
+        assert deleted_photo == photo
+        assert self.session.execute.call_count == 3
+        self.session.commit.assert_called_once()
+        query = self.session.scalars.call_args.args[0]
+        assert "photos.public_id IN" in str(query)
+        assert "LIKE" not in str(query)
+        public_ids = mock_enqueue_storage_deletion.call_args.kwargs["public_ids"]
+        assert sorted(public_ids) == [
+            "PhotoShareApp/user/original", "PhotoShareApp/user/transformed"
+        ]
+
+    async def test_get_photo_versions(self):
+        original = Photo(id=1, url=self.photo_url)
+        photo = Photo(id=2, url=self.photo_url, original_photo_id=1)
+        transformed = Photo(id=3, url=self.photo_url, original_photo_id=2)
+        self.session.execute.return_value.all.return_value = [
+            (original, -1), (photo, 0), (transformed, 1)
+        ]
+
+        versions = await get_photo_versions(photo_id=2, max_depth=5, db=self.session)
+
+        assert versions == [(original, -1), (photo, 0), (transformed, 1)]
+        self.session.execute.assert_called_once()
+        query = str(self.session.execute.call_args.args[0])
+        assert "WITH RECURSIVE ancestors" in query
+        assert "descendants" in query
+
+    @patch("src.repository.photos.enqueue_storage_deletion")
+    async def test_delete_photo_with_shared_file(self, mock_enqueue_storage_deletion):
+        photo_url = "https://res.cloudinary.com/image/upload/PhotoShareApp/user/a.jpg"
+        photo = Photo(id=1, url=photo_url)
+        self.session.execute().all.return_value = [(1, "PhotoShareApp/user/a")]
+        self.session.scalars.return_value = ["PhotoShareApp/user/a"]
+
+        await delete_photo(photo=photo, db=self.session, r=AsyncMock())
+
+        mock_enqueue_storage_deletion.assert_not_called()
+        self.session.commit.assert_called_once()
+
+    @patch("src.repository.photos.get_storage")
+    async def test_upload_photo_to_storage(self, mock_get_storage):
+        current_user = User(user_name="test_user", id=1)
+        file = MagicMock(filename="photo.jpg")
+        mock_get_storage().upload_async = AsyncMock(return_value=self.photo_url)
+
+        photo_url = await _upload_photo_to_storage(
+            current_user=current_user, file=file
+        )
+
+        assert photo_url == self.photo_url
+        public_id = mock_get_storage().upload_async.call_args.kwargs["public_id"]
+        assert public_id.startswith("PhotoShareApp/test_user/")
+
+    @patch("src.repository.photos.get_storage")
+    async def test_upload_photo_to_storage_timeout(self, mock_get_storage):
+        current_user = User(user_name="test_user", id=1)
+        file = MagicMock(filename="photo.png")
+        mock_get_storage().upload_async = AsyncMock(side_effect=asyncio.TimeoutError)
+
+        with self.assertRaises(HTTPException) as err:
+            await _upload_photo_to_storage(current_user=current_user, file=file)
+
+        assert err.exception.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+
+    @patch("src.repository.photos.get_storage")
+    async def test_create_signed_upload(self, mock_get_storage):
+        current_user = User(user_name="test_user", id=1)
+        redis = AsyncMock()
+        mock_get_storage().sign_upload.return_value = {
+            "upload_url": "https://example.com/upload",
+            "fields": {"signature": "signature"},
+        }
+
+        signed_upload = await create_signed_upload(current_user=current_user, r=redis)
+
+        assert signed_upload["public_id"].startswith("PhotoShareApp/test_user/")
+        assert signed_upload["upload_url"] == "https://example.com/upload"
+        redis.set.assert_called_once()
+        assert redis.set.call_args.args == (
+            f"signed_upload:{signed_upload['public_id']}",
+            current_user.id,
+        )
+
+    @patch("src.repository.photos.get_storage")
+    async def test_confirm_signed_upload(self, mock_get_storage):
+        current_user = User(user_name="test_user", id=1)
+        redis = AsyncMock()
+        redis.get.return_value = b"1"
+        redis.delete.return_value = 1
+        mock_get_storage().get_resource_url_async = AsyncMock(return_value=self.photo_url)
+        mock_get_storage().download_async = AsyncMock(return_value=PNG_CONTENT)
+        self.session.query().filter().filter().first.return_value = None
+
+        photo = await confirm_signed_upload(
+            public_id="PhotoShareApp/test_user/photo",
+            description="Test photo",
+            current_user=current_user,
+            db=self.session,
+            r=redis,
+        )
+
+        assert photo.url == self.photo_url
+        assert photo.created_by == current_user.id
+        assert photo.content_hash == hashlib.sha256(PNG_CONTENT).hexdigest()
+        self.session.add.assert_called_once_with(photo)
+
+    @patch("src.repository.photos.enqueue_storage_deletion")
+    @patch("src.repository.photos.get_storage")
+    async def test_confirm_signed_upload_duplicate(
+        self, mock_get_storage, mock_enqueue_storage_deletion
+    ):
+        current_user = User(user_name="test_user", id=1)
+        redis = AsyncMock()
+        redis.get.return_value = b"1"
+        redis.delete.return_value = 1
+        mock_get_storage().get_resource_url_async = AsyncMock(return_value=self.photo_url)
+        mock_get_storage().download_async = AsyncMock(return_value=PNG_CONTENT)
+        stored_url = (
+            "https://res.cloudinary.com/image/upload/PhotoShareApp/user/stored.png"
+        )
+        self.session.query().filter().filter().first.return_value = MagicMock(
+            url=stored_url
+        )
+
+        photo = await confirm_signed_upload(
+            public_id="PhotoShareApp/test_user/photo",
+            description=None,
+            current_user=current_user,
+            db=self.session,
+            r=redis,
+        )
+
+        assert photo.url == stored_url
+        mock_enqueue_storage_deletion.assert_awaited_once_with(
+            public_ids=["PhotoShareApp/test_user/photo"], r=redis
+        )
+
+    @patch("src.repository.photos.enqueue_storage_deletion")
+    @patch("src.repository.photos.get_storage")
+    async def test_confirm_signed_upload_invalid(
+        self, mock_get_storage, mock_enqueue_storage_deletion
+    ):
+        current_user = User(user_name="test_user", id=1)
+        redis = AsyncMock()
+        redis.get.return_value = b"1"
+        mock_get_storage().get_resource_url_async = AsyncMock(return_value=self.photo_url)
+        mock_get_storage().download_async = AsyncMock(return_value=b"GIF89a" + b"0" * 16)
+
+        with self.assertRaises(HTTPException) as err:
+            await confirm_signed_upload(
+                public_id="PhotoShareApp/test_user/photo",
+                description=None,
+                current_user=current_user,
+                db=self.session,
+                r=redis,
+            )
+
+        assert err.exception.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        redis.delete.assert_awaited_once_with("signed_upload:PhotoShareApp/test_user/photo")
+        mock_enqueue_storage_deletion.assert_awaited_once_with(
+            public_ids=["PhotoShareApp/test_user/photo"], r=redis
+        )
+        self.session.add.assert_not_called()
+
+    @patch("src.repository.photos.get_storage")
+    async def test_confirm_signed_upload_of_another_user(self, mock_get_storage):
+        current_user = User(user_name="test_user", id=1)
+        redis = AsyncMock()
+        redis.get.return_value = b"2"
+
+        with self.assertRaises(HTTPException) as err:
+            await confirm_signed_upload(
+                public_id="PhotoShareApp/other_user/photo",
+                description=None,
+                current_user=current_user,
+                db=self.session,
+                r=redis,
+            )
+
+        assert err.exception.status_code == status.HTTP_404_NOT_FOUND
+        mock_get_storage().get_resource_url_async.assert_not_called()
+
+    @patch("src.repository.photos.get_storage")
+    async def test_confirm_signed_upload_not_uploaded(self, mock_get_storage):
+        current_user = User(user_name="test_user", id=1)
+        redis = AsyncMock()
+        redis.get.return_value = b"1"
+        mock_get_storage().get_resource_url_async = AsyncMock(return_value=None)
+
+        with self.assertRaises(HTTPException) as err:
+            await confirm_signed_upload(
+                public_id="PhotoShareApp/test_user/photo",
+                description=None,
+                current_user=current_user,
+                db=self.session,
+                r=redis,
+            )
+
+        assert err.exception.status_code == status.HTTP_400_BAD_REQUEST
+        self.session.add.assert_not_called()
+
+    async def test_create_photos(self):
+        current_user = User(user_name="test_user", id=1)
+        files = [MagicMock(filename="first.jpg"), MagicMock(filename="second.gif")]
+        created_photo = Photo(id=1, url=self.photo_url, created_by=current_user.id)
+        self.session.scalars().all.return_value = [created_photo]
+
+        with patch(
+            "src.repository.photos._store_photo_file",
+            side_effect=[
+                (self.photo_url, "content_hash"),
+                HTTPException(status_code=400, detail="Unsupported file format"),
+            ],
+        ):
+            results = await create_photos(
+                description="Test photo",
+                current_user=current_user,
+                db=self.session,
+                files=files,
+            )
+
+        assert results[0]["status_code"] == status.HTTP_201_CREATED
+        assert results[0]["photo"] is created_photo
+        assert results[1]["status_code"] == 400
+        assert results[1]["photo"] is None
+        inserted_rows = self.session.scalars.call_args.args[1]
+        assert inserted_rows == [
+            {
+                "url": self.photo_url,
+                "public_id": "PhotoShareApp/user/6AQ8KKI6",
+                "description": "Test photo",
+                "created_by": 1,
+                "content_hash": "content_hash",
+            }
+        ]
+        self.session.commit.assert_called_once()
+
+    async def test_create_photos_unexpected_errors(self):
+        current_user = User(user_name="test_user", id=1)
+        files = [
+            MagicMock(filename="first.jpg"),
+            MagicMock(filename="second.jpg"),
+            MagicMock(filename="third.jpg"),
+        ]
+        created_photo = Photo(id=1, url=self.photo_url, created_by=current_user.id)
+        self.session.scalars().all.return_value = [created_photo]
+
+        with patch(
+            "src.repository.photos._store_photo_file",
+            side_effect=[
+                StorageUnavailableError(retry_after=10),
+                (self.photo_url, "content_hash"),
+                RuntimeError("Unexpected"),
+            ],
+        ):
+            results = await create_photos(
+                description=None,
+                current_user=current_user,
+                db=self.session,
+                files=files,
+            )
+
+        assert [result["status_code"] for result in results] == [
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            status.HTTP_201_CREATED,
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+        ]
+        # The uploaded file is recorded, so it isn't left in the storage.
+        assert results[1]["photo"] is created_photo
+        assert len(self.session.scalars.call_args.args[1]) == 1
+        self.session.commit.assert_called_once()
+
+    async def test_create_photos_all_failed(self):
+        current_user = User(user_name="test_user", id=1)
+        files = [MagicMock(filename="first.gif")]
+
+        with patch(
+            "src.repository.photos._store_photo_file",
+            side_effect=[HTTPException(status_code=400, detail="Unsupported")],
+        ):
+            results = await create_photos(
+                description=None,
+                current_user=current_user,
+                db=self.session,
+                files=files,
+            )
+
+        assert results[0]["status_code"] == 400
+        self.session.commit.assert_not_called()
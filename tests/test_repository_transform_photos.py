@@ -1,33 +1,72 @@
+import asyncio
+import gc
 import unittest
+import weakref
+from io import BytesIO
+from xml.etree import ElementTree
 from typing import Type
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import cloudinary
 import pydantic
 from fastapi import HTTPException, status
+from PIL import Image
 from qrcode.image.styledpil import StyledPilImage
 from sqlalchemy.orm import Session
 
 from src.database.models.photo import Photo
 from src.database.models.user import User
-from src.enums import PhotoEffect, PhotoGravity, QrModuleDrawer, QrColorMask
+from src.enums import (
+    PhotoCrop,
+    PhotoEffect,
+    PhotoGravity,
+    PhotoStatus,
+    QrCodeFormat,
+    QrColorMask,
+    QrModuleDrawer,
+    TransformEngine,
+    TransformMode,
+    UploadDedupScope,
+)
 from src.repository.transform_photos import (
     apply_transformation,
+    apply_transformations,
+    apply_transformation_chain,
     _save_transformed_photo_to_db,
     _update_orig_photo_with_transformed_photo,
     _create_transformed_photo_in_db,
     generate_photo_qr_code,
+    generate_photos_qr_codes,
+    get_transformation_key,
+    _get_transformation,
+    _late_uploads,
+)
+from src.schemas import (
+    PhotoQrCodeModel,
+    TransformChainModel,
+    TransformPhotoModel,
+    TransformStepModel,
+)
+from src.utils.image_transform import transform_image
+from src.utils.qr_code import (
+    _make_qr_code,
+    generate_qr_code,
+    module_drawer_map,
+    color_mask_map,
+    render_qr_code,
 )
-from src.schemas import TransformPhotoModel, PhotoQrCodeModel
-from src.utils.qr_code import module_drawer_map, color_mask_map
 
 
 class TestTransformPhotos(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         self.session = MagicMock(spec=Session)
         self.user = User(id=1)
-        self.photo_url = "https://res.cloudinary.com/image/upload/6AQ8KKI6.jpg"
-        self.transformed_url = "https://res.cloudinary.com/image/upload/7TGHVBVBV.jpg"
+        self.photo_url = (
+            "https://res.cloudinary.com/image/upload/PhotoShareApp/user/6AQ8KKI6.jpg"
+        )
+        self.transformed_url = (
+            "https://res.cloudinary.com/image/upload/PhotoShareApp/user/7TGHVBVBV.jpg"
+        )
         self.photo_id = 1
 
     async def test_create_transformed_photo_in_db(self):
@@ -142,7 +181,8 @@ class TestTransformPhotos(unittest.IsolatedAsyncioTestCase):
             original_photo_id=self.photo_id,
             is_transformed=False,
         )
-        self.session.query().filter().first.return_value = orig_photo
+        self.session.query().filter().first.return_value = None
+        self.session.query().filter().filter().first.return_value = None
         transform_body = TransformPhotoModel(
             to_override=True,
             description=transformed_photo_desc,
@@ -175,7 +215,8 @@ class TestTransformPhotos(unittest.IsolatedAsyncioTestCase):
             original_photo_id=self.photo_id,
             is_transformed=False,
         )
-        self.session.query().filter().first.return_value = orig_photo
+        self.session.query().filter().first.return_value = None
+        self.session.query().filter().filter().first.return_value = None
         transform_body = TransformPhotoModel(
             to_override=False,
             description=transformed_photo_desc,
@@ -211,7 +252,8 @@ class TestTransformPhotos(unittest.IsolatedAsyncioTestCase):
             original_photo_id=self.photo_id,
             is_transformed=False,
         )
-        self.session.query().filter().first.return_value = orig_photo
+        self.session.query().filter().first.return_value = None
+        self.session.query().filter().filter().first.return_value = None
         transform_body = TransformPhotoModel(
             to_override=False,
             description=transformed_photo_desc,
@@ -237,13 +279,475 @@ class TestTransformPhotos(unittest.IsolatedAsyncioTestCase):
             raise AssertionError("The error wasn't raised when expected")
 
 
+    async def test_get_transformation_key(self):
+        key = get_transformation_key(
+            self.photo_url, [{"effect": "sepia", "angle": None, "width": 100}]
+        )
+
+        assert key == get_transformation_key(
+            self.photo_url, [{"width": 100, "effect": "sepia"}]
+        )
+        assert key != get_transformation_key(
+            self.photo_url, [{"width": 200, "effect": "sepia"}]
+        )
+        assert key != get_transformation_key(
+            self.transformed_url, [{"width": 100, "effect": "sepia"}]
+        )
+        assert key != get_transformation_key(
+            self.photo_url, [{"width": 100}, {"effect": "sepia"}]
+        )
+
+    @patch("cloudinary.uploader.upload")
+    async def test_apply_transformation_returns_transformed_photo(
+        self, mock_cloud_upload
+    ):
+        orig_photo = Photo(id=self.photo_id, url=self.photo_url)
+        cached_photo = Photo(
+            id=2,
+            url=self.transformed_url,
+            description="Transformed photo",
+            original_photo_id=self.photo_id,
+            is_transformed=True,
+        )
+        self.session.query().filter().first.return_value = cached_photo
+        transform_body = TransformPhotoModel(effect=PhotoEffect.SEPIA.value)
+
+        transformed_photo = await apply_transformation(
+            photo=orig_photo,
+            updated_by=self.user,
+            body=transform_body,
+            db=self.session,
+        )
+
+        assert transformed_photo is cached_photo
+        mock_cloud_upload.assert_not_called()
+        self.session.add.assert_not_called()
+
+    @patch("cloudinary.uploader.upload")
+    async def test_apply_transformation_reuses_stored_result(
+        self, mock_cloud_upload
+    ):
+        orig_photo = Photo(id=self.photo_id, url=self.photo_url)
+        self.session.query().filter().first.return_value = None
+        self.session.query().filter().filter().first.return_value = MagicMock(
+            url=self.transformed_url
+        )
+        transform_body = TransformPhotoModel(
+            description="Transformed photo", effect=PhotoEffect.SEPIA.value
+        )
+
+        transformed_photo = await apply_transformation(
+            photo=orig_photo,
+            updated_by=self.user,
+            body=transform_body,
+            db=self.session,
+        )
+
+        mock_cloud_upload.assert_not_called()
+        assert transformed_photo is not orig_photo
+        assert transformed_photo.url == self.transformed_url
+        assert transformed_photo.transformation_key == get_transformation_key(
+            self.photo_url, _get_transformation(transform_body)
+        )
+
+
+    @patch("src.repository.transform_photos.settings")
+    @patch("cloudinary.uploader.upload")
+    async def test_apply_transformation_delivery_url(
+        self, mock_cloud_upload, mock_settings
+    ):
+        mock_settings.transform_mode = TransformMode.DELIVERY_URL
+        mock_settings.upload_dedup_scope = UploadDedupScope.DISABLED
+        photo_url = "https://res.cloudinary.com/c/image/upload/PhotoShareApp/u/a.jpg"
+        orig_photo = Photo(id=self.photo_id, url=photo_url)
+        self.session.query().filter().first.return_value = None
+        transform_body = TransformPhotoModel(
+            effect=PhotoEffect.SEPIA.value, angle=20, crop=None, gravity=None
+        )
+
+        transformed_photo = await apply_transformation(
+            photo=orig_photo,
+            updated_by=self.user,
+            body=transform_body,
+            db=self.session,
+        )
+
+        mock_cloud_upload.assert_not_called()
+        assert transformed_photo.url == (
+            "https://res.cloudinary.com/c/image/upload/a_20,e_sepia/PhotoShareApp/u/a.jpg"
+        )
+        assert transformed_photo.original_photo_id == self.photo_id
+
+    @patch("src.repository.transform_photos.get_process_pool")
+    @patch("src.repository.transform_photos.get_storage")
+    async def test_apply_transformation_local_engine(
+        self, mock_get_storage, mock_get_process_pool
+    ):
+        storage = mock_get_storage.return_value
+        storage.download_async = AsyncMock(return_value=b"source")
+        storage.upload_async = AsyncMock(return_value=self.transformed_url)
+        mock_get_process_pool.return_value.run = AsyncMock(return_value=b"transformed")
+        self.session.query().filter().first.return_value = None
+        self.session.query().filter().filter().first.return_value = None
+        orig_photo = Photo(id=self.photo_id, url=self.photo_url)
+        transform_body = TransformPhotoModel(
+            effect=PhotoEffect.SEPIA.value,
+            width=100,
+            height=100,
+            crop=PhotoCrop.FILL.value,
+            gravity=None,
+            engine=TransformEngine.LOCAL,
+        )
+
+        transformed_photo = await apply_transformation(
+            photo=orig_photo,
+            updated_by=self.user,
+            body=transform_body,
+            db=self.session,
+        )
+
+        storage.download_async.assert_awaited_once_with(self.photo_url)
+        mock_get_process_pool.return_value.run.assert_awaited_once_with(
+            transform_image,
+            b"source",
+            [{"effect": "sepia", "width": 100, "height": 100, "crop": "fill"}],
+        )
+        assert storage.upload_async.call_args.args[0].getvalue() == b"transformed"
+        assert "transformation" not in storage.upload_async.call_args.kwargs
+        assert transformed_photo.url == self.transformed_url
+
+    async def test_apply_transformation_local_engine_unsupported(self):
+        self.session.query().filter().first.return_value = None
+        self.session.query().filter().filter().first.return_value = None
+        orig_photo = Photo(id=self.photo_id, url=self.photo_url)
+        transform_body = TransformPhotoModel(
+            effect=PhotoEffect.CARTOONIFY.value,
+            crop=None,
+            gravity=None,
+            engine=TransformEngine.LOCAL,
+        )
+
+        with self.assertRaises(HTTPException) as err:
+            await apply_transformation(
+                photo=orig_photo,
+                updated_by=self.user,
+                body=transform_body,
+                db=self.session,
+            )
+
+        assert err.exception.status_code == status.HTTP_400_BAD_REQUEST
+
+    @patch("src.repository.transform_photos.get_process_pool")
+    @patch("src.repository.transform_photos.get_storage")
+    @patch("src.repository.transform_photos.settings")
+    async def test_apply_transformation_storage_without_transformations(
+        self, mock_settings, mock_get_storage, mock_get_process_pool
+    ):
+        mock_settings.transform_engine = TransformEngine.STORAGE
+        mock_settings.transform_mode = TransformMode.DELIVERY_URL
+        storage = mock_get_storage.return_value
+        storage.supports_transformations = False
+        storage.download_async = AsyncMock(return_value=b"source")
+        storage.upload_async = AsyncMock(return_value=self.transformed_url)
+        mock_get_process_pool.return_value.run = AsyncMock(return_value=b"transformed")
+        self.session.query().filter().first.return_value = None
+        orig_photo = Photo(id=self.photo_id, url=self.photo_url)
+
+        transformed_photo = await apply_transformation(
+            photo=orig_photo,
+            updated_by=self.user,
+            body=TransformPhotoModel(
+                effect=PhotoEffect.SEPIA.value, angle=90, crop=None, gravity=None
+            ),
+            db=self.session,
+        )
+
+        storage.get_transformed_url.assert_not_called()
+        assert storage.upload_async.call_args.args[0].getvalue() == b"transformed"
+        assert transformed_photo.url == self.transformed_url
+        with self.assertRaises(HTTPException) as err:
+            await apply_transformation(
+                photo=orig_photo,
+                updated_by=self.user,
+                body=TransformPhotoModel(
+                    effect=PhotoEffect.CARTOONIFY.value, crop=None, gravity=None
+                ),
+                db=self.session,
+            )
+        assert err.exception.status_code == status.HTTP_400_BAD_REQUEST
+
+    @patch("src.repository.transform_photos.get_process_pool")
+    @patch("src.repository.transform_photos.get_storage")
+    @patch("src.repository.transform_photos.settings")
+    async def test_apply_transformation_local_fallback(
+        self, mock_settings, mock_get_storage, mock_get_process_pool
+    ):
+        mock_settings.transform_engine = TransformEngine.STORAGE
+        mock_settings.transform_mode = TransformMode.UPLOAD
+        mock_settings.transform_local_fallback_seconds = 0.01
+        mock_settings.upload_dedup_scope = UploadDedupScope.DISABLED
+        late_url = "https://res.cloudinary.com/image/upload/PhotoShareApp/user/late.jpg"
+        storage = mock_get_storage.return_value
+        storage.download_async = AsyncMock(return_value=b"source")
+        storage.delete_resources_async = AsyncMock()
+        storage.get_public_id_from_url.side_effect = lambda url: url
+
+        async def upload_async(file, **kwargs):
+            if "transformation" in kwargs:
+                await asyncio.sleep(0.05)
+                return late_url
+            return self.transformed_url
+
+        storage.upload_async = AsyncMock(side_effect=upload_async)
+        mock_get_process_pool.return_value.run = AsyncMock(return_value=b"transformed")
+        self.session.query().filter().first.return_value = None
+        orig_photo = Photo(id=self.photo_id, url=self.photo_url)
+        transform_body = TransformPhotoModel(
+            effect=PhotoEffect.SEPIA.value, angle=90, crop=None, gravity=None
+        )
+
+        transformed_photo = await apply_transformation(
+            photo=orig_photo,
+            updated_by=self.user,
+            body=transform_body,
+            db=self.session,
+        )
+
+        remote_call, local_call = storage.upload_async.call_args_list
+        assert "timeout" not in remote_call.kwargs
+        assert remote_call.kwargs["transformation"] == [
+            {"effect": "sepia", "angle": 90}
+        ]
+        assert local_call.args[0].getvalue() == b"transformed"
+        assert transformed_photo.url == self.transformed_url
+        storage.delete_resources_async.assert_not_called()
+        await asyncio.gather(*_late_uploads)
+        storage.delete_resources_async.assert_awaited_once_with([late_url])
+
+    @patch("cloudinary.uploader.upload")
+    async def test_apply_transformation_chain(self, mock_cloud_upload):
+        mock_cloud_upload.return_value = {"secure_url": self.transformed_url}
+        self.session.query().filter().first.return_value = None
+        self.session.query().filter().filter().first.return_value = None
+        orig_photo = Photo(id=self.photo_id, url=self.photo_url)
+        body = TransformChainModel(
+            description="Resized sepia photo",
+            steps=[
+                TransformStepModel(width=100, crop=PhotoCrop.SCALE.value),
+                TransformStepModel(),
+                TransformStepModel(effect=PhotoEffect.SEPIA.value),
+                TransformStepModel(effect=PhotoEffect.VIGNETTE.value),
+            ],
+        )
+
+        transformed_photo = await apply_transformation_chain(
+            photo=orig_photo, updated_by=self.user, body=body, db=self.session
+        )
+
+        mock_cloud_upload.assert_called_once()
+        assert mock_cloud_upload.call_args.kwargs["transformation"] == [
+            {"width": 100, "crop": "scale"},
+            {"effect": "sepia"},
+            {"effect": "vignette"},
+        ]
+        assert transformed_photo.url == self.transformed_url
+        assert transformed_photo.original_photo_id == self.photo_id
+        self.session.add.assert_called_once_with(transformed_photo)
+
+    async def test_apply_transformation_chain_without_parameters(self):
+        body = TransformChainModel(steps=[TransformStepModel()])
+
+        with self.assertRaises(HTTPException) as err:
+            await apply_transformation_chain(
+                photo=Photo(id=self.photo_id, url=self.photo_url),
+                updated_by=self.user,
+                body=body,
+                db=self.session,
+            )
+
+        assert err.exception.status_code == status.HTTP_400_BAD_REQUEST
+
+class TestBatchTransformPhotos(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.session = MagicMock(spec=Session)
+        self.user = User(id=1, user_name="test_user")
+        self.photo = Photo(
+            id=1,
+            url="https://res.cloudinary.com/image/upload/PhotoShareApp/u/a.jpg",
+            status=PhotoStatus.READY.value,
+        )
+        self.session.query().filter.return_value = [self.photo]
+        self.transformed_url = (
+            "https://res.cloudinary.com/image/upload/PhotoShareApp/user/7TGHVBVBV.jpg"
+        )
+
+    async def _apply_transformations(self, transformations):
+        return [
+            result
+            async for result in apply_transformations(
+                photo_ids=[1, 2],
+                transformations=transformations,
+                updated_by=self.user,
+                db=self.session,
+            )
+        ]
+
+    @patch("src.repository.transform_photos._get_batch_transformed_photo_urls")
+    @patch("src.repository.transform_photos._get_batch_transformed_photos")
+    @patch("cloudinary.uploader.upload")
+    async def test_apply_transformations(
+        self, mock_cloud_upload, mock_get_transformed_photos, mock_get_urls
+    ):
+        mock_cloud_upload.return_value = {"secure_url": self.transformed_url}
+        transformations = [
+            TransformPhotoModel(effect=PhotoEffect.SEPIA.value),
+            TransformPhotoModel(effect=PhotoEffect.SEPIA.value, description="Sepia"),
+            TransformPhotoModel(effect=PhotoEffect.VIGNETTE.value),
+        ]
+        cached_photo = Photo(id=3, url=self.transformed_url, original_photo_id=1)
+        cached_key = get_transformation_key(
+            self.photo.url, _get_transformation(transformations[2])
+        )
+        mock_get_transformed_photos.return_value = {(1, cached_key): cached_photo}
+        mock_get_urls.return_value = {}
+        created_photos = [Photo(id=4), Photo(id=5)]
+        self.session.scalars().all.return_value = created_photos
+
+        results = await self._apply_transformations(transformations)
+
+        assert [
+            (result["photo_id"], result["transformation_index"], result["status_code"])
+            for result in results
+        ] == [
+            (2, 0, status.HTTP_404_NOT_FOUND),
+            (2, 1, status.HTTP_404_NOT_FOUND),
+            (2, 2, status.HTTP_404_NOT_FOUND),
+            (1, 2, status.HTTP_200_OK),
+            (1, 0, status.HTTP_201_CREATED),
+            (1, 1, status.HTTP_201_CREATED),
+        ]
+        assert results[3]["photo"] is cached_photo
+        assert [result["photo"] for result in results[4:]] == created_photos
+        mock_cloud_upload.assert_called_once()
+        inserted_rows = self.session.scalars.call_args.args[1]
+        assert [row["url"] for row in inserted_rows] == [self.transformed_url] * 2
+        assert inserted_rows[1]["description"] == "Sepia"
+        self.session.commit.assert_called_once()
+
+    @patch("src.repository.transform_photos._get_batch_transformed_photo_urls")
+    @patch("src.repository.transform_photos._get_batch_transformed_photos")
+    @patch("cloudinary.uploader.upload")
+    async def test_apply_transformations_upload_error(
+        self, mock_cloud_upload, mock_get_transformed_photos, mock_get_urls
+    ):
+        mock_cloud_upload.side_effect = cloudinary.exceptions.Error("upload error")
+        mock_get_transformed_photos.return_value = {}
+        mock_get_urls.return_value = {}
+
+        results = await self._apply_transformations(
+            [TransformPhotoModel(effect=PhotoEffect.SEPIA.value)]
+        )
+
+        assert [result["status_code"] for result in results] == [
+            status.HTTP_404_NOT_FOUND, status.HTTP_400_BAD_REQUEST
+        ]
+        self.session.scalars.assert_not_called()
+        self.session.commit.assert_not_called()
+
+    @patch("src.repository.transform_photos.get_process_pool")
+    @patch("src.repository.transform_photos._make_transformed_photo_url")
+    @patch("src.repository.transform_photos._get_batch_transformed_photo_urls")
+    @patch("src.repository.transform_photos._get_batch_transformed_photos")
+    async def test_apply_transformations_bounded_by_process_pool(
+        self, mock_get_transformed_photos, mock_get_urls, mock_make_url,
+        mock_get_process_pool,
+    ):
+        mock_get_transformed_photos.return_value = {}
+        mock_get_urls.return_value = {}
+        mock_get_process_pool.return_value = MagicMock(max_workers=2)
+        running = 0
+        max_running = 0
+
+        async def make_url(**kwargs):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return self.transformed_url
+
+        mock_make_url.side_effect = make_url
+        self.session.scalars().all.return_value = [Photo(id=i) for i in range(3)]
+
+        await self._apply_transformations(
+            [
+                TransformPhotoModel(effect=PhotoEffect.SEPIA.value, width=width)
+                for width in (100, 200, 300)
+            ]
+        )
+
+        assert mock_make_url.call_count == 3
+        assert max_running == 2
+
+
+class TestExportPhotosQrCodes(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.session = MagicMock(spec=Session)
+        self.r = AsyncMock()
+        self.r.get.return_value = None
+        self.photos = [
+            Photo(
+                id=photo_id,
+                url=f"https://res.cloudinary.com/image/upload/{photo_id}.jpg",
+                status=PhotoStatus.READY.value,
+            )
+            for photo_id in (1, 2, 3)
+        ]
+        self.photos[1].status = PhotoStatus.PENDING.value
+        self.session.query().filter.return_value = self.photos
+
+    async def _generate_photos_qr_codes(self, photo_ids, params):
+        return [
+            result
+            async for result in generate_photos_qr_codes(
+                photo_ids=photo_ids, params=params, db=self.session, r=self.r
+            )
+        ]
+
+    async def test_generate_photos_qr_codes(self):
+        params = PhotoQrCodeModel(box_size=2, format=QrCodeFormat.PNG)
+
+        results = await self._generate_photos_qr_codes([4, 3, 2, 1, 3], params)
+
+        assert [
+            (result["photo_id"], result["status_code"]) for result in results[:2]
+        ] == [(4, status.HTTP_404_NOT_FOUND), (2, status.HTTP_409_CONFLICT)]
+        assert sorted(result["photo_id"] for result in results[2:]) == [1, 3]
+        for result in results[2:]:
+            assert result["status_code"] == status.HTTP_200_OK
+            with Image.open(BytesIO(result["qr_code"])) as img:
+                assert img.format == "PNG"
+        assert self.r.set.await_count == 2
+
+    @patch("src.repository.transform_photos.settings")
+    async def test_generate_photos_qr_codes_too_large(self, mock_settings):
+        mock_settings.qr_code_max_image_size = 10
+        params = PhotoQrCodeModel(box_size=2)
+
+        results = await self._generate_photos_qr_codes([1], params)
+
+        assert results[0]["status_code"] == status.HTTP_400_BAD_REQUEST
+        assert results[0]["qr_code"] is None
+
+
 class TestGenerateQrCodeForPhotos(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
-        self.photo_url = "https://res.cloudinary.com/image/upload/6AQ8KKI6.jpg"
+        self.photo_url = (
+            "https://res.cloudinary.com/image/upload/PhotoShareApp/user/6AQ8KKI6.jpg"
+        )
         self.photo_id = 1
 
-    async def test_generate_photo_qr_code(self):
-        photo: Photo = Photo(id=self.photo_id, url=self.photo_url)
+    async def test_generate_qr_code(self):
         params = [
             PhotoQrCodeModel(
                 module_drawer=QrModuleDrawer.VERTICAL,
@@ -262,8 +766,11 @@ class TestGenerateQrCodeForPhotos(unittest.IsolatedAsyncioTestCase):
             ),
         ]
         for param_set in params:
-            img: StyledPilImage = await generate_photo_qr_code(
-                photo=photo, params=param_set
+            img: StyledPilImage = generate_qr_code(
+                photo_url=self.photo_url,
+                module_drawer=param_set.module_drawer,
+                color_mask=param_set.color_mask,
+                box_size=param_set.box_size,
             )
             assert isinstance(img, StyledPilImage)
             assert img.box_size == param_set.box_size
@@ -274,6 +781,98 @@ class TestGenerateQrCodeForPhotos(unittest.IsolatedAsyncioTestCase):
                 img.module_drawer, module_drawer_map[param_set.module_drawer.value]
             )
 
+    async def test_generate_qr_code_reuses_qr_code(self):
+        params = dict(
+            photo_url=self.photo_url,
+            module_drawer=QrModuleDrawer.ROUNDED,
+            color_mask=QrColorMask.SOLID,
+        )
+        hits = _make_qr_code.cache_info().hits
+
+        small_img = generate_qr_code(box_size=2, **params)
+        large_img = generate_qr_code(box_size=4, **params)
+
+        assert _make_qr_code.cache_info().hits >= hits + 1
+        assert small_img.module_drawer is not large_img.module_drawer
+        assert large_img.pixel_size == small_img.pixel_size * 2
+
+    async def test_render_qr_code_releases_image(self):
+        images = []
+
+        def generate(**kwargs):
+            img = generate_qr_code(**kwargs)
+            images.append(weakref.ref(img.get_image()))
+            return img
+
+        with patch("src.utils.qr_code.generate_qr_code", side_effect=generate):
+            render_qr_code(
+                photo_url=self.photo_url,
+                module_drawer=QrModuleDrawer.SQUARE,
+                color_mask=QrColorMask.SOLID,
+                box_size=2,
+                image_format=QrCodeFormat.PNG,
+            )
+        gc.collect()
+
+        assert images[0]() is None
+
+    async def test_generate_photo_qr_code(self):
+        photo: Photo = Photo(id=self.photo_id, url=self.photo_url)
+        params = PhotoQrCodeModel(
+            module_drawer=QrModuleDrawer.ROUNDED,
+            color_mask=QrColorMask.SOLID,
+            box_size=4,
+        )
+
+        img_bytes = await generate_photo_qr_code(photo=photo, params=params)
+
+        with Image.open(BytesIO(img_bytes)) as img:
+            assert img.format == "JPEG"
+            assert img.size[0] == img.size[1]
+
+    async def test_generate_photo_qr_code_png(self):
+        photo: Photo = Photo(id=self.photo_id, url=self.photo_url)
+        params = PhotoQrCodeModel(box_size=4, format=QrCodeFormat.PNG)
+
+        img_bytes = await generate_photo_qr_code(photo=photo, params=params)
+
+        with Image.open(BytesIO(img_bytes)) as img:
+            assert img.format == "PNG"
+            assert img.mode == "L"
+
+    async def test_generate_photo_qr_code_svg(self):
+        photo: Photo = Photo(id=self.photo_id, url=self.photo_url)
+        params = PhotoQrCodeModel(
+            module_drawer=QrModuleDrawer.SQUARE,
+            color_mask=QrColorMask.HORIZONTAL,
+            box_size=4,
+            format=QrCodeFormat.SVG,
+        )
+
+        img_bytes = await generate_photo_qr_code(photo=photo, params=params)
+
+        img = ElementTree.fromstring(img_bytes)
+        png_bytes = await generate_photo_qr_code(
+            photo=photo, params=params.copy(update={"format": QrCodeFormat.PNG})
+        )
+        with Image.open(BytesIO(png_bytes)) as png_img:
+            assert img.get("width") == str(png_img.width)
+        paths = img.findall("{http://www.w3.org/2000/svg}path")
+        # The horizontal gradient fills columns with different colors.
+        assert len(paths) > 1
+        assert all(path.get("d").endswith("Z") for path in paths)
+
+    @patch("src.repository.transform_photos.settings")
+    async def test_generate_photo_qr_code_too_large(self, mock_settings):
+        mock_settings.qr_code_max_image_size = 500
+        photo: Photo = Photo(id=self.photo_id, url=self.photo_url)
+        params = PhotoQrCodeModel(box_size=20)
+
+        with self.assertRaises(HTTPException) as err:
+            await generate_photo_qr_code(photo=photo, params=params)
+
+        assert err.exception.status_code == status.HTTP_400_BAD_REQUEST
+
     async def test_generate_photo_qr_code_w_incorrect_params(self):
         params = [
             {
@@ -291,6 +890,11 @@ class TestGenerateQrCodeForPhotos(unittest.IsolatedAsyncioTestCase):
                 "color_mask": QrColorMask.RADIAL,
                 "box_size": -1,
             },
+            {
+                "module_drawer": QrModuleDrawer.CIRCLE,
+                "color_mask": QrColorMask.RADIAL,
+                "box_size": 1000,
+            },
         ]
         for param_set in params:
             try:
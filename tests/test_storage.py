@@ -0,0 +1,229 @@
+import io
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from PIL import Image
+
+from src.storage.cloudinary_storage import CloudinaryStorage
+from src.storage.local_storage import LocalStorage
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+JPEG_HEADER = b"\xff\xd8\xff\xe0"
+
+
+class TestLocalStorage(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_url = "http://testserver/api/storage"
+        self.storage = LocalStorage(
+            root=self.tmp_dir.name, base_url=self.base_url, signing_secret="secret"
+        )
+        self.storage.init()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_upload(self):
+        public_id = "PhotoShareApp/test_user/photo"
+        photo_url = await self.storage.upload_async(
+            io.BytesIO(PNG_HEADER + b"content"), public_id=public_id
+        )
+
+        assert photo_url == f"{self.base_url}/{public_id}.png"
+        assert self.storage.get_public_id_from_url(photo_url) == public_id
+        path = self.storage.get_path(f"{public_id}.png")
+        assert path.read_bytes() == PNG_HEADER + b"content"
+
+    def test_same_content_is_stored_once(self):
+        content = JPEG_HEADER + b"content"
+        first_url = self.storage.upload(io.BytesIO(content), "PhotoShareApp/u/first")
+        second_url = self.storage.upload(io.BytesIO(content), "PhotoShareApp/u/second")
+
+        first_path = self.storage.get_path(first_url[len(self.base_url) + 1:])
+        second_path = self.storage.get_path(second_url[len(self.base_url) + 1:])
+        assert os.path.samefile(first_path, second_path)
+        assert first_path.stat().st_nlink == 3
+
+    def test_upload_from_local_url(self):
+        source_url = self.storage.upload(
+            io.BytesIO(PNG_HEADER + b"content"), "PhotoShareApp/u/source"
+        )
+
+        copy_url = self.storage.upload(source_url, "PhotoShareApp/u/copy")
+
+        assert copy_url == f"{self.base_url}/PhotoShareApp/u/copy.png"
+
+    def test_delete_resources(self):
+        content = PNG_HEADER + b"content"
+        self.storage.upload(io.BytesIO(content), "PhotoShareApp/u/first")
+        self.storage.upload(io.BytesIO(content), "PhotoShareApp/u/second")
+
+        result = self.storage.delete_resources(
+            ["PhotoShareApp/u/first", "PhotoShareApp/u/missing"]
+        )
+
+        assert result == {
+            "deleted": {
+                "PhotoShareApp/u/first": "deleted",
+                "PhotoShareApp/u/missing": "not_found",
+            }
+        }
+        assert self.storage.get_path("PhotoShareApp/u/first.png") is None
+        assert self.storage.get_path("PhotoShareApp/u/second.png") is not None
+
+        self.storage.delete_resources(["PhotoShareApp/u/second"])
+        blobs = [files for _, _, files in os.walk(self.storage.blobs_dir)]
+        assert not any(blobs)
+
+    def test_get_path_outside_of_storage(self):
+        assert self.storage.get_path("../../etc/passwd") is None
+
+    def test_sign_upload(self):
+        public_id = "PhotoShareApp/u/signed"
+        signed = self.storage.sign_upload(public_id, expires_in=60)
+        fields = signed["fields"]
+
+        assert signed["upload_url"] == f"{self.base_url}/{public_id}"
+        assert self.storage.verify_upload_signature(
+            public_id, fields["expires"], fields["signature"]
+        )
+        assert not self.storage.verify_upload_signature(
+            "PhotoShareApp/u/other", fields["expires"], fields["signature"]
+        )
+        assert not self.storage.verify_upload_signature(
+            public_id, fields["expires"] + 1, fields["signature"]
+        )
+
+    def test_sign_upload_expired(self):
+        public_id = "PhotoShareApp/u/signed"
+        fields = self.storage.sign_upload(public_id, expires_in=-1)["fields"]
+
+        assert not self.storage.verify_upload_signature(
+            public_id, fields["expires"], fields["signature"]
+        )
+
+    def test_get_resource_url(self):
+        public_id = "PhotoShareApp/u/photo"
+        photo_url = self.storage.upload(io.BytesIO(JPEG_HEADER), public_id)
+
+        assert self.storage.get_resource_url(public_id) == photo_url
+        assert self.storage.get_resource_url("PhotoShareApp/u/missing") is None
+
+    def test_list_resources(self):
+        public_ids = [
+            "PhotoShareApp/u/b",
+            "PhotoShareApp/u.v/a",
+            "PhotoShareApp/u/a-1",
+            "PhotoShareApp/u/a",
+            "PhotoShareApp/u/a/b",
+            "Other/u/a",
+        ]
+        for public_id in public_ids:
+            self.storage.upload(io.BytesIO(JPEG_HEADER + public_id.encode()), public_id)
+
+        listed_ids = [
+            public_id
+            for public_id, _ in self.storage.list_resources("PhotoShareApp/")
+        ]
+
+        assert listed_ids == sorted(public_ids[:-1])
+
+    def test_download_max_bytes(self):
+        photo_url = self.storage.upload(
+            io.BytesIO(PNG_HEADER + b"content"), "PhotoShareApp/u/a"
+        )
+
+        assert self.storage.download(photo_url) == PNG_HEADER + b"content"
+        assert self.storage.download(photo_url, max_bytes=4) == PNG_HEADER[:5]
+
+    def test_upload_with_transformation(self):
+        image = io.BytesIO()
+        Image.new("RGB", (40, 20), (200, 100, 50)).save(image, format="PNG")
+        photo_url = self.storage.upload(
+            io.BytesIO(image.getvalue()), "PhotoShareApp/u/a"
+        )
+
+        transformed_url = self.storage.upload(
+            photo_url, "PhotoShareApp/u/b", transformation=[{"angle": 90}]
+        )
+
+        path = self.storage.get_path(transformed_url[len(self.base_url) + 1:])
+        with Image.open(path) as transformed_image:
+            assert transformed_image.size == (20, 40)
+        with self.assertRaises(ValueError):
+            self.storage.upload(
+                photo_url, "PhotoShareApp/u/c", transformation=[{"effect": "cartoonify"}]
+            )
+
+    def test_get_transformed_url(self):
+        photo_url = self.storage.upload(io.BytesIO(PNG_HEADER), "PhotoShareApp/u/a")
+
+        with self.assertRaises(ValueError):
+            self.storage.get_transformed_url(photo_url, [{"angle": 20}])
+
+
+class TestCloudinaryStorage(unittest.TestCase):
+    def setUp(self):
+        self.storage = CloudinaryStorage(
+            cloud_name="cloud", api_key="key", api_secret="secret"
+        )
+        self.photo_url = (
+            "https://res.cloudinary.com/cloud/image/upload/v17/PhotoShareApp/u/a.png"
+        )
+
+    def test_get_transformed_url(self):
+        transformed_url = self.storage.get_transformed_url(
+            self.photo_url,
+            [{"effect": "sepia", "angle": 20, "crop": "fill"}],
+        )
+
+        assert transformed_url == (
+            "https://res.cloudinary.com/cloud/image/upload/"
+            "a_20,c_fill,e_sepia/v17/PhotoShareApp/u/a.png"
+        )
+        assert self.storage.get_public_id_from_url(transformed_url) == (
+            "PhotoShareApp/u/a"
+        )
+
+    def test_get_transformed_url_chains_transformations(self):
+        transformed_url = self.storage.get_transformed_url(
+            self.storage.get_transformed_url(self.photo_url, [{"effect": "sepia"}]),
+            [{"width": 100}, {"effect": "vignette"}],
+        )
+
+        assert transformed_url == (
+            "https://res.cloudinary.com/cloud/image/upload/"
+            "e_sepia/w_100/e_vignette/v17/PhotoShareApp/u/a.png"
+        )
+
+    @patch("cloudinary.search.Search.execute")
+    def test_list_resources(self, mock_execute):
+        mock_execute.side_effect = [
+            {
+                "resources": [
+                    {
+                        "public_id": "PhotoShareApp/u/a",
+                        "created_at": "2024-01-02T03:04:05Z",
+                    }
+                ],
+                "next_cursor": "cursor",
+            },
+            {
+                "resources": [
+                    {
+                        "public_id": "PhotoShareApp/u/b",
+                        "created_at": "2024-01-02T03:04:06+00:00",
+                    }
+                ]
+            },
+        ]
+
+        resources = list(self.storage.list_resources("PhotoShareApp/"))
+
+        assert resources == [
+            ("PhotoShareApp/u/a", datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)),
+            ("PhotoShareApp/u/b", datetime(2024, 1, 2, 3, 4, 6, tzinfo=timezone.utc)),
+        ]
@@ -0,0 +1,79 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from src.services.storage_reconciliation import (
+    DELETED_FILE,
+    MISSING_FILE,
+    ORPHANED_FILE,
+    SKIPPED_FILE,
+    diff_sorted,
+    get_db_public_ids,
+    reconcile,
+)
+
+OLD = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class TestStorageReconciliation(unittest.TestCase):
+    def test_diff_sorted(self):
+        storage_resources = [("a", OLD), ("b", OLD), ("b", OLD), ("d", OLD)]
+        db_public_ids = ["b", "c", "c", "d", "e"]
+
+        diff = list(diff_sorted(storage_resources, db_public_ids))
+
+        assert diff == [
+            (ORPHANED_FILE, "a", OLD),
+            (MISSING_FILE, "c", None),
+            (MISSING_FILE, "e", None),
+        ]
+
+    def test_diff_sorted_unsorted_input(self):
+        with self.assertRaises(ValueError):
+            list(diff_sorted([("b", OLD), ("a", OLD)], []))
+
+    @patch("src.services.storage_reconciliation.get_db_public_ids")
+    def test_reconcile(self, mock_get_db_public_ids):
+        storage = MagicMock()
+        storage.list_resources.return_value = [
+            ("PhotoShareApp/u/a", OLD),
+            ("PhotoShareApp/u/b", OLD),
+            ("PhotoShareApp/u/c", OLD),
+            ("PhotoShareApp/u/d", datetime.now(timezone.utc)),
+        ]
+        mock_get_db_public_ids.return_value = ["PhotoShareApp/u/b"]
+
+        differences = list(
+            reconcile(
+                storage=storage,
+                db=MagicMock(),
+                delete_orphans=True,
+                min_age=timedelta(hours=1),
+                batch_size=1,
+            )
+        )
+
+        assert differences == [
+            (ORPHANED_FILE, "PhotoShareApp/u/a"),
+            (DELETED_FILE, "PhotoShareApp/u/a"),
+            (ORPHANED_FILE, "PhotoShareApp/u/c"),
+            (DELETED_FILE, "PhotoShareApp/u/c"),
+            (SKIPPED_FILE, "PhotoShareApp/u/d"),
+        ]
+        assert storage.delete_resources.call_args_list[0].args == (
+            ["PhotoShareApp/u/a"],
+        )
+        assert storage.delete_resources.call_args_list[1].args == (
+            ["PhotoShareApp/u/c"],
+        )
+
+    def test_get_db_public_ids(self):
+        db = MagicMock()
+        db.scalars.return_value = ["PhotoShareApp/u/a"]
+
+        public_ids = list(get_db_public_ids(db))
+
+        assert public_ids == ["PhotoShareApp/u/a"]
+        query = str(db.scalars.call_args.args[0])
+        assert "photos.public_id IS NOT NULL" in query
+        assert "ORDER BY photos.public_id" in query
@@ -0,0 +1,67 @@
+import io
+import struct
+import unittest
+
+from fastapi import HTTPException, UploadFile, status
+
+from src.utils.upload_validator import validate_upload
+
+
+def _png(width: int, height: int, payload: bytes = b"") -> bytes:
+    return (
+        b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+        + struct.pack(">II", width, height)
+        + b"\x08\x02\x00\x00\x00"
+        + payload
+    )
+
+
+def _jpeg(width: int, height: int, exif_size: int = 0) -> bytes:
+    app1 = b""
+    if exif_size:
+        app1 = b"\xff\xe1" + struct.pack(">H", exif_size + 2) + b"\x00" * exif_size
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app1 + sof + b"\xff\xda\x00\x02\xff\xd9"
+
+
+class TestUploadValidator(unittest.IsolatedAsyncioTestCase):
+    async def _validate(self, content: bytes, **kwargs) -> str:
+        file = UploadFile(filename="photo.jpg", file=io.BytesIO(content))
+        return await validate_upload(file, chunk_size=16, **kwargs)
+
+    async def test_validate_png(self):
+        content_hash = await self._validate(_png(10, 10))
+        assert len(content_hash) == 64
+
+    async def test_validate_jpeg_with_metadata(self):
+        content_hash = await self._validate(_jpeg(10, 10, exif_size=1000))
+        assert len(content_hash) == 64
+
+    async def test_validate_rewinds_file(self):
+        file = UploadFile(filename="photo.png", file=io.BytesIO(_png(1, 1)))
+        await validate_upload(file)
+        assert await file.read() == _png(1, 1)
+
+    async def test_validate_not_an_image(self):
+        with self.assertRaises(HTTPException) as err:
+            await self._validate(b"GIF89a" + b"\x00" * 100)
+        assert err.exception.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_validate_truncated_image(self):
+        with self.assertRaises(HTTPException) as err:
+            await self._validate(_jpeg(10, 10, exif_size=1000)[:500])
+        assert err.exception.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_validate_too_many_bytes(self):
+        with self.assertRaises(HTTPException) as err:
+            await self._validate(_png(10, 10, b"\x00" * 1000), max_bytes=100)
+        assert err.exception.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    async def test_validate_decompression_bomb(self):
+        with self.assertRaises(HTTPException) as err:
+            await self._validate(_png(100_000, 100_000), max_pixels=1_000_000)
+        assert err.exception.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+        with self.assertRaises(HTTPException) as err:
+            await self._validate(_jpeg(50_000, 50_000), max_pixels=1_000_000)
+        assert err.exception.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
@@ -0,0 +1,32 @@
+import unittest
+import zipfile
+from io import BytesIO
+
+from src.utils.zip_stream import ZipStream
+
+
+class TestZipStream(unittest.TestCase):
+    def test_add(self):
+        archive = ZipStream()
+
+        chunks = [
+            archive.add("a.png", b"image" * 100),
+            archive.add("b.svg", b"<svg/>" * 100, compress=True),
+            archive.close(),
+        ]
+
+        # Every file is sent as soon as it's added.
+        assert all(chunks)
+        with zipfile.ZipFile(BytesIO(b"".join(chunks))) as zip_file:
+            assert zip_file.testzip() is None
+            assert zip_file.read("a.png") == b"image" * 100
+            assert zip_file.read("b.svg") == b"<svg/>" * 100
+            infos = zip_file.infolist()
+        assert infos[0].compress_type == zipfile.ZIP_STORED
+        assert infos[1].compress_type == zipfile.ZIP_DEFLATED
+
+    def test_close_empty(self):
+        archive = ZipStream()
+
+        with zipfile.ZipFile(BytesIO(archive.close())) as zip_file:
+            assert zip_file.namelist() == []